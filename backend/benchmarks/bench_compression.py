@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark การบีบอัด response: อัตราส่วนและความเร็วของแต่ละ encoding (gzip / br / zstd
+เท่าที่ติดตั้ง) กับไฟล์ TXT / JSON / SRT เทียบกับการส่งผลที่บีบอัดไว้แล้วจาก cache
+
+ตัวอย่าง:
+    python benchmarks/bench_compression.py --sizes 1000,10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_transcript
+from services.artifact_store import ArtifactStore
+from services.compact_transcript import CompactTranscript
+from services.compression import ResponseCompressor, available_encodings
+from services.file_converter import FileConverter
+from services.render_cache import RenderCache
+
+
+def best_of(fn, repeat: int):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response compression")
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--formats", default="txt,json,srt")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    converter = FileConverter(ArtifactStore(directory=tempfile.mkdtemp(prefix="bench-compression-")))
+    compressor = ResponseCompressor(encodings=available_encodings())
+    writers = {"txt": converter.iter_txt, "json": converter.iter_json, "srt": converter.iter_srt}
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        transcript = CompactTranscript.from_transcript(make_transcript(size))
+        for file_format in args.formats.split(","):
+            writer = writers[file_format]
+
+            def chunks():
+                return (chunk.encode("utf-8") for chunk in writer(transcript))
+
+            identity_seconds, identity = best_of(lambda: b"".join(chunks()), args.repeat)
+            for encoding in compressor.encodings:
+                seconds, compressed = best_of(
+                    lambda: b"".join(compressor.compress_stream(chunks(), encoding)), args.repeat
+                )
+                # ครั้งถัดไปส่งจาก cache: เหลือแค่การค้น key
+                cache = RenderCache(max_bytes=len(compressed) * 2)
+                cache.set("key", compressed)
+                cached_seconds, _ = best_of(lambda: cache.get("key"), args.repeat)
+                results.append({
+                    "format": file_format,
+                    "snippets": size,
+                    "encoding": encoding,
+                    "identity_bytes": len(identity),
+                    "compressed_bytes": len(compressed),
+                    "ratio": round(len(compressed) / len(identity), 3),
+                    "identity_seconds": round(identity_seconds, 4),
+                    "stream_seconds": round(seconds, 4),
+                    "compress_mb_per_sec": round(len(identity) / (seconds - identity_seconds) / 1e6, 1)
+                    if seconds > identity_seconds else None,
+                    "cached_seconds": round(cached_seconds, 6),
+                })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':>6} {'snippets':>9} {'enc':>5} {'bytes':>10} {'ratio':>6} "
+          f"{'convert s':>10} {'+compress s':>12} {'MB/s':>6} {'cached s':>9}")
+    for r in results:
+        print(
+            f"{r['format']:>6} {r['snippets']:>9} {r['encoding']:>5} {r['identity_bytes']:>10} {r['ratio']:>6} "
+            f"{r['identity_seconds']:>10} {r['stream_seconds']:>12} {str(r['compress_mb_per_sec']):>6} "
+            f"{r['cached_seconds']:>9}"
+        )
+
+
+if __name__ == "__main__":
+    main()
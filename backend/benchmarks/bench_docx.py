@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark การสร้าง DOCX: เปรียบเทียบวิธีเดิม (python-docx สร้าง Document ใหม่และ
+แก้ style ทุก paragraph) กับ writer ปัจจุบันที่ใช้ template และเขียน document.xml โดยตรง
+
+ตัวอย่าง:
+    python benchmarks/bench_docx.py --sizes 1000,5000,10000,50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt
+
+from benchmarks.synthetic import make_transcript
+from services.artifact_store import ArtifactStore
+from services.file_converter import FileConverter
+
+
+def legacy_to_docx(converter: FileConverter, transcript, path: str, include_timestamps: bool = True):
+    """วิธีสร้าง DOCX แบบเดิม (ใช้เป็น baseline)"""
+    doc = Document()
+    title = doc.add_heading('YouTube Transcript', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph(f"Video ID: {transcript.video_id}")
+    doc.add_paragraph(f"Language: {transcript.language} ({transcript.language_code})")
+    doc.add_paragraph(f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}")
+    doc.add_paragraph("")
+    for snippet in transcript:
+        if include_timestamps:
+            start_time = converter._format_timestamp(snippet.start)
+            end_time = converter._format_timestamp(snippet.start + snippet.duration)
+            timestamp_para = doc.add_paragraph(f"[{start_time} - {end_time}]")
+            timestamp_para.style.font.size = Pt(9)
+            timestamp_para.style.font.color.rgb = None
+        text_para = doc.add_paragraph(snippet.text)
+        text_para.style.font.size = Pt(11)
+        doc.add_paragraph("")
+    doc.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DOCX writers")
+    parser.add_argument("--sizes", default="1000,5000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument(
+        "--legacy-max", type=int, default=5000,
+        help="ไม่รันวิธีเดิมกับ transcript ที่ยาวกว่านี้ (วิธีเดิมช้ามาก)"
+    )
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    converter = FileConverter(ArtifactStore(directory=tempfile.mkdtemp(prefix="bench-docx-")))
+    # โหลด template ก่อนจับเวลา (เหมือน process ที่รันอยู่แล้ว)
+    converter.artifact_store.release(converter.to_docx(make_transcript(1)))
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        transcript = make_transcript(size)
+        row = {"snippets": size}
+        names = ("legacy", "template") if size <= args.legacy_max else ("template",)
+        for name in names:
+            best = None
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                if name == "legacy":
+                    path = converter.artifact_store.create(".docx")
+                    legacy_to_docx(converter, transcript, path)
+                else:
+                    path = converter.to_docx(transcript)
+                elapsed = time.perf_counter() - started
+                converter.artifact_store.release(path)
+                best = elapsed if best is None else min(best, elapsed)
+            row[f"{name}_seconds"] = round(best, 3)
+            row[f"{name}_snippets_per_sec"] = round(size / best)
+        if "legacy_seconds" in row:
+            row["speedup"] = round(row["legacy_seconds"] / row["template_seconds"], 1)
+        results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'snippets':>9} {'legacy s':>9} {'template s':>11} {'speedup':>8}")
+    for r in results:
+        legacy = r.get("legacy_seconds", "-")
+        speedup = f"{r['speedup']}x" if "speedup" in r else "-"
+        print(f"{r['snippets']:>9} {legacy:>9} {r['template_seconds']:>11} {speedup:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark การใช้ connection ซ้ำ: เปรียบเทียบการสร้าง session ใหม่ทุก fetch (เหมือนเดิม)
+กับ session แบบ keep-alive แยกต่อ thread ที่ใช้ adapter (connection pool) ร่วมกัน
+(แบบเดียวกับ Egress) โดยยิงไปที่ YouTube stub server
+
+หมายเหตุ: stub เป็น HTTP ธรรมดา ตัวเลขจึงยังไม่รวมต้นทุน TLS handshake ของ youtube.com จริง
+(ซึ่งเป็นส่วนที่ประหยัดได้มากที่สุด) ให้ดูจำนวน connection ที่เปิดใหม่ประกอบ
+
+ตัวอย่าง:
+    python benchmarks/bench_http_session.py --fetches 200 --threads 8
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from youtube_transcript_api import YouTubeTranscriptApi
+
+from benchmarks.youtube_stub import YouTubeStubServer
+from services.http_session import ConnectionStats, create_adapter, create_session
+
+
+def run_mode(mode: str, fetches: int, threads: int) -> dict:
+    """ดึง transcript จำนวน fetches ครั้งด้วยโหมด "fresh" หรือ "shared" """
+    shared = create_adapter() if mode == "shared" else None
+    local = threading.local()
+    fresh_stats = ConnectionStats()
+
+    def fetch_one(i: int) -> float:
+        started = time.perf_counter()
+        if shared is not None:
+            if not hasattr(local, "api"):
+                local.api = YouTubeTranscriptApi(http_client=create_session(adapter=shared))
+            local.api.fetch(f"bench{i}-20")
+        else:
+            session = create_session()
+            YouTubeTranscriptApi(http_client=session).fetch(f"bench{i}-20")
+            session.close()
+            for _ in range(session.connection_stats.requests):
+                fresh_stats.add_request()
+            for _ in range(session.connection_stats.new_connections):
+                fresh_stats.add_connection()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(fetch_one, range(fetches)))
+    elapsed = time.perf_counter() - started
+
+    connections = shared.connection_stats.stats() if shared is not None else fresh_stats.stats()
+    return {
+        "mode": mode,
+        "fetches": fetches,
+        "seconds": round(elapsed, 3),
+        "fetches_per_sec": round(fetches / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+        "new_connections": connections["new_connections"],
+        "reuse_ratio": connections["reuse_ratio"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HTTP connection reuse")
+    parser.add_argument("--fetches", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="latency ของ stub ต่อ request (วินาที)")
+    parser.add_argument("--port", type=int, default=8612)
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    stub = YouTubeStubServer(port=args.port, latency=args.latency).start().install()
+    try:
+        results = [run_mode(mode, args.fetches, args.threads) for mode in ("fresh", "shared")]
+    finally:
+        stub.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'mode':>7} {'fetch/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'new conns':>10} {'reuse':>6}")
+    for r in results:
+        print(
+            f"{r['mode']:>7} {r['fetches_per_sec']:>8} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+            f"{r['new_connections']:>10} {r['reuse_ratio']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark memory ของ transcript ใน cache: FetchedTranscript (object ต่อ snippet)
+เทียบกับ CompactTranscript (columnar) วัดด้วย tracemalloc เป็น bytes ต่อ snippet
+และวัดเวลา iterate ทั้ง transcript / ขนาดที่ pickle ส่งไป render worker
+
+ตัวอย่าง:
+    python benchmarks/bench_memory.py --sizes 1000,10000,50000
+"""
+
+import argparse
+import gc
+import json
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_transcript
+from services.compact_transcript import CompactTranscript, snippet_rows
+from services.transcript_cache import deserialize_transcript, serialize_transcript
+
+
+def measure_allocation(build) -> tuple:
+    """คืน (object, จำนวน bytes ที่ยังถูกใช้หลังสร้าง object)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = build()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return obj, allocated
+
+
+def iterate_seconds(transcript) -> float:
+    started = time.perf_counter()
+    for _ in snippet_rows(transcript):
+        pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memory ของ transcript")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        # สร้างจาก bytes บน disk เหมือนที่ cache ทำ (ข้อความไม่ถูกใช้ร่วมกับ object ต้นฉบับ)
+        data = serialize_transcript(make_transcript(size))
+        compact_source = deserialize_transcript(data)
+
+        fetched, fetched_bytes = measure_allocation(lambda: make_transcript(size))
+        compact, compact_bytes = measure_allocation(lambda: CompactTranscript.from_bytes(compact_source.to_bytes()))
+
+        results.append({
+            "snippets": size,
+            "fetched_bytes_per_snippet": round(fetched_bytes / size, 1),
+            "compact_bytes_per_snippet": round(compact_bytes / size, 1),
+            "reduction": round(fetched_bytes / compact_bytes, 1),
+            "fetched_iterate_ms": round(iterate_seconds(fetched) * 1000, 2),
+            "compact_iterate_ms": round(iterate_seconds(compact) * 1000, 2),
+            "fetched_pickle_bytes": len(pickle.dumps(fetched)),
+            "compact_pickle_bytes": len(pickle.dumps(compact)),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"{'snippets':>9} {'fetched B/snip':>15} {'compact B/snip':>15} {'reduction':>10} "
+        f"{'iter ms (f/c)':>16} {'pickle KB (f/c)':>17}"
+    )
+    for r in results:
+        iterate = f"{r['fetched_iterate_ms']}/{r['compact_iterate_ms']}"
+        pickled = f"{r['fetched_pickle_bytes'] // 1024}/{r['compact_pickle_bytes'] // 1024}"
+        print(
+            f"{r['snippets']:>9} {r['fetched_bytes_per_snippet']:>15} {r['compact_bytes_per_snippet']:>15} "
+            f"{str(r['reduction']) + 'x':>10} {iterate:>16} {pickled:>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
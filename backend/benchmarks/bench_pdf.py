@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark การสร้าง PDF: เปรียบเทียบ layout "flow" (platypus) กับ "fast" (canvas)
+วัดเวลา build และ peak RSS โดยรันแต่ละกรณีใน subprocess แยก
+
+ตัวอย่าง:
+    python benchmarks/bench_pdf.py --sizes 1000,10000,50000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def run_case(layout: str, snippet_count: int) -> dict:
+    """รัน 1 กรณี (ใน process ปัจจุบัน) แล้วคืนเวลาและ peak RSS"""
+    from benchmarks.synthetic import make_transcript
+    from services.artifact_store import ArtifactStore
+    from services.file_converter import FileConverter
+
+    transcript = make_transcript(snippet_count)
+    converter = FileConverter(ArtifactStore(directory=tempfile.mkdtemp(prefix="bench-pdf-")))
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    path = converter.to_pdf(transcript, include_timestamps=True, layout=layout)
+    elapsed = time.perf_counter() - started
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    size = os.path.getsize(path)
+    converter.artifact_store.release(path)
+    return {
+        "layout": layout,
+        "snippets": snippet_count,
+        "seconds": round(elapsed, 3),
+        "peak_rss_mb": round(peak_kb / 1024, 1),
+        "rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1),
+        "file_kb": round(size / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark PDF layouts")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--layouts", default="flow,fast")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        layout, count = args.case.split(":")
+        print(json.dumps(run_case(layout, int(count))))
+        return
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        for layout in args.layouts.split(","):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--case", f"{layout}:{size}"],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'layout':<8} {'snippets':>9} {'seconds':>9} {'peak MB':>9} {'growth MB':>10} {'file KB':>9}")
+    for r in results:
+        print(f"{r['layout']:<8} {r['snippets']:>9} {r['seconds']:>9} {r['peak_rss_mb']:>9} {r['rss_growth_mb']:>10} {r['file_kb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark search index: เวลา index transcript จำนวนมาก และ latency ของการค้นหา
+(คำทั่วไป / คำที่พบน้อย / วลี / จำกัดเฉพาะ video)
+
+ตัวอย่าง:
+    python benchmarks/bench_search.py --documents 2000 --snippets 300
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.compact_transcript import CompactTranscript
+from services.search_index import SearchIndex
+
+
+VOCABULARY = [f"term{i}" for i in range(5000)]
+
+
+def make_document(doc: int, snippets: int, rng: random.Random) -> CompactTranscript:
+    """transcript synthetic ที่ใช้คำสุ่มจากคลังคำ (การกระจายแบบ Zipf คร่าวๆ)"""
+    texts = [
+        " ".join(VOCABULARY[min(len(VOCABULARY) - 1, int(rng.paretovariate(1.0)) - 1)] for _ in range(10))
+        + f" marker{doc}x{i}"
+        for i in range(snippets)
+    ]
+    return CompactTranscript.from_columns(
+        video_id=f"video{doc:07d}",
+        language="English",
+        language_code="en",
+        is_generated=True,
+        texts=texts,
+        starts=[i * 2.5 for i in range(snippets)],
+        durations=[2.4] * snippets,
+    )
+
+
+def time_queries(index: SearchIndex, queries, repeat: int, **kwargs) -> dict:
+    latencies = []
+    hits = 0
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            hits += len(index.search(query, **kwargs))
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return {
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 2),
+        "avg_hits": round(hits / len(latencies), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark search index")
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--snippets", type=int, default=300, help="จำนวน snippet ต่อ transcript")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tokenizer", default="unicode61")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-search-"), "search.sqlite3")
+    index = SearchIndex(path=path, tokenizer=args.tokenizer)
+    rng = random.Random(42)
+
+    started = time.perf_counter()
+    for doc in range(args.documents):
+        index.index_transcript(make_document(doc, args.snippets, rng))
+    index_seconds = time.perf_counter() - started
+    total_snippets = args.documents * args.snippets
+
+    cases = {
+        "common_term": ["term0", "term1", "term2"],
+        "rare_term": ["term4000", "term3500", "term4999"],
+        "two_terms": ["term0 term3", "term1 term10"],
+        "prefix": ["term12*"],
+        "phrase": ['"term0 term0"', '"term1 term0"'],
+        "exact_marker": [f"marker{args.documents // 2}x7"],
+    }
+    results = {
+        "documents": args.documents,
+        "snippets": total_snippets,
+        "index_seconds": round(index_seconds, 2),
+        "snippets_per_sec": round(total_snippets / index_seconds),
+        "db_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+        "queries": {name: time_queries(index, queries, args.repeat) for name, queries in cases.items()},
+        "filtered_video": time_queries(index, ["term0"], args.repeat, video_id=f"video{args.documents // 3:07d}"),
+    }
+    index.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(
+        f"indexed {results['documents']} transcripts / {results['snippets']} snippets in "
+        f"{results['index_seconds']}s ({results['snippets_per_sec']} snippets/s, {results['db_mb']} MB)"
+    )
+    print(f"{'query':>15} {'p50 ms':>8} {'p99 ms':>8} {'hits':>6}")
+    for name, r in list(results["queries"].items()) + [("filtered_video", results["filtered_video"])]:
+        print(f"{name:>15} {r['p50_ms']:>8} {r['p99_ms']:>8} {r['avg_hits']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark การสร้างซับไตเติล (SRT / WebVTT / JSON): เปรียบเทียบวิธีทีละ snippet แบบเดิม
+(หาร/mod float และ format timestamp สองครั้งต่อ snippet, json.dumps ต่อ snippet) กับ writer
+ปัจจุบันที่จัดรูปแบบ timestamp เป็นชุดจาก array start/duration
+
+ตัวอย่าง:
+    python benchmarks/bench_subtitles.py --sizes 1000,10000,50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import make_transcript
+from services.artifact_store import ArtifactStore
+from services.compact_transcript import CompactTranscript, snippet_rows
+from services.file_converter import FileConverter
+
+
+def legacy_timestamp(seconds: float, separator: str) -> str:
+    """timestamp ทีละค่าแบบเดียวกับ _format_timestamp (เพิ่ม millisecond)"""
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    secs = int(seconds % 60)
+    millis = int(round((seconds - int(seconds)) * 1000)) % 1000
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def legacy_srt(transcript) -> str:
+    parts = []
+    for index, (text, start, duration) in enumerate(snippet_rows(transcript), 1):
+        start_time = legacy_timestamp(start, ",")
+        end_time = legacy_timestamp(start + duration, ",")
+        parts.append(f"{index}\n{start_time} --> {end_time}\n{text}\n\n")
+    return "".join(parts)
+
+
+def legacy_vtt(transcript) -> str:
+    parts = ["WEBVTT\n\n"]
+    for text, start, duration in snippet_rows(transcript):
+        start_time = legacy_timestamp(start, ".")
+        end_time = legacy_timestamp(start + duration, ".")
+        parts.append(f"{start_time} --> {end_time}\n{text}\n\n")
+    return "".join(parts)
+
+
+def legacy_json(transcript) -> str:
+    snippets = ", ".join(
+        json.dumps({"text": text, "start": start, "duration": duration}, ensure_ascii=False)
+        for text, start, duration in snippet_rows(transcript)
+    )
+    return f'{{"snippets": [{snippets}]}}'
+
+
+def best_of(fn, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subtitle writers")
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    converter = FileConverter(ArtifactStore(directory=tempfile.mkdtemp(prefix="bench-subtitles-")))
+    cases = {
+        "srt": (legacy_srt, lambda t: "".join(converter.iter_srt(t))),
+        "vtt": (legacy_vtt, lambda t: "".join(converter.iter_vtt(t))),
+        "json": (legacy_json, lambda t: "".join(converter.iter_json(t))),
+    }
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(",")]:
+        # ใช้รูปแบบเดียวกับที่เก็บใน cache (CompactTranscript)
+        transcript = CompactTranscript.from_transcript(make_transcript(size))
+        for name, (legacy, batched) in cases.items():
+            legacy_seconds = best_of(lambda: legacy(transcript), args.repeat)
+            batched_seconds = best_of(lambda: batched(transcript), args.repeat)
+            results.append({
+                "format": name,
+                "snippets": size,
+                "legacy_seconds": round(legacy_seconds, 4),
+                "batched_seconds": round(batched_seconds, 4),
+                "batched_snippets_per_sec": round(size / batched_seconds),
+                "speedup": round(legacy_seconds / batched_seconds, 1),
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'format':>6} {'snippets':>9} {'legacy s':>9} {'batched s':>10} {'snippets/s':>11} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['format']:>6} {r['snippets']:>9} {r['legacy_seconds']:>9} {r['batched_seconds']:>10} "
+            f"{r['batched_snippets_per_sec']:>11} {str(r['speedup']) + 'x':>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark การ scale ตามจำนวน worker: รัน backend ด้วย gunicorn (gunicorn.conf.py) ที่ WEB_CONCURRENCY
+ต่างๆ กับ YouTube stub server แล้ววัด throughput ของ endpoint ที่ใช้ CPU (แปลงไฟล์จาก cache)
+
+ทุก worker ใช้ disk cache และ shared state (sqlite) ไฟล์เดียวกัน จึงรายงานจำนวน request ที่ไปถึง
+YouTube stub ด้วย (ควรเท่ากับจำนวน video ไม่ใช่จำนวน worker x video)
+
+throughput จะเพิ่มได้ไม่เกินจำนวน CPU ของเครื่อง (แสดงใน cpu_count)
+
+ตัวอย่าง:
+    python benchmarks/bench_workers.py --workers 1,2,4 --requests 400
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import requests
+
+from benchmarks.run_all import free_port, run_endpoint
+from benchmarks.youtube_stub import YouTubeStubServer
+
+
+# config ของ gunicorn สำหรับ benchmark: ใช้ gunicorn.conf.py จริง + ชี้ youtube-transcript-api ไปที่ stub ในทุก worker
+BENCH_CONFIG = """
+exec(open({config!r}).read())
+accesslog = None
+
+
+def post_worker_init(worker):
+    from youtube_transcript_api import _transcripts
+    _transcripts.WATCH_URL = {stub!r} + "/watch?v={{video_id}}"
+    _transcripts.INNERTUBE_API_URL = {stub!r} + "/youtubei/v1/player?key={{api_key}}"
+"""
+
+# endpoint ที่วัด: (ชื่อ, payload) ทั้งหมดเป็น download จาก transcript ที่อยู่ใน cache แล้ว
+CASES = [
+    ("download_txt", {"file_format": "txt"}),
+    ("download_srt", {"file_format": "srt"}),
+    ("preview", None),
+]
+
+
+def start_gunicorn(workers: int, port: int, stub_url: str, work_dir: str) -> subprocess.Popen:
+    """รัน gunicorn ใน process แยก แล้วรอจน /api/health ตอบ"""
+    config_path = os.path.join(work_dir, f"gunicorn-bench-{workers}.py")
+    with open(config_path, "w") as f:
+        f.write(BENCH_CONFIG.format(config=os.path.join(BACKEND_DIR, "gunicorn.conf.py"), stub=stub_url))
+
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        SHARED_STATE_BACKEND="sqlite",
+        SHARED_STATE_PATH=os.path.join(work_dir, "state.sqlite3"),
+        TRANSCRIPT_CACHE_DISK_PATH=os.path.join(work_dir, "cache.sqlite3"),
+        SEARCH_INDEX_PATH=os.path.join(work_dir, "search.sqlite3"),
+        JOB_STORE_PATH=os.path.join(work_dir, "jobs.sqlite3"),
+        JOB_RESULT_DIR=os.path.join(work_dir, "jobs"),
+        ARTIFACT_DIR=os.path.join(work_dir, "artifacts"),
+        EGRESS_RATE="0",
+        LOG_LEVEL="warning",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "main:app", "-c", config_path],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn หยุดทำงาน (exit code {process.returncode})")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn ไม่พร้อมภายใน 60 วินาที")
+
+
+def worker_pids(base_url: str, samples: int = 50) -> int:
+    """นับจำนวน worker ที่ตอบ request จริง (จาก pid ใน /api/health, เปิด connection ใหม่ทุกครั้ง)"""
+    return len({requests.get(f"{base_url}/api/health").json()["worker"]["pid"] for _ in range(samples)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark throughput scaling across workers")
+    parser.add_argument("--workers", default="1,2,4", help="จำนวน worker ที่วัด คั่นด้วย comma")
+    parser.add_argument("--requests", type=int, default=300, help="จำนวน request ต่อ endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--videos", type=int, default=8, help="จำนวน video ที่วนใช้ (อยู่ใน cache)")
+    parser.add_argument("--snippets", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    stub = YouTubeStubServer(latency=args.latency, snippet_count=args.snippets).start()
+    results = []
+    try:
+        for workers in [int(w) for w in args.workers.split(",")]:
+            work_dir = tempfile.mkdtemp(prefix=f"bench-workers-{workers}-")
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            process = start_gunicorn(workers, port, stub.base_url, work_dir)
+            try:
+                run_id = uuid.uuid4().hex[:8]
+                videos = [f"w{run_id}v{i}-{args.snippets}" for i in range(args.videos)]
+                upstream_before = stub.request_count
+                # ดึงทุก video ครั้งเดียว (เข้า disk cache ที่ทุก worker ใช้ร่วมกัน)
+                for video_id in videos:
+                    requests.post(f"{base_url}/api/transcripts/preview", json={"url": video_id})
+                row = {"workers": workers, "responding_workers": worker_pids(base_url)}
+                video_ids = [videos[i % len(videos)] for i in range(args.requests)]
+                for name, extra in CASES:
+                    path = "/api/transcripts/preview" if extra is None else "/api/transcripts/download"
+
+                    def payload(video_id, extra=extra):
+                        return {"url": video_id, **(extra or {})}, None
+
+                    row[name] = run_endpoint(base_url, "POST", path, payload, video_ids, args.concurrency)
+                # request ไป YouTube ต่อ video (list + fetch) ไม่ขึ้นกับจำนวน worker เพราะ cache ใช้ร่วมกัน
+                row["upstream_requests"] = stub.request_count - upstream_before
+                results.append(row)
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+    finally:
+        stub.stop()
+
+    cpu_count = os.cpu_count() or 1
+    baseline = {name: results[0][name]["throughput_rps"] for name, _ in CASES} if results else {}
+    for row in results:
+        for name, _ in CASES:
+            rps = row[name]["throughput_rps"]
+            # ประสิทธิภาพเทียบกับการ scale แบบ linear จาก worker ตัวแรกที่วัด (ไม่เกินจำนวน CPU)
+            ideal = baseline[name] * min(row["workers"], cpu_count) / min(results[0]["workers"], cpu_count)
+            row[name]["scaling_efficiency"] = round(rps / ideal, 2) if ideal else 0.0
+
+    if args.json:
+        print(json.dumps({"cpu_count": cpu_count, "results": results}, indent=2))
+        return
+
+    print(f"cpu_count: {cpu_count}")
+    header = f"{'workers':>7} {'pids':>5} {'upstream':>9}"
+    for name, _ in CASES:
+        header += f" {name + ' rps':>18} {'eff':>5}"
+    print(header)
+    for row in results:
+        line = f"{row['workers']:>7} {row['responding_workers']:>5} {row['upstream_requests']:>9}"
+        for name, _ in CASES:
+            line += f" {row[name]['throughput_rps']:>18} {row[name]['scaling_efficiency']:>5}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
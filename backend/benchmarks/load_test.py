@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Load test สำหรับ /api/transcripts/preview โดยใช้ YouTube stub server
+
+เปรียบเทียบ latency (p50/p99) ระหว่าง:
+  - blocking: เรียก fetch_transcript ตรงใน async handler (พฤติกรรมเดิม)
+  - threaded: รันผ่าน thread pool ของ TranscriptService
+
+ตัวอย่าง:
+    python benchmarks/load_test.py --clients 50 --requests 4 --latency 0.05
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import uvicorn
+
+from benchmarks.youtube_stub import YouTubeStubServer
+
+
+def percentile(values, pct: float) -> float:
+    """คำนวณ percentile แบบ nearest-rank"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def start_app(port: int):
+    """รัน FastAPI app ใน background thread"""
+    import main
+
+    config = uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def run_clients(base_url: str, clients: int, requests_per_client: int) -> dict:
+    """ยิง request พร้อมกันจาก clients หลายตัว แล้ววัด latency"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(clients)
+
+    def client():
+        session = requests.Session()
+        barrier.wait()
+        for _ in range(requests_per_client):
+            # ใช้ video ID ไม่ซ้ำกันเพื่อไม่ให้ cache ช่วย
+            payload = {"url": f"vid{uuid.uuid4().hex[:8]}", "languages": ["en"]}
+            started = time.perf_counter()
+            response = session.post(f"{base_url}/api/transcripts/preview", json=payload)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors.append(response.status_code)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies) + len(errors),
+        "errors": len(errors),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+    }
+
+
+def make_blocking(service):
+    """จำลองพฤติกรรมเดิม: เรียก fetch แบบ synchronous ใน event loop"""
+    async def fetch_transcript_blocking(video_id, languages=None, preserve_formatting=False, translate_to=None):
+        return service.fetch_transcript(
+            video_id, languages=languages, preserve_formatting=preserve_formatting, translate_to=translate_to
+        )
+    service.fetch_transcript_async = fetch_transcript_blocking
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test ของ preview endpoint")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=4, help="จำนวน request ต่อ client")
+    parser.add_argument("--latency", type=float, default=0.05, help="latency ของ stub ต่อ request (วินาที)")
+    parser.add_argument("--snippets", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8611)
+    parser.add_argument("--modes", default="blocking,threaded")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    stub = YouTubeStubServer(latency=args.latency, snippet_count=args.snippets).start().install()
+
+    import main as app_module
+    from services.transcript_service import TranscriptService
+
+    server, thread = start_app(args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    results = {}
+    try:
+        for mode in args.modes.split(","):
+            service = TranscriptService()
+            if mode == "blocking":
+                make_blocking(service)
+            app_module.transcript_service = service
+            results[mode] = run_clients(base_url, args.clients, args.requests)
+            service.shutdown()
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        stub.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"clients={args.clients} requests/client={args.requests} stub latency={args.latency * 1000:.0f}ms")
+    print(f"{'mode':<10} {'p50 ms':>9} {'p99 ms':>9} {'rps':>8} {'errors':>7}")
+    for mode, result in results.items():
+        print(f"{mode:<10} {result['p50_ms']:>9} {result['p99_ms']:>9} {result['throughput_rps']:>8} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite ของ pipeline fetch → convert ทั้งหมด ใช้เทียบก่อน/หลังแก้ FileConverter / TranscriptService
+  - endpoints: ยิง request ไปทุก endpoint ใน main.py (app จริงบน uvicorn + YouTube stub server)
+    วัดทั้งแบบ cold (video ใหม่ ต้องดึงจาก stub) และ warm (อยู่ใน cache แล้ว)
+  - micro: to_txt / to_pdf / to_docx / _format_timestamp ที่ขนาด transcript ต่างๆ
+
+ผลลัพธ์เป็น JSON (--output) และเทียบกับผลครั้งก่อนได้ด้วย --compare (exit code 1 ถ้าช้าลงเกิน threshold)
+
+ตัวอย่าง:
+    python benchmarks/run_all.py --output bench-baseline.json
+    python benchmarks/run_all.py --compare bench-baseline.json --threshold 0.15
+    python benchmarks/run_all.py --suites micro --sizes 1000,50000
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import requests
+
+from benchmarks.load_test import percentile, start_app
+from benchmarks.synthetic import make_transcript
+from benchmarks.youtube_stub import YouTubeStubServer
+
+
+# ---------------------------------------------------------------------------
+# micro-benchmarks ของ FileConverter
+# ---------------------------------------------------------------------------
+
+def best_of(fn, repeat: int) -> float:
+    """เวลาที่ดีที่สุด (วินาที) จากการรัน fn ซ้ำ repeat ครั้ง"""
+    best = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_micro(sizes, repeat: int, pdf_layout: str) -> list:
+    """วัดเวลาแปลงไฟล์แต่ละรูปแบบ (ไม่รวมเวลาดึง transcript)"""
+    from services.artifact_store import ArtifactStore
+    from services.compact_transcript import CompactTranscript
+    from services.file_converter import FileConverter
+
+    converter = FileConverter(ArtifactStore(directory=tempfile.mkdtemp(prefix="bench-suite-")))
+    # โหลด font / template ก่อนจับเวลา (เหมือน process ที่รันอยู่แล้ว)
+    warmup = make_transcript(1)
+    for path in (converter.to_txt(warmup), converter.to_pdf(warmup, layout=pdf_layout), converter.to_docx(warmup)):
+        converter.artifact_store.release(path)
+
+    def converted(method, *args, **kwargs):
+        return lambda: converter.artifact_store.release(method(*args, **kwargs))
+
+    results = []
+    for size in sizes:
+        # ใช้ CompactTranscript เหมือนที่ service เก็บใน cache และส่งให้ converter
+        transcript = CompactTranscript.from_transcript(make_transcript(size))
+        timestamps = [value for start, duration in zip(transcript.starts, transcript.durations)
+                      for value in (start, start + duration)]
+        cases = {
+            "to_txt": converted(converter.to_txt, transcript),
+            "to_pdf": converted(converter.to_pdf, transcript, layout=pdf_layout),
+            "to_docx": converted(converter.to_docx, transcript),
+            "_format_timestamp": lambda: [converter._format_timestamp(value) for value in timestamps],
+        }
+        for name, fn in cases.items():
+            seconds = best_of(fn, repeat)
+            results.append({
+                "name": name,
+                "snippets": size,
+                "seconds": round(seconds, 4),
+                "snippets_per_sec": round(size / seconds) if seconds else 0,
+            })
+    return results
+
+
+# ---------------------------------------------------------------------------
+# endpoint throughput
+# ---------------------------------------------------------------------------
+
+def endpoint_cases(snippets: int, batch_size: int) -> list:
+    """
+    รายการ endpoint ที่วัด: (ชื่อ, method, path, payload factory, วัดแบบ cold ด้วยหรือไม่)
+    payload factory รับ video id แล้วคืน (json body, query params)
+    """
+    def transcript(**extra):
+        return lambda video_id: ({"url": video_id, **extra}, None)
+
+    def batch(video_id):
+        return {"urls": [f"{video_id}x{i}-{snippets}" for i in range(batch_size)]}, None
+
+    return [
+        ("list", "POST", "/api/transcripts/list", transcript(), True),
+        ("preview", "POST", "/api/transcripts/preview", transcript(limit=50), True),
+        ("overview", "POST", "/api/transcripts/overview", transcript(limit=50), True),
+        ("download_txt", "POST", "/api/transcripts/download", transcript(file_format="txt"), True),
+        ("download_json", "POST", "/api/transcripts/download", transcript(file_format="json"), True),
+        ("download_pdf", "POST", "/api/transcripts/download", transcript(file_format="pdf"), True),
+        ("download_docx", "POST", "/api/transcripts/download", transcript(file_format="docx"), True),
+        ("batch_ndjson", "POST", "/api/transcripts/batch", batch, True),
+        ("search", "GET", "/api/search", lambda video_id: (None, {"q": "word5 word6"}), False),
+        ("health", "GET", "/api/health", lambda video_id: (None, None), False),
+        ("metrics", "GET", "/metrics", lambda video_id: (None, None), False),
+    ]
+
+
+def run_endpoint(base_url: str, method: str, path: str, payload, video_ids, concurrency: int) -> dict:
+    """ยิง request หนึ่งครั้งต่อ video id พร้อมกันไม่เกิน concurrency แล้ววัด latency / throughput"""
+    latencies = []
+    sizes = []
+    errors = []
+    lock = threading.Lock()
+    local = threading.local()
+
+    def call(video_id):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        body, params = payload(video_id)
+        started = time.perf_counter()
+        response = session.request(method, base_url + path, json=body, params=params)
+        content = response.content
+        elapsed = time.perf_counter() - started
+        with lock:
+            if response.status_code < 400:
+                latencies.append(elapsed)
+                sizes.append(len(content))
+            else:
+                errors.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(call, video_ids))
+    wall = time.perf_counter() - started
+
+    return {
+        "requests": len(video_ids),
+        "errors": len(errors),
+        # เช่น 429 = render pool ปฏิเสธงานเพราะคิวเต็ม (backpressure ไม่ใช่ bug)
+        "error_statuses": {str(status): errors.count(status) for status in sorted(set(errors))},
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1) if latencies else 0.0,
+        "avg_response_bytes": round(statistics.mean(sizes)) if sizes else 0,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_endpoints(args) -> list:
+    """รัน app + stub แล้ววัดทุก endpoint"""
+    stub = YouTubeStubServer(latency=args.latency, snippet_count=args.snippets).start().install()
+    server, thread = start_app(free_port())
+    base_url = f"http://127.0.0.1:{server.config.port}"
+    run_id = uuid.uuid4().hex[:8]
+
+    results = []
+    try:
+        for name, method, path, payload, measure_cold in endpoint_cases(args.snippets, args.batch_size):
+            # warm: video เดียวกันทุก request (ดึงไว้ใน cache ก่อน)
+            warm_id = f"warm{run_id}{name}-{args.snippets}"
+            run_endpoint(base_url, method, path, payload, [warm_id], 1)
+            modes = [("warm", [warm_id] * args.requests)]
+            if measure_cold:
+                # cold: video ใหม่ทุก request (ต้องดึงจาก stub)
+                modes.insert(0, ("cold", [f"cold{run_id}{name}{i}-{args.snippets}" for i in range(args.requests)]))
+            for mode, video_ids in modes:
+                row = {"name": name, "mode": mode}
+                row.update(run_endpoint(base_url, method, path, payload, video_ids, args.concurrency))
+                results.append(row)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        stub.stop()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# เปรียบเทียบกับผลครั้งก่อน
+# ---------------------------------------------------------------------------
+
+def result_metrics(results: dict) -> dict:
+    """แปลงผลเป็น {key: (ค่า, สูงดีกว่าหรือไม่)} สำหรับเปรียบเทียบ"""
+    metrics = {}
+    for row in results.get("endpoints", []):
+        metrics[f"endpoint:{row['name']}:{row['mode']}:rps"] = (row["throughput_rps"], True)
+        metrics[f"endpoint:{row['name']}:{row['mode']}:p99_ms"] = (row["p99_ms"], False)
+    for row in results.get("micro", []):
+        metrics[f"micro:{row['name']}:{row['snippets']}:seconds"] = (row["seconds"], False)
+    return metrics
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """
+    เทียบผลปัจจุบันกับ baseline
+
+    Returns:
+        list ของ (key, ค่าเดิม, ค่าใหม่, การเปลี่ยนแปลง (+ = ดีขึ้น), ช้าลงเกิน threshold หรือไม่)
+    """
+    before = result_metrics(baseline)
+    rows = []
+    for key, (value, higher_is_better) in result_metrics(current).items():
+        if key not in before or not before[key][0]:
+            continue
+        old = before[key][0]
+        change = (value - old) / old if higher_is_better else (old - value) / old
+        # เวลาที่สั้นมากแกว่งตาม noise ของเครื่อง ไม่นับเป็น regression ถ้าต่างกันไม่ถึง 2 ms
+        noise = abs(value - old) < (0.002 if key.endswith(":seconds") else 2 if key.endswith("_ms") else 0)
+        rows.append((key, old, value, change, change < -threshold and not noise))
+    return rows
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite ของ pipeline fetch → convert")
+    parser.add_argument("--suites", default="endpoints,micro", help="endpoints, micro (คั่นด้วย ,)")
+    parser.add_argument("--sizes", default="1000,10000,50000", help="จำนวน snippet สำหรับ micro-benchmarks")
+    parser.add_argument("--repeat", type=int, default=3, help="รัน micro-benchmark ซ้ำแล้วใช้เวลาที่ดีที่สุด")
+    parser.add_argument("--pdf-layout", default="flow", help="PDF layout ที่ใช้ใน micro-benchmark (flow, fast)")
+    parser.add_argument("--snippets", type=int, default=2000, help="จำนวน snippet ต่อ video ของ stub")
+    parser.add_argument("--requests", type=int, default=40, help="จำนวน request ต่อ endpoint ต่อ mode")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=10, help="จำนวน video ต่อ batch request")
+    parser.add_argument("--latency", type=float, default=0.02, help="latency ของ stub ต่อ request (วินาที)")
+    parser.add_argument(
+        "--egress-rate", type=float, default=10000,
+        help="EGRESS_RATE ระหว่าง benchmark (ค่าจริงจำกัดไว้ต่ำเพื่อไม่ให้ YouTube บล็อก ซึ่งไม่เกี่ยวกับ stub)"
+    )
+    parser.add_argument("--output", help="บันทึกผลเป็นไฟล์ JSON")
+    parser.add_argument("--compare", help="ไฟล์ JSON ของผลครั้งก่อนที่ใช้เทียบ")
+    parser.add_argument("--threshold", type=float, default=0.15, help="สัดส่วนที่ช้าลงได้ก่อนถือว่า regression")
+    parser.add_argument("--json", action="store_true", help="แสดงผลเป็น JSON")
+    args = parser.parse_args()
+
+    # แยก cache / index / job store ของ benchmark ออกจากของ server จริง
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    os.environ["TRANSCRIPT_CACHE_DISK_PATH"] = os.path.join(workdir, "cache.sqlite3")
+    os.environ["SEARCH_INDEX_PATH"] = os.path.join(workdir, "search.sqlite3")
+    os.environ["JOB_STORE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    os.environ["JOB_RESULT_DIR"] = os.path.join(workdir, "jobs")
+    os.environ["ARTIFACT_DIR"] = os.path.join(workdir, "artifacts")
+    os.environ["EGRESS_RATE"] = str(args.egress_rate)
+    os.environ["EGRESS_BURST"] = str(max(1, int(args.egress_rate)))
+
+    suites = set(args.suites.split(","))
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": vars(args),
+        }
+    }
+    if "endpoints" in suites:
+        results["endpoints"] = run_endpoints(args)
+    if "micro" in suites:
+        results["micro"] = run_micro([int(s) for s in args.sizes.split(",")], args.repeat, args.pdf_layout)
+
+    comparison = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            comparison = compare(results, json.load(f), args.threshold)
+        results["regressions"] = [key for key, _, _, _, regressed in comparison if regressed]
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        if "endpoints" in results:
+            print(f"{'endpoint':<15} {'mode':<5} {'rps':>8} {'p50 ms':>8} {'p99 ms':>8} {'avg KB':>8} {'errors':>7}")
+            for r in results["endpoints"]:
+                print(
+                    f"{r['name']:<15} {r['mode']:<5} {r['throughput_rps']:>8} {r['p50_ms']:>8} "
+                    f"{r['p99_ms']:>8} {round(r['avg_response_bytes'] / 1024, 1):>8} {r['errors']:>7}"
+                )
+        if "micro" in results:
+            print(f"\n{'function':<18} {'snippets':>9} {'seconds':>9} {'snippets/s':>11}")
+            for r in results["micro"]:
+                print(f"{r['name']:<18} {r['snippets']:>9} {r['seconds']:>9} {r['snippets_per_sec']:>11}")
+        if comparison is not None:
+            print(f"\n{'metric':<45} {'before':>10} {'after':>10} {'change':>8}")
+            for key, old, new, change, regressed in comparison:
+                flag = "  REGRESSION" if regressed else ""
+                print(f"{key:<45} {old:>10} {new:>10} {change * 100:>+7.1f}%{flag}")
+
+    if comparison is not None and results["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Synthetic transcripts สำหรับ benchmark (ไม่ต้องเรียก YouTube)
+"""
+
+from youtube_transcript_api import FetchedTranscript, FetchedTranscriptSnippet
+
+
+def make_transcript(snippet_count: int, words_per_snippet: int = 12, video_id: str = "benchmark") -> FetchedTranscript:
+    """
+    สร้าง FetchedTranscript แบบ synthetic
+
+    Args:
+        snippet_count: จำนวน snippets
+        words_per_snippet: จำนวนคำต่อ snippet
+        video_id: video ID ที่ใส่ใน metadata
+
+    Returns:
+        FetchedTranscript object
+    """
+    snippets = [
+        FetchedTranscriptSnippet(
+            text=" ".join(f"word{(i * 7 + j) % 113}" for j in range(words_per_snippet)),
+            start=i * 2.5,
+            duration=2.4,
+        )
+        for i in range(snippet_count)
+    ]
+    return FetchedTranscript(
+        snippets=snippets,
+        video_id=video_id,
+        language="English",
+        language_code="en",
+        is_generated=True,
+    )
@@ -0,0 +1,188 @@
+"""
+YouTube Stub Server - จำลอง endpoints ของ YouTube สำหรับ benchmark และ load test
+ตอบ watch page, innertube player API และ timedtext XML แบบ synthetic
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from xml.sax.saxutils import escape
+import json
+import threading
+import time
+
+import youtube_transcript_api._transcripts as yt_transcripts
+
+
+STUB_API_KEY = "stub-innertube-key"
+
+
+def build_timedtext_xml(snippet_count: int, words_per_snippet: int = 8) -> str:
+    """
+    สร้าง timedtext XML แบบ synthetic
+
+    Args:
+        snippet_count: จำนวน snippets
+        words_per_snippet: จำนวนคำต่อ snippet
+
+    Returns:
+        XML string ในรูปแบบเดียวกับที่ YouTube ส่งกลับมา
+    """
+    parts = ['<?xml version="1.0" encoding="utf-8" ?><transcript>']
+    for i in range(snippet_count):
+        words = " ".join(f"word{(i + j) % 97}" for j in range(words_per_snippet))
+        parts.append(
+            f'<text start="{i * 2.5:.2f}" dur="2.40">{escape(f"line {i} {words}")}</text>'
+        )
+    parts.append("</transcript>")
+    return "".join(parts)
+
+
+class YouTubeStubServer:
+    """HTTP server ที่จำลอง YouTube (รันใน background thread)"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.05,
+        snippet_count: int = 500
+    ):
+        """
+        Args:
+            host: host ที่ bind
+            port: port ที่ bind (0 = สุ่ม port ว่าง)
+            latency: เวลาหน่วงต่อ request (วินาที) เพื่อจำลอง round-trip ไป YouTube
+            snippet_count: จำนวน snippets ต่อ transcript (override ได้ด้วย query ?snippets=)
+        """
+        self.latency = latency
+        self.snippet_count = snippet_count
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._xml_cache = {}
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _timedtext(self, snippet_count: int) -> bytes:
+        with self._lock:
+            body = self._xml_cache.get(snippet_count)
+            if body is None:
+                body = build_timedtext_xml(snippet_count).encode("utf-8")
+                self._xml_cache[snippet_count] = body
+            return body
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # header กับ body ถูกเขียนแยกกัน ถ้าไม่ปิด Nagle จะเกิด delayed-ACK stall บน keep-alive connection
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _delay(self):
+                with stub._lock:
+                    stub.request_count += 1
+                if stub.latency > 0:
+                    time.sleep(stub.latency)
+
+            def do_GET(self):
+                self._delay()
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                if parsed.path == "/watch":
+                    html = f'<html><script>var cfg = {{"INNERTUBE_API_KEY": "{STUB_API_KEY}"}};</script></html>'
+                    self._send(200, html.encode("utf-8"), "text/html; charset=utf-8")
+                elif parsed.path == "/api/timedtext":
+                    count = int(query.get("snippets", [stub.snippet_count])[0])
+                    self._send(200, stub._timedtext(count), "text/xml; charset=utf-8")
+                else:
+                    self._send(404, b"not found", "text/plain")
+
+            def do_POST(self):
+                self._delay()
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                video_id = payload.get("videoId", "")
+                # ใช้ video ID รูปแบบ "<name>-<snippets>" เพื่อกำหนดขนาด transcript ต่อ video ได้
+                snippets = stub.snippet_count
+                if "-" in video_id and video_id.rsplit("-", 1)[1].isdigit():
+                    snippets = int(video_id.rsplit("-", 1)[1])
+                base_url = f"{stub.base_url}/api/timedtext?v={video_id}&lang=en&snippets={snippets}"
+                body = {
+                    "playabilityStatus": {"status": "OK"},
+                    "captions": {
+                        "playerCaptionsTracklistRenderer": {
+                            "captionTracks": [
+                                {
+                                    "baseUrl": base_url,
+                                    "name": {"runs": [{"text": "English"}]},
+                                    "languageCode": "en",
+                                    "isTranslatable": True,
+                                },
+                                {
+                                    "baseUrl": base_url.replace("lang=en", "lang=th"),
+                                    "name": {"runs": [{"text": "Thai (auto-generated)"}]},
+                                    "languageCode": "th",
+                                    "kind": "asr",
+                                    "isTranslatable": True,
+                                },
+                            ],
+                            "translationLanguages": [
+                                {"languageCode": "ja", "languageName": {"runs": [{"text": "Japanese"}]}},
+                            ],
+                        }
+                    },
+                }
+                self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+
+        return Handler
+
+    def start(self) -> "YouTubeStubServer":
+        """เริ่ม server ใน background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """หยุด server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def install(self):
+        """ชี้ youtube-transcript-api ให้เรียก stub server แทน youtube.com"""
+        yt_transcripts.WATCH_URL = self.base_url + "/watch?v={video_id}"
+        yt_transcripts.INNERTUBE_API_URL = self.base_url + "/youtubei/v1/player?key={api_key}"
+        return self
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="รัน YouTube stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--snippets", type=int, default=500)
+    args = parser.parse_args()
+
+    server = YouTubeStubServer(port=args.port, latency=args.latency, snippet_count=args.snippets).start()
+    print(f"YouTube stub listening on {server.base_url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,49 @@
+"""
+Gunicorn config สำหรับรัน backend หลาย worker process (uvicorn worker)
+
+    gunicorn main:app -c gunicorn.conf.py
+
+- จำนวน worker = WEB_CONCURRENCY (default: 2 แต่ไม่เกินจำนวน CPU ที่ process ใช้ได้)
+  แต่ละ worker มี thread pool, render pool และ cache ใน memory ของตัวเอง
+  จึงไม่ใช้จำนวน CPU ของ host เป็นค่าเริ่มต้น (ใน container os.cpu_count() คือ CPU ของ host ไม่ใช่ limit)
+- เมื่อมีมากกว่า 1 worker จะใช้ SHARED_STATE_BACKEND=sqlite เป็นค่าเริ่มต้น
+  (rate limit ไปยัง YouTube นับรวมทุก worker, disk cache ใช้ไฟล์เดียวกัน)
+  ไฟล์อยู่ใน temp directory ของเครื่อง จึงใช้ร่วมกันได้เฉพาะเครื่อง/container เดียวกัน
+  deploy หลาย instance ต้องตั้ง SHARED_STATE_BACKEND=redis เอง
+- RENDER_WORKERS และ TRANSCRIPT_FETCH_WORKERS ต่อ worker แบ่งจากค่ารวม
+  ไม่ให้ process pool / thread pool ของแต่ละ worker รวมกันเกินที่เครื่องรับได้
+"""
+
+import os
+
+# จำนวน worker เริ่มต้น (instance เล็กของ Render/Docker มี memory ไม่พอสำหรับ worker ต่อ core ของ host)
+DEFAULT_WORKERS = 2
+# จำนวน thread ดึง transcript รวมทุก worker (เท่ากับ DEFAULT_FETCH_WORKERS ของ process เดียว)
+TOTAL_FETCH_WORKERS = 32
+# thread ดึง transcript ขั้นต่ำต่อ worker
+MIN_FETCH_WORKERS = 4
+
+try:
+    # CPU ที่ process นี้ใช้ได้จริง (affinity / cpuset ของ container)
+    cpu_count = len(os.sched_getaffinity(0)) or 1
+except AttributeError:
+    cpu_count = os.cpu_count() or 1
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = max(1, int(os.getenv("WEB_CONCURRENCY", min(DEFAULT_WORKERS, cpu_count))))
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# render PDF ยาวๆ อาจใช้เวลานาน (งานที่นานกว่านี้ควรใช้ /api/jobs)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = 30
+keepalive = 5
+
+# ค่าเหล่านี้ตั้งก่อน fork worker จึงมีผลกับทุก worker (ค่าที่กำหนดเองใน environment มาก่อนเสมอ)
+if workers > 1:
+    os.environ.setdefault("SHARED_STATE_BACKEND", "sqlite")
+os.environ.setdefault("RENDER_WORKERS", str(max(1, cpu_count // workers)))
+os.environ.setdefault("TRANSCRIPT_FETCH_WORKERS", str(max(MIN_FETCH_WORKERS, TOTAL_FETCH_WORKERS // workers)))
+
+accesslog = "-"
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
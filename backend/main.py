@@ -3,24 +3,91 @@ YouTube Transcript API Backend Service
 FastAPI backend สำหรับดึง transcript และแปลงเป็นไฟล์ต่างๆ
 """
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
 from typing import List, Optional
 import os
-import tempfile
+import asyncio
+import json
+import sqlite3
+import zipfile
 from datetime import datetime
 import re
+import secrets
+import threading
+
+from services.transcript_service import DEFAULT_STREAM_BATCH, TranscriptError, TranscriptService
+from services.artifact_store import ArtifactStore
+from services.file_converter import FileConverter, resolve_pdf_layout
+from services.batch_service import BatchService, ZipStreamWriter
+from services.compression import CompressionMiddleware, ResponseCompressor, encoded_etag
+from services.job_queue import JobFailed, JobQueue, JobQueueFull
+from services.metrics import REGISTRY, MetricsMiddleware
+from services.prefetch import (
+    DEFAULT_PREFETCH_MAX_VIDEOS, DEFAULT_PREFETCH_RESULT_DIR, DEFAULT_PREFETCH_STORE_PATH, Prefetcher
+)
+from services.render_pool import RenderPool, RenderPoolSaturated
+from services.render_cache import RenderCache, etag_matches, render_key, transcript_fingerprint
+from services.search_index import SearchIndex
+from services.snippet_index import SnippetIndexCache
+from services.transcript_cache import make_cache_key
+
+# Initialize services
+transcript_service = TranscriptService()
+artifact_store = ArtifactStore()
+file_converter = FileConverter(artifact_store)
+render_cache = RenderCache()
+response_compressor = ResponseCompressor()
+render_pool = RenderPool(file_converter)
+batch_service = BatchService(transcript_service)
+snippet_index_cache = SnippetIndexCache()
+
+# Full-text search ของ transcript ที่เคยดึงมา (ตั้ง SEARCH_INDEX_PATH เป็นค่าว่างเพื่อปิด)
+search_index = SearchIndex() if os.getenv("SEARCH_INDEX_PATH") != "" else None
+if search_index is not None:
+    transcript_service.add_fetch_listener(search_index.enqueue)
+
+# จำนวนผลลัพธ์ค้นหาต่อหน้า (ค่าเริ่มต้น / สูงสุด)
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# จำนวน snippet ต่อหน้าของ preview (ค่าเริ่มต้น / สูงสุด)
+PREVIEW_DEFAULT_LIMIT = 50
+PREVIEW_MAX_LIMIT = int(os.getenv("PREVIEW_MAX_LIMIT", 1000))
+
+# จำนวน snippet ต่อ event ของ /api/transcripts/stream (ค่าเริ่มต้น, สูงสุดคือ PREVIEW_MAX_LIMIT)
+STREAM_BATCH_SIZE = int(os.getenv("TRANSCRIPT_STREAM_BATCH", DEFAULT_STREAM_BATCH))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """จัดการ resources ของ services ตอน startup/shutdown"""
+    # ลบไฟล์ค้างจาก process ก่อนหน้า แล้วเริ่ม sweeper เป็นระยะ
+    sweeper = asyncio.create_task(artifact_store.run_sweeper())
+    job_queue.start()
+    prefetch_queue.start()
+    yield
+    sweeper.cancel()
+    await job_queue.stop()
+    await prefetch_queue.stop()
+    render_pool.shutdown()
+    transcript_service.shutdown()
+    render_cache.close()
+    if search_index is not None:
+        search_index.close()
 
-from services.transcript_service import TranscriptService
-from services.file_converter import FileConverter
 
 app = FastAPI(
     title="YouTube Transcript API",
     description="API สำหรับดึง transcript จาก YouTube และแปลงเป็นไฟล์ต่างๆ",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware เพื่อให้ frontend เรียกใช้ได้
@@ -59,9 +126,11 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
-# Initialize services
-transcript_service = TranscriptService()
-file_converter = FileConverter()
+# บีบอัด response ที่เป็น text ตาม Accept-Encoding (อยู่ใน MetricsMiddleware จึงวัดขนาดหลังบีบอัด)
+app.add_middleware(CompressionMiddleware, compressor=response_compressor)
+
+# วัด request ทุกตัว (เพิ่มหลังสุดจึงเป็น middleware ชั้นนอกสุด)
+app.add_middleware(MetricsMiddleware)
 
 
 class TranscriptRequest(BaseModel):
@@ -69,8 +138,18 @@ class TranscriptRequest(BaseModel):
     url: str = Field(..., description="YouTube URL หรือ Video ID")
     languages: Optional[List[str]] = Field(default=["en"], description="รายการภาษา (เช่น ['th', 'en'])")
     preserve_formatting: bool = Field(default=False, description="เก็บ HTML formatting หรือไม่")
-    file_format: str = Field(default="txt", description="รูปแบบไฟล์ (txt, pdf, doc)")
+    file_format: str = Field(default="txt", description="รูปแบบไฟล์ (txt, pdf, doc, json, ndjson, srt, vtt)")
     include_timestamps: bool = Field(default=True, description="รวม timestamps หรือไม่")
+    pdf_layout: Optional[str] = Field(default=None, description="PDF layout (flow, fast) ค่าเริ่มต้นจาก PDF_LAYOUT")
+    translate_to: Optional[str] = Field(default=None, description="แปล transcript เป็นภาษานี้ (เช่น 'th')")
+
+
+class PreviewRequest(TranscriptRequest):
+    """Request model สำหรับ preview แบบแบ่งหน้า / เลือกช่วงเวลา"""
+    offset: int = Field(default=0, ge=0, description="ตำแหน่งเริ่มภายในช่วงที่เลือก (ใช้ next_offset จากหน้าก่อน)")
+    limit: int = Field(default=PREVIEW_DEFAULT_LIMIT, ge=1, le=PREVIEW_MAX_LIMIT, description="จำนวน snippet ต่อหน้า")
+    start_sec: Optional[float] = Field(default=None, ge=0, description="เวลาเริ่มของช่วง (วินาที)")
+    end_sec: Optional[float] = Field(default=None, ge=0, description="เวลาสิ้นสุดของช่วง (วินาที)")
 
 
 class ListTranscriptsRequest(BaseModel):
@@ -78,6 +157,232 @@ class ListTranscriptsRequest(BaseModel):
     url: str = Field(..., description="YouTube URL หรือ Video ID")
 
 
+class PrefetchRequest(BaseModel):
+    """Request model สำหรับเติม cache ล่วงหน้า (admin)"""
+    video_ids: List[str] = Field(..., description="รายการ YouTube URL หรือ Video ID")
+    languages: Optional[List[str]] = Field(default=["en"], description="รายการภาษา (ต้องตรงกับที่ผู้ใช้ขอจึงจะ hit cache)")
+    formats: List[str] = Field(default=[], description="รูปแบบไฟล์ที่ render เข้า cache ด้วย (เช่น ['pdf', 'txt'])")
+
+
+class BatchTranscriptRequest(BaseModel):
+    """Request model สำหรับดึง transcript หลาย video"""
+    urls: List[str] = Field(..., description="รายการ YouTube URL หรือ Video ID")
+    languages: Optional[List[str]] = Field(default=["en"], description="รายการภาษา (เช่น ['th', 'en'])")
+    preserve_formatting: bool = Field(default=False, description="เก็บ HTML formatting หรือไม่")
+    output: str = Field(default="ndjson", description="รูปแบบผลลัพธ์ (ndjson, zip)")
+    file_format: str = Field(default="txt", description="รูปแบบไฟล์ใน ZIP (txt, pdf, doc, json, ndjson, srt, vtt)")
+    include_timestamps: bool = Field(default=True, description="รวม timestamps หรือไม่")
+
+
+# รูปแบบไฟล์ที่รองรับ → (นามสกุลไฟล์ปกติ, media type)
+FILE_FORMATS = {
+    "txt": ("txt", "text/plain"),
+    "pdf": ("pdf", "application/pdf"),
+    "doc": ("doc", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "docx": ("docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+    "json": ("json", "application/json"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "srt": ("srt", "application/x-subrip"),
+    "vtt": ("vtt", "text/vtt"),
+}
+
+# รูปแบบที่ stream ออกไปตรงๆ โดยไม่ต้องสร้างไฟล์ชั่วคราว
+STREAMING_FORMATS = {"txt", "json", "ndjson", "srt", "vtt"}
+
+
+def stream_transcript(transcript, file_format: str, include_timestamps: bool):
+    """
+    แปลง transcript เป็น text แบบ stream (ไม่ใช้ filesystem)
+
+    Args:
+        transcript: FetchedTranscript object
+        file_format: รูปแบบ (txt, json, ndjson, srt, vtt)
+        include_timestamps: รวม timestamps หรือไม่ (ใช้กับ txt)
+
+    Returns:
+        Iterator ของ string chunks
+    """
+    if file_format == "txt":
+        return file_converter.iter_txt(transcript, include_timestamps=include_timestamps)
+    elif file_format == "json":
+        return file_converter.iter_json(transcript)
+    elif file_format == "ndjson":
+        return file_converter.iter_ndjson(transcript)
+    elif file_format == "srt":
+        return file_converter.iter_srt(transcript)
+    elif file_format == "vtt":
+        return file_converter.iter_vtt(transcript)
+    raise ValueError(f"รูปแบบไฟล์ไม่รองรับการ stream: {file_format}")
+
+
+def cache_compressed(key: str, chunks):
+    """
+    ส่งต่อ chunk ที่บีบอัดแล้ว และเก็บทั้งก้อนลง render cache เมื่อส่งครบ
+    (ไม่เก็บถ้าใหญ่เกิน cache หรือ client ตัดการเชื่อมต่อกลางทาง)
+
+    Args:
+        key: key ใน render cache
+        chunks: iterator ของข้อมูลที่บีบอัดแล้ว
+
+    Yields:
+        chunk เดิมตามลำดับ
+    """
+    parts = []
+    size = 0
+    for chunk in chunks:
+        yield chunk
+        if parts is not None:
+            parts.append(chunk)
+            size += len(chunk)
+            if not render_cache.fits(size):
+                parts = None
+    if parts is not None and size:
+        render_cache.set(key, b"".join(parts))
+
+
+async def run_conversion_job(params: dict, report) -> tuple:
+    """
+    งาน background ของ /api/jobs: ดึง transcript แล้วแปลงเป็นไฟล์ใน artifact store
+
+    Args:
+        params: พารามิเตอร์ของงานจาก POST /api/jobs
+        report: coroutine รายงานความคืบหน้า report(stage, progress)
+
+    Returns:
+        tuple (path ของไฟล์, filename, media type)
+    """
+    await report("fetching", 0.1)
+    transcript = await transcript_service.fetch_transcript_async(
+        video_id=params["video_id"],
+        languages=params["languages"],
+        preserve_formatting=params["preserve_formatting"],
+        translate_to=params["translate_to"]
+    )
+    if not transcript:
+        raise JobFailed("ไม่พบ transcript สำหรับ video นี้", status_code=404)
+    
+    file_format = params["file_format"]
+    extension, media_type = FILE_FORMATS[file_format]
+    filename = f"transcript_{params['video_id']}_{transcript.language_code}.{extension}"
+    await report("rendering", 0.3)
+    if file_format in STREAMING_FORMATS:
+        def write_file() -> str:
+            path = artifact_store.create(f".{extension}")
+            with open(path, "w", encoding="utf-8") as f:
+                f.writelines(stream_transcript(transcript, file_format, params["include_timestamps"]))
+            return path
+        path = await run_in_threadpool(write_file)
+    else:
+        path = await render_pool.render(
+            transcript, file_format, params["include_timestamps"],
+            pdf_layout=params["pdf_layout"], block=True
+        )
+    await report("saving", 0.95)
+    return path, filename, media_type
+
+
+# คิวงานแปลงไฟล์แบบ background (POST /api/jobs)
+job_queue = JobQueue(run_conversion_job)
+
+
+async def warm_render_cache(transcript, formats: List[str]):
+    """
+    render ไฟล์ของ transcript เข้า render cache ด้วย key เดียวกับ /api/transcripts/download
+    (ตัวเลือกเริ่มต้น: include_timestamps=True, PDF_LAYOUT) รูปแบบที่ stream เก็บเป็นแบบบีบอัดแล้ว
+
+    Args:
+        transcript: CompactTranscript
+        formats: รูปแบบไฟล์ (ต้องอยู่ใน FILE_FORMATS)
+    """
+    fingerprint = await run_in_threadpool(transcript_fingerprint, transcript)
+    for file_format in formats:
+        pdf_layout = resolve_pdf_layout(None) if file_format == "pdf" else None
+        cache_key = render_key(fingerprint, file_format, include_timestamps=True, pdf_layout=pdf_layout)
+        if file_format in STREAMING_FORMATS:
+            for encoding in response_compressor.encodings:
+                key = f"{cache_key}.{encoding}"
+                if await run_in_threadpool(render_cache.contains, key):
+                    continue
+                content = await run_in_threadpool(
+                    lambda: b"".join(response_compressor.compress_stream(
+                        (chunk.encode("utf-8") for chunk in stream_transcript(transcript, file_format, True)),
+                        encoding
+                    ))
+                )
+                if render_cache.fits(len(content)):
+                    await run_in_threadpool(render_cache.set, key, content)
+            continue
+        if await run_in_threadpool(render_cache.contains, cache_key):
+            continue
+        path = await render_pool.render(transcript, file_format, True, pdf_layout=pdf_layout, block=True)
+        try:
+            if render_cache.fits(os.path.getsize(path)):
+                def store():
+                    with open(path, "rb") as f:
+                        render_cache.set(cache_key, f.read())
+                await run_in_threadpool(store)
+        finally:
+            artifact_store.release(path)
+
+
+prefetcher = Prefetcher(transcript_service, warm_render_cache)
+
+
+async def run_prefetch_job(params: dict, report) -> tuple:
+    """
+    งาน background ของ /api/admin/prefetch: เติม cache ของทุก video แล้วเขียนรายงานเป็น NDJSON
+
+    Args:
+        params: พารามิเตอร์ของงานจาก POST /api/admin/prefetch
+        report: coroutine รายงานความคืบหน้า report(stage, progress)
+
+    Returns:
+        tuple (path ของรายงาน, filename, media type)
+    """
+    results = await prefetcher.run(params["video_ids"], params["languages"], params["formats"], report)
+    
+    def write_report() -> str:
+        path = artifact_store.create(".ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+        return path
+    
+    path = await run_in_threadpool(write_report)
+    return path, "prefetch_report.ndjson", "application/x-ndjson"
+
+
+# คิวงาน prefetch (แยกจากคิวของผู้ใช้ ทำทีละงาน อัตราการดึงควบคุมด้วย PREFETCH_RATE)
+prefetch_queue = JobQueue(
+    run_prefetch_job,
+    store_path=os.getenv("PREFETCH_STORE_PATH", DEFAULT_PREFETCH_STORE_PATH),
+    result_dir=os.getenv("PREFETCH_RESULT_DIR", DEFAULT_PREFETCH_RESULT_DIR),
+    concurrency=1,
+    max_queued=100
+)
+PREFETCH_MAX_VIDEOS = int(os.getenv("PREFETCH_MAX_VIDEOS", DEFAULT_PREFETCH_MAX_VIDEOS))
+
+# token สำหรับ admin endpoints (/api/admin/*) ไม่ตั้ง = ปิด admin endpoints
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(http_request: Request):
+    """
+    ตรวจ admin token จาก header Authorization: Bearer <token> หรือ X-Admin-Token
+
+    Raises:
+        HTTPException: 503 ถ้าไม่ได้ตั้ง ADMIN_TOKEN, 401 ถ้า token ไม่ถูกต้อง
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=503, detail="admin endpoints ถูกปิดอยู่ (ADMIN_TOKEN)")
+    token = http_request.headers.get("x-admin-token", "")
+    authorization = http_request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[7:].strip()
+    if not secrets.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(status_code=401, detail="admin token ไม่ถูกต้อง", headers={"WWW-Authenticate": "Bearer"})
+
+
 @app.get("/")
 @app.head("/")
 async def root():
@@ -89,17 +394,157 @@ async def root():
             "GET /": "API information",
             "POST /api/transcripts/list": "List available transcripts",
             "POST /api/transcripts/preview": "Preview transcript",
+            "POST /api/transcripts/overview": "List available transcripts and preview the preferred one",
+            "GET /api/transcripts/stream?url=": "Stream transcript snippets as server-sent events (metadata first)",
             "POST /api/transcripts/download": "Download transcript as file",
+            "POST /api/transcripts/batch": "Fetch transcripts for many videos (NDJSON or ZIP)",
+            "POST /api/jobs": "Queue a background conversion (for long transcripts)",
+            "GET /api/jobs/{job_id}": "Job status and progress",
+            "GET /api/jobs/{job_id}/result": "Download the result of a finished job",
+            "GET /api/search?q=": "Full-text search across fetched transcripts",
+            "POST /api/admin/prefetch": "Warm the caches for a list of videos (requires ADMIN_TOKEN)",
+            "GET /api/admin/prefetch/{job_id}": "Prefetch progress",
+            "GET /api/admin/prefetch/{job_id}/result": "Per-video prefetch report (NDJSON)",
+            "GET /metrics": "Prometheus metrics",
             "GET /docs": "Swagger UI documentation",
             "GET /redoc": "ReDoc documentation"
         }
     }
 
 
+def transcript_http_error(error: TranscriptError) -> HTTPException:
+    """แปลง TranscriptError เป็น HTTPException (ใส่ Retry-After เมื่อควรลองใหม่ภายหลัง)"""
+    headers = None
+    if error.status_code == 503:
+        headers = {"Retry-After": str(max(1, int(error.retry_after or 30)))}
+    return HTTPException(status_code=error.status_code, detail=str(error), headers=headers)
+
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.now().isoformat()}
+    circuit = transcript_service.circuit_breaker.stats()
+    return {
+        # degraded = circuit breaker ไม่ได้ปิดอยู่ (กำลังหยุดเรียก YouTube ชั่วคราว)
+        "status": "healthy" if circuit["state"] == "closed" else "degraded",
+        "timestamp": datetime.now().isoformat(),
+        # worker ที่ตอบ (โหมด multi-worker แต่ละ process มี cache ใน memory และสถิติของตัวเอง)
+        "worker": {
+            "pid": os.getpid(),
+            "shared_state": (
+                transcript_service.shared_state.describe()
+                if transcript_service.shared_state is not None else {"backend": "memory"}
+            )
+        },
+        "cache": await run_in_threadpool(transcript_service.cache.stats),
+        "transcript_lists": {
+            "entries": len(transcript_service.list_cache),
+            "ttl": transcript_service.list_cache.ttl,
+            "expirations": transcript_service.list_cache.expirations
+        },
+        "single_flight": transcript_service.single_flight_stats(),
+        "egress": transcript_service.egress_pool.stats(),
+        "circuit_breaker": circuit,
+        "retry": transcript_service.retry_policy.stats(),
+        "artifacts": await run_in_threadpool(artifact_store.stats),
+        "render_cache": await run_in_threadpool(render_cache.stats),
+        "compression": response_compressor.stats(),
+        "render_pool": render_pool.stats(),
+        "snippet_index": snippet_index_cache.stats(),
+        "search_index": await run_in_threadpool(search_index.stats) if search_index is not None else None,
+        "jobs": await run_in_threadpool(job_queue.stats),
+        "prefetch": await run_in_threadpool(prefetch_queue.stats)
+    }
+
+
+def collect_service_metrics():
+    """แปลงสถิติที่ service เก็บอยู่แล้วเป็น metrics ตอน scrape (ใช้กับ REGISTRY.add_collector)"""
+    cache = transcript_service.cache.stats()
+    yield "transcript_cache_hits_total", "counter", "จำนวน cache hit ของ transcript แยกตามชั้น", [
+        ({"tier": "memory"}, cache["memory_hits"]),
+        ({"tier": "disk"}, cache["disk_hits"]),
+    ]
+    yield "transcript_cache_misses_total", "counter", "จำนวน cache miss ของ transcript", [({}, cache["misses"])]
+    tiers = [({"tier": "memory"}, cache["memory"]["bytes"])]
+    if cache["disk"] is not None:
+        tiers.append(({"tier": "disk"}, cache["disk"]["bytes"]))
+    yield "transcript_cache_bytes", "gauge", "ขนาดข้อมูลใน transcript cache", tiers
+    
+    flights = transcript_service.single_flight_stats()
+    yield "single_flight_calls_total", "counter", "จำนวนการเรียกที่ทำจริง / ที่ถูกรวมกับการเรียกอื่น", [
+        ({"result": "executed"}, flights["executions"]),
+        ({"result": "coalesced"}, flights["coalesced"]),
+    ]
+    
+    circuit = transcript_service.circuit_breaker.stats()
+    yield "circuit_breaker_state", "gauge", "สถานะ circuit breaker (1 = สถานะปัจจุบัน)", [
+        ({"state": state}, 1 if circuit["state"] == state else 0)
+        for state in ("closed", "open", "half_open")
+    ]
+    yield "youtube_retries_total", "counter", "จำนวนครั้งที่ลองเรียก YouTube ใหม่", [
+        ({}, transcript_service.retry_policy.stats()["retries"])
+    ]
+    
+    egresses = transcript_service.egress_pool.stats()["egresses"]
+    for field, help_text in (
+        ("successes", "จำนวนการเรียกสำเร็จต่อช่องทาง"),
+        ("failures", "จำนวนการเรียกล้มเหลวต่อช่องทาง"),
+        ("blocks", "จำนวนครั้งที่ถูก YouTube บล็อกต่อช่องทาง"),
+    ):
+        yield f"egress_{field}_total", "counter", help_text, [
+            ({"egress": e["name"]}, e[field]) for e in egresses
+        ]
+    yield "egress_quarantined_seconds", "gauge", "เวลาที่ช่องทางถูกพักเหลืออยู่", [
+        ({"egress": e["name"]}, e["quarantined_for"]) for e in egresses
+    ]
+    yield "egress_new_connections_total", "counter", "จำนวน connection ใหม่ที่เปิดต่อช่องทาง", [
+        ({"egress": e["name"]}, e["connections"]["new_connections"]) for e in egresses
+    ]
+    
+    renders = render_cache.stats()
+    yield "render_cache_lookups_total", "counter", "จำนวนการค้นไฟล์ที่ render แล้วใน cache", [
+        ({"result": "hit"}, renders["hits"]),
+        ({"result": "miss"}, renders["misses"]),
+    ]
+    compression = response_compressor.stats()["totals"]
+    yield "response_compression_bytes_total", "counter", "ขนาดข้อมูลก่อน (in) / หลัง (out) บีบอัด response", [
+        ({"encoding": encoding, "stage": stage}, totals[f"bytes_{stage}"])
+        for encoding, totals in compression.items()
+        for stage in ("in", "out")
+    ]
+    pool = render_pool.stats()
+    yield "render_pool_pending", "gauge", "งาน render ที่ค้างอยู่ (รวมที่กำลังทำ)", [({}, pool["pending"])]
+    yield "render_pool_rejected_total", "counter", "จำนวนงาน render ที่ถูกปฏิเสธเพราะคิวเต็ม", [({}, pool["rejected"])]
+    
+    artifacts = artifact_store.stats()
+    yield "artifact_files", "gauge", "จำนวนไฟล์ชั่วคราวของ converter", [({}, artifacts["files"])]
+    yield "artifact_bytes", "gauge", "ขนาดรวมของไฟล์ชั่วคราวของ converter", [({}, artifacts["bytes_on_disk"])]
+    
+    snippets = snippet_index_cache.stats()
+    yield "snippet_index_lookups_total", "counter", "จำนวนการค้น snippet index ใน cache", [
+        ({"result": "hit"}, snippets["hits"]),
+        ({"result": "miss"}, snippets["misses"]),
+    ]
+    
+    jobs = job_queue.stats()
+    yield "jobs", "gauge", "จำนวนงาน background แยกตามสถานะ", [
+        ({"status": status}, jobs["jobs"].get(status, 0)) for status in ("queued", "running", "done", "failed")
+    ]
+    
+    if search_index is not None:
+        search = search_index.stats()
+        yield "search_index_documents", "gauge", "จำนวน transcript ใน search index", [({}, search["documents"])]
+        yield "search_index_pending", "gauge", "transcript ที่รอ index", [({}, search["pending"])]
+
+
+REGISTRY.add_collector(collect_service_metrics)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Metrics ใน Prometheus text format"""
+    content = await run_in_threadpool(REGISTRY.render)
+    return Response(content=content, media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.options("/api/transcripts/{path:path}")
@@ -108,6 +553,64 @@ async def options_handler(path: str):
     return {"message": "OK"}
 
 
+def transcript_list_items(transcripts) -> List[dict]:
+    """แปลง TranscriptList เป็นรายการภาษาสำหรับตอบ client"""
+    result = []
+    for transcript in transcripts:
+        result.append({
+            "language": transcript.language,
+            "language_code": transcript.language_code,
+            "is_generated": transcript.is_generated,
+            "is_translatable": transcript.is_translatable,
+            "translation_languages": transcript.translation_languages if hasattr(transcript, 'translation_languages') else []
+        })
+    return result
+
+
+async def load_snippet_index(video_id: str, request: TranscriptRequest):
+    """
+    ดึง SnippetIndex ของ transcript (จาก cache ถ้ามี ไม่ต้องดึงและจัดเรียง transcript ใหม่)
+    """
+    languages = request.languages if request.languages else ["en"]
+    cache_key = make_cache_key(video_id, languages, request.preserve_formatting, request.translate_to)
+    index = snippet_index_cache.get(cache_key)
+    if index is not None:
+        return index
+    
+    transcript = await transcript_service.fetch_transcript_async(
+        video_id=video_id,
+        languages=languages,
+        preserve_formatting=request.preserve_formatting,
+        translate_to=request.translate_to
+    )
+    if not transcript:
+        raise HTTPException(status_code=404, detail="ไม่พบ transcript สำหรับ video นี้")
+    return await run_in_threadpool(snippet_index_cache.build, cache_key, transcript)
+
+
+def transcript_preview(index, request: PreviewRequest) -> dict:
+    """สร้างข้อมูล preview ของ transcript (metadata + snippets หนึ่งหน้า)"""
+    if request.start_sec is not None and request.end_sec is not None and request.end_sec < request.start_sec:
+        raise HTTPException(status_code=400, detail="end_sec ต้องไม่น้อยกว่า start_sec")
+    transcript = index.transcript
+    page = index.page(
+        offset=request.offset,
+        limit=request.limit,
+        start_sec=request.start_sec,
+        end_sec=request.end_sec
+    )
+    return {
+        "video_id": transcript.video_id,
+        "language": transcript.language,
+        "language_code": transcript.language_code,
+        "is_generated": transcript.is_generated,
+        "total_snippets": len(index),
+        "offset": request.offset,
+        "limit": request.limit,
+        **page
+    }
+
+
 @app.post("/api/transcripts/list")
 async def list_transcripts(request: ListTranscriptsRequest):
     """
@@ -118,33 +621,26 @@ async def list_transcripts(request: ListTranscriptsRequest):
             raise HTTPException(status_code=400, detail="กรุณากรอก YouTube URL หรือ Video ID")
         
         video_id = transcript_service.extract_video_id(request.url.strip())
-        transcripts = transcript_service.list_transcripts(video_id)
-        
-        result = []
-        for transcript in transcripts:
-            result.append({
-                "language": transcript.language,
-                "language_code": transcript.language_code,
-                "is_generated": transcript.is_generated,
-                "is_translatable": transcript.is_translatable,
-                "translation_languages": transcript.translation_languages if hasattr(transcript, 'translation_languages') else []
-            })
+        transcripts = await transcript_service.list_transcripts_async(video_id)
         
         return {
             "success": True,
             "video_id": video_id,
-            "transcripts": result
+            "transcripts": transcript_list_items(transcripts)
         }
     except HTTPException:
         raise
+    except TranscriptError as e:
+        raise transcript_http_error(e)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"ไม่สามารถดึงรายการ transcript ได้: {str(e)}")
 
 
 @app.post("/api/transcripts/download")
-async def download_transcript(request: TranscriptRequest):
+async def download_transcript(request: TranscriptRequest, http_request: Request):
     """
     ดึง transcript และแปลงเป็นไฟล์ตามรูปแบบที่เลือก
+    รองรับ ETag / If-None-Match (ตอบ 304 โดยไม่ต้อง render ใหม่)
     """
     try:
         if not request.url or not request.url.strip():
@@ -157,10 +653,11 @@ async def download_transcript(request: TranscriptRequest):
         languages = request.languages if request.languages else ["en"]
         
         # Fetch transcript
-        transcript = transcript_service.fetch_transcript(
+        transcript = await transcript_service.fetch_transcript_async(
             video_id=video_id,
             languages=languages,
-            preserve_formatting=request.preserve_formatting
+            preserve_formatting=request.preserve_formatting,
+            translate_to=request.translate_to
         )
         
         if not transcript:
@@ -168,93 +665,522 @@ async def download_transcript(request: TranscriptRequest):
         
         # Convert to file
         file_format = request.file_format.lower() if request.file_format else "txt"
-        
-        if file_format == "txt":
-            file_path = file_converter.to_txt(
-                transcript=transcript,
-                include_timestamps=request.include_timestamps
-            )
-            media_type = "text/plain"
-        elif file_format == "pdf":
-            file_path = file_converter.to_pdf(
-                transcript=transcript,
-                include_timestamps=request.include_timestamps
-            )
-            media_type = "application/pdf"
-        elif file_format == "doc" or file_format == "docx":
-            file_path = file_converter.to_docx(
-                transcript=transcript,
-                include_timestamps=request.include_timestamps
-            )
-            media_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-        else:
+        if file_format not in FILE_FORMATS:
             raise HTTPException(status_code=400, detail=f"รูปแบบไฟล์ไม่รองรับ: {file_format}")
         
+        media_type = FILE_FORMATS[file_format][1]
+        
+        try:
+            pdf_layout = resolve_pdf_layout(request.pdf_layout) if file_format == "pdf" else None
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
         # Generate filename
         filename = f"transcript_{video_id}_{transcript.language_code}.{file_format}"
         
+        # ETag จาก hash ของเนื้อหา transcript + ตัวเลือกการ render
+        fingerprint = await run_in_threadpool(transcript_fingerprint, transcript)
+        cache_key = render_key(
+            fingerprint,
+            file_format,
+            include_timestamps=request.include_timestamps,
+            pdf_layout=pdf_layout
+        )
+        etag = f'"{cache_key}"'
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "ETag": etag
+        }
+        
+        if etag_matches(http_request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        if file_format in STREAMING_FORMATS:
+            chunks = (chunk.encode("utf-8") for chunk in stream_transcript(
+                transcript, file_format, request.include_timestamps
+            ))
+            encoding = response_compressor.negotiate(http_request.headers.get("accept-encoding"))
+            headers["Vary"] = "Accept-Encoding"
+            if encoding is None:
+                return StreamingResponse(chunks, media_type=f"{media_type}; charset=utf-8", headers=headers)
+            
+            # เก็บผลที่บีบอัดแล้วไว้ใน render cache ครั้งถัดไปส่งได้ทันทีโดยไม่ต้องแปลง/บีบอัดใหม่
+            headers["ETag"] = encoded_etag(etag, encoding)
+            headers["Content-Encoding"] = encoding
+            compressed_key = f"{cache_key}.{encoding}"
+            content = await run_in_threadpool(render_cache.get, compressed_key)
+            if content is not None:
+                return Response(content=content, media_type=f"{media_type}; charset=utf-8", headers=headers)
+            return StreamingResponse(
+                cache_compressed(compressed_key, response_compressor.compress_stream(chunks, encoding)),
+                media_type=f"{media_type}; charset=utf-8",
+                headers=headers
+            )
+        
+        content = await run_in_threadpool(render_cache.get, cache_key)
+        if content is not None:
+            return Response(content=content, media_type=media_type, headers=headers)
+        
+        try:
+            file_path = await render_pool.render(
+                transcript, file_format, request.include_timestamps, pdf_layout=pdf_layout
+            )
+        except RenderPoolSaturated as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+        
+        size = os.path.getsize(file_path)
+        if render_cache.fits(size):
+            try:
+                with open(file_path, "rb") as f:
+                    content = f.read()
+            finally:
+                artifact_store.release(file_path)
+            await run_in_threadpool(render_cache.set, cache_key, content)
+            return Response(content=content, media_type=media_type, headers=headers)
+        
         return FileResponse(
             path=file_path,
             filename=filename,
             media_type=media_type,
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
+            headers=headers,
+            # ลบไฟล์หลังส่ง response เสร็จ
+            background=BackgroundTask(artifact_store.release, file_path)
         )
     
     except HTTPException:
         raise
+    except TranscriptError as e:
+        raise transcript_http_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"เกิดข้อผิดพลาด: {str(e)}")
 
 
 @app.post("/api/transcripts/preview")
-async def preview_transcript(request: TranscriptRequest):
+async def preview_transcript(request: PreviewRequest):
     """
     ดึง transcript และส่งกลับเป็น JSON (สำหรับ preview)
+    แบ่งหน้าด้วย offset/limit (ใช้ next_offset อ่านหน้าถัดไป) และเลือกช่วงเวลาด้วย start_sec/end_sec
     """
     try:
         if not request.url or not request.url.strip():
             raise HTTPException(status_code=400, detail="กรุณากรอก YouTube URL หรือ Video ID")
         
         video_id = transcript_service.extract_video_id(request.url.strip())
+        index = await load_snippet_index(video_id, request)
         
-        # ตรวจสอบ languages
-        languages = request.languages if request.languages else ["en"]
-        
-        transcript = transcript_service.fetch_transcript(
-            video_id=video_id,
-            languages=languages,
-            preserve_formatting=request.preserve_formatting
-        )
-        
-        if not transcript:
-            raise HTTPException(status_code=404, detail="ไม่พบ transcript สำหรับ video นี้")
-        
-        snippets = []
-        for snippet in transcript:
-            snippets.append({
-                "text": snippet.text,
-                "start": snippet.start,
-                "duration": snippet.duration
+        return {"success": True, **transcript_preview(index, request)}
+    
+    except HTTPException:
+        raise
+    except TranscriptError as e:
+        raise transcript_http_error(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"เกิดข้อผิดพลาด: {str(e)}")
+
+
+def sse_event(event: str, data: dict) -> str:
+    """จัดรูปแบบ server-sent event หนึ่งรายการ (data เป็น JSON บรรทัดเดียว)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def transcript_events(http_request: Request, batches, metadata: dict, cancelled: threading.Event):
+    """
+    แปลง batch จาก TranscriptService.stream_transcript เป็น server-sent events
+    อ่าน batch ถัดไปใน thread pool ทีละ batch และหยุดทันทีเมื่อ client ตัดการเชื่อมต่อ
+    
+    Yields:
+        event metadata → snippets (หลายครั้ง) → done หรือ error
+    """
+    total = 0
+    try:
+        yield sse_event("metadata", metadata)
+        while True:
+            if await http_request.is_disconnected():
+                return
+            item = await transcript_service.run_in_executor(next, batches, None)
+            if item is None:
+                break
+            _, rows = item
+            yield sse_event("snippets", {
+                "offset": total,
+                "snippets": [
+                    {"text": text, "start": start, "duration": duration}
+                    for text, start, duration in rows
+                ]
             })
+            total += len(rows)
+        yield sse_event("done", {"total_snippets": total})
+    except TranscriptError as e:
+        yield sse_event("error", {"status_code": e.status_code, "detail": str(e)})
+    finally:
+        # ให้ thread ที่กำลังอ่านจาก YouTube หยุดที่ chunk ถัดไป และปิด generator ถ้าไม่ได้ทำงานอยู่
+        cancelled.set()
+        try:
+            batches.close()
+        except ValueError:
+            pass
+
+
+@app.get("/api/transcripts/stream")
+async def stream_transcript_events(
+    http_request: Request,
+    url: str = Query(..., description="YouTube URL หรือ Video ID"),
+    languages: str = Query("en", description="รายการภาษาคั่นด้วย comma (เช่น th,en)"),
+    preserve_formatting: bool = Query(False, description="เก็บ HTML formatting หรือไม่"),
+    translate_to: Optional[str] = Query(None, description="แปล transcript เป็นภาษานี้ (เช่น 'th')"),
+    batch_size: int = Query(STREAM_BATCH_SIZE, ge=1, le=PREVIEW_MAX_LIMIT, description="จำนวน snippet ต่อ event")
+):
+    """
+    ส่ง transcript เป็น server-sent events: metadata ทันทีที่รู้ภาษา แล้ว snippet ทีละ batch
+    ระหว่างที่ parse จาก YouTube (ไม่ต้องรอทั้ง transcript) ปิดการเชื่อมต่อเพื่อยกเลิกได้ทุกเมื่อ
+    error ก่อนเริ่ม stream ตอบเป็น HTTP status ตามปกติ, error ระหว่าง stream ส่งเป็น event: error
+    """
+    if not url.strip():
+        raise HTTPException(status_code=400, detail="กรุณากรอก YouTube URL หรือ Video ID")
+    video_id = transcript_service.extract_video_id(url.strip())
+    cancelled = threading.Event()
+    batches = transcript_service.stream_transcript(
+        video_id,
+        languages=[code.strip() for code in languages.split(",") if code.strip()] or ["en"],
+        preserve_formatting=preserve_formatting,
+        translate_to=translate_to,
+        batch_size=batch_size,
+        cancelled=cancelled
+    )
+    try:
+        # metadata (list + เลือกภาษา) ก่อนเริ่ม response จึงตอบ 404 / 503 ได้ตามปกติ
+        _, metadata = await transcript_service.run_in_executor(next, batches)
+    except TranscriptError as e:
+        raise transcript_http_error(e)
+    
+    return StreamingResponse(
+        transcript_events(http_request, batches, metadata, cancelled),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.post("/api/transcripts/overview")
+async def transcript_overview(request: PreviewRequest):
+    """
+    รายการภาษาที่มี + preview ของ transcript ภาษาที่ต้องการ ใน request เดียว
+    (ใช้ TranscriptList ชุดเดียวกัน จึงโหลดหน้า watch จาก YouTube แค่ครั้งเดียว)
+    """
+    try:
+        if not request.url or not request.url.strip():
+            raise HTTPException(status_code=400, detail="กรุณากรอก YouTube URL หรือ Video ID")
         
-        return {
+        video_id = transcript_service.extract_video_id(request.url.strip())
+        
+        transcripts = await transcript_service.list_transcripts_async(video_id)
+        result = {
             "success": True,
-            "video_id": transcript.video_id,
-            "language": transcript.language,
-            "language_code": transcript.language_code,
-            "is_generated": transcript.is_generated,
-            "total_snippets": len(transcript),
-            "snippets": snippets[:50]  # แสดงแค่ 50 snippets แรกสำหรับ preview
+            "video_id": video_id,
+            "transcripts": transcript_list_items(transcripts),
+            "transcript": None,
+            "error": None
         }
+        
+        try:
+            index = await load_snippet_index(video_id, request)
+            result["transcript"] = transcript_preview(index, request)
+        except TranscriptError as e:
+            # ไม่มีภาษาที่ต้องการ → ยังตอบรายการภาษาให้ผู้ใช้เลือกใหม่ได้
+            if e.status_code not in (400, 404):
+                raise
+            result["error"] = str(e)
+        
+        return result
     
     except HTTPException:
         raise
+    except TranscriptError as e:
+        raise transcript_http_error(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"เกิดข้อผิดพลาด: {str(e)}")
 
 
+@app.get("/api/search")
+async def search_transcripts(
+    q: str = Query(..., min_length=1, description="ข้อความค้นหา (ครอบด้วย \"...\" เพื่อค้นทั้งวลี, ลงท้ายคำด้วย * เพื่อค้นแบบ prefix)"),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    offset: int = Query(0, ge=0),
+    video_id: Optional[str] = Query(None, description="จำกัดเฉพาะ video นี้"),
+    language_code: Optional[str] = Query(None, description="จำกัดเฉพาะภาษานี้")
+):
+    """
+    ค้นหาข้อความใน transcript ทุกตัวที่เคยดึงมา เรียงตามความเกี่ยวข้อง
+    คืนตำแหน่งเป็นมิลลิวินาที (start_ms / end_ms)
+    """
+    if search_index is None:
+        raise HTTPException(status_code=503, detail="ระบบค้นหาถูกปิดอยู่ (SEARCH_INDEX_PATH)")
+    try:
+        hits = await run_in_threadpool(
+            search_index.search, q, limit=limit, offset=offset,
+            video_id=video_id, language_code=language_code
+        )
+    except sqlite3.OperationalError as e:
+        raise HTTPException(status_code=400, detail=f"ข้อความค้นหาไม่ถูกต้อง: {str(e)}")
+    
+    return {
+        "success": True,
+        "query": q,
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + len(hits) if len(hits) == limit else None,
+        "hits": hits
+    }
+
+
+@app.post("/api/jobs", status_code=202)
+async def create_job(request: TranscriptRequest):
+    """
+    สร้างงานดึง transcript + แปลงไฟล์แบบ background (สำหรับ transcript ยาวที่ render นานเกิน timeout)
+    ตรวจสถานะที่ GET /api/jobs/{job_id} และดาวน์โหลดผลที่ GET /api/jobs/{job_id}/result
+    """
+    if not request.url or not request.url.strip():
+        raise HTTPException(status_code=400, detail="กรุณากรอก YouTube URL หรือ Video ID")
+    file_format = request.file_format.lower() if request.file_format else "txt"
+    if file_format not in FILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"รูปแบบไฟล์ไม่รองรับ: {file_format}")
+    try:
+        pdf_layout = resolve_pdf_layout(request.pdf_layout) if file_format == "pdf" else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    params = {
+        "video_id": transcript_service.extract_video_id(request.url.strip()),
+        "languages": request.languages if request.languages else ["en"],
+        "preserve_formatting": request.preserve_formatting,
+        "translate_to": request.translate_to,
+        "file_format": file_format,
+        "include_timestamps": request.include_timestamps,
+        "pdf_layout": pdf_layout,
+    }
+    try:
+        job = await job_queue.submit(params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+    return {
+        "success": True,
+        "job": job,
+        "status_url": f"/api/jobs/{job['id']}",
+        "result_url": f"/api/jobs/{job['id']}/result"
+    }
+
+
+async def load_job(job_id: str) -> dict:
+    """ดึงงานตาม id (404 ถ้าไม่มีหรือหมดอายุแล้ว)"""
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ไม่พบงานนี้ (อาจหมดอายุแล้ว)")
+    return job
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    """สถานะและความคืบหน้าของงาน (มี result_url เมื่อเสร็จแล้ว)"""
+    job = await load_job(job_id)
+    info = await run_in_threadpool(job_queue.describe, job)
+    if job["status"] == "done":
+        info["result_url"] = f"/api/jobs/{job_id}/result"
+    return {"success": True, "job": info}
+
+
+@app.get("/api/jobs/{job_id}/result")
+async def get_job_result(job_id: str):
+    """ดาวน์โหลดไฟล์ผลลัพธ์ของงานที่เสร็จแล้ว"""
+    job = await load_job(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["status_code"] or 500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=409,
+            detail=f"งานยังไม่เสร็จ (สถานะ: {job['status']})",
+            headers={"Retry-After": "5"}
+        )
+    if not os.path.exists(job["result_path"]):
+        raise HTTPException(status_code=410, detail="ไฟล์ผลลัพธ์ถูกลบไปแล้ว")
+    return FileResponse(
+        path=job["result_path"],
+        filename=job["filename"],
+        media_type=job["media_type"]
+    )
+
+
+@app.post("/api/admin/prefetch", status_code=202)
+async def create_prefetch(request: PrefetchRequest, http_request: Request):
+    """
+    เติม transcript cache (และ render cache ถ้าระบุ formats) ของหลาย video ในพื้นหลัง
+    ตรวจความคืบหน้าที่ GET /api/admin/prefetch/{job_id}
+    """
+    require_admin(http_request)
+    video_ids = list(dict.fromkeys(
+        transcript_service.extract_video_id(url) for url in request.video_ids if url and url.strip()
+    ))
+    if not video_ids:
+        raise HTTPException(status_code=400, detail="กรุณาระบุรายการ YouTube URL หรือ Video ID")
+    if len(video_ids) > PREFETCH_MAX_VIDEOS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"จำนวน video เกินกำหนด (สูงสุด {PREFETCH_MAX_VIDEOS} รายการต่องาน)"
+        )
+    formats = [f.lower() for f in request.formats]
+    unsupported = [f for f in formats if f not in FILE_FORMATS]
+    if unsupported:
+        raise HTTPException(status_code=400, detail=f"รูปแบบไฟล์ไม่รองรับ: {', '.join(unsupported)}")
+    
+    params = {
+        "video_ids": video_ids,
+        "languages": request.languages if request.languages else ["en"],
+        "formats": formats,
+    }
+    try:
+        job = await prefetch_queue.submit(params)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "60"})
+    job["videos"] = len(video_ids)
+    return {
+        "success": True,
+        "job": job,
+        "status_url": f"/api/admin/prefetch/{job['id']}",
+        "result_url": f"/api/admin/prefetch/{job['id']}/result"
+    }
+
+
+async def load_prefetch_job(job_id: str) -> dict:
+    """ดึงงาน prefetch ตาม id (404 ถ้าไม่มีหรือหมดอายุแล้ว)"""
+    job = await prefetch_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="ไม่พบงานนี้ (อาจหมดอายุแล้ว)")
+    return job
+
+
+@app.get("/api/admin/prefetch/{job_id}")
+async def get_prefetch(job_id: str, http_request: Request):
+    """ความคืบหน้าของงาน prefetch (stage บอกจำนวน video ที่ cached / fetched / failed)"""
+    require_admin(http_request)
+    job = await load_prefetch_job(job_id)
+    info = await run_in_threadpool(prefetch_queue.describe, job)
+    info["videos"] = len(json.loads(job["params"])["video_ids"])
+    if job["status"] == "done":
+        info["result_url"] = f"/api/admin/prefetch/{job_id}/result"
+    return {"success": True, "job": info}
+
+
+@app.get("/api/admin/prefetch/{job_id}/result")
+async def get_prefetch_result(job_id: str, http_request: Request):
+    """รายงานผลของแต่ละ video (NDJSON) ของงาน prefetch ที่เสร็จแล้ว"""
+    require_admin(http_request)
+    job = await load_prefetch_job(job_id)
+    if job["status"] == "failed":
+        raise HTTPException(status_code=job["status_code"] or 500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(
+            status_code=409,
+            detail=f"งานยังไม่เสร็จ (สถานะ: {job['status']})",
+            headers={"Retry-After": "5"}
+        )
+    if not os.path.exists(job["result_path"]):
+        raise HTTPException(status_code=410, detail="ไฟล์ผลลัพธ์ถูกลบไปแล้ว")
+    return FileResponse(path=job["result_path"], filename=job["filename"], media_type=job["media_type"])
+
+
+@app.post("/api/transcripts/batch")
+async def batch_transcripts(request: BatchTranscriptRequest):
+    """
+    ดึง transcript หลาย video พร้อมกัน และ stream ผลลัพธ์กลับทีละ video ที่เสร็จ
+    - output=ndjson: JSON หนึ่งบรรทัดต่อ video
+    - output=zip: ZIP ของไฟล์ที่แปลงแล้ว (พร้อม errors.json สำหรับ video ที่ล้มเหลว)
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="กรุณาระบุรายการ YouTube URL หรือ Video ID")
+    if len(request.urls) > batch_service.max_items:
+        raise HTTPException(
+            status_code=400,
+            detail=f"จำนวน video เกินกำหนด (สูงสุด {batch_service.max_items} รายการต่อ batch)"
+        )
+    
+    output = request.output.lower() if request.output else "ndjson"
+    file_format = request.file_format.lower() if request.file_format else "txt"
+    languages = request.languages if request.languages else ["en"]
+    
+    if output == "ndjson":
+        async def ndjson_stream():
+            async for item in batch_service.iter_results(request.urls, languages, request.preserve_formatting):
+                if item.success:
+                    transcript = item.transcript
+                    line = {
+                        "index": item.index,
+                        "url": item.url,
+                        "success": True,
+                        "video_id": item.video_id,
+                        "language": transcript.language,
+                        "language_code": transcript.language_code,
+                        "is_generated": transcript.is_generated,
+                        "total_snippets": len(transcript),
+                        "snippets": transcript.to_raw_data()
+                    }
+                else:
+                    line = {
+                        "index": item.index,
+                        "url": item.url,
+                        "success": False,
+                        "video_id": item.video_id,
+                        "error": item.error
+                    }
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(ndjson_stream(), media_type="application/x-ndjson")
+    
+    if output == "zip":
+        if file_format not in FILE_FORMATS:
+            raise HTTPException(status_code=400, detail=f"รูปแบบไฟล์ไม่รองรับ: {file_format}")
+        extension = FILE_FORMATS[file_format][0]
+        
+        async def zip_stream():
+            buffer = ZipStreamWriter()
+            errors = []
+            with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+                async for item in batch_service.iter_results(request.urls, languages, request.preserve_formatting):
+                    if item.success and file_format in STREAMING_FORMATS:
+                        filename = f"transcript_{item.video_id}_{item.transcript.language_code}.{extension}"
+                        # แปลงและ deflate ใน thread pool (ไม่ให้ event loop ค้างระหว่างบีบอัดไฟล์ใหญ่)
+                        await run_in_threadpool(
+                            lambda: archive.writestr(filename, "".join(
+                                stream_transcript(item.transcript, file_format, request.include_timestamps)
+                            ))
+                        )
+                    elif item.success:
+                        try:
+                            file_path = await render_pool.render(
+                                item.transcript, file_format, request.include_timestamps, block=True
+                            )
+                            try:
+                                filename = f"transcript_{item.video_id}_{item.transcript.language_code}.{extension}"
+                                await run_in_threadpool(archive.write, file_path, filename)
+                            finally:
+                                artifact_store.release(file_path)
+                        except Exception as e:
+                            errors.append({"index": item.index, "url": item.url, "video_id": item.video_id, "error": str(e)})
+                    else:
+                        errors.append({"index": item.index, "url": item.url, "video_id": item.video_id, "error": item.error})
+                    yield buffer.drain()
+                if errors:
+                    await run_in_threadpool(
+                        archive.writestr, "errors.json", json.dumps(errors, ensure_ascii=False, indent=2)
+                    )
+            yield buffer.drain()
+        
+        return StreamingResponse(
+            zip_stream(),
+            media_type="application/zip",
+            headers={"Content-Disposition": "attachment; filename=transcripts.zip"}
+        )
+    
+    raise HTTPException(status_code=400, detail=f"รูปแบบผลลัพธ์ไม่รองรับ: {output}")
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+CLI เติม cache ล่วงหน้าจากรายการ video (เช่น video ของ channel / playlist ที่คาดว่าจะมีคนขอช่วง peak)
+
+โหมดปกติ: ส่งงานไปที่ POST /api/admin/prefetch ของ server ที่รันอยู่ แล้วแสดงความคืบหน้าจนเสร็จ
+    (เติมทั้ง transcript cache และ render cache ของ server)
+โหมด --local: ดึง transcript ใน process นี้เข้า transcript cache ที่ใช้ร่วมกัน
+    (TRANSCRIPT_CACHE_DISK_PATH / Redis) ไม่ต้องมี server แต่ไม่เติม render cache
+
+ตัวอย่าง:
+    python prefetch.py --server http://localhost:8000 --token $ADMIN_TOKEN --file videos.txt --formats pdf,txt
+    python prefetch.py --local dQw4w9WgXcQ https://youtu.be/jNQXAC9IVME
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from services.prefetch import read_video_list
+
+
+def print_summary(results: list):
+    """แสดงสรุปผลของแต่ละ video และจำนวนตามสถานะ"""
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        if result["status"] == "failed":
+            print(f"  failed {result['video_id']}: {result['error']}")
+    print(", ".join(f"{status} {count}" for status, count in sorted(counts.items())))
+
+
+def run_remote(args, video_ids: list) -> int:
+    """ส่งงานไปที่ server แล้ว poll ความคืบหน้าจนเสร็จ"""
+    import requests
+
+    base_url = args.server.rstrip("/")
+    headers = {"Authorization": f"Bearer {args.token}"}
+    response = requests.post(
+        f"{base_url}/api/admin/prefetch",
+        json={"video_ids": video_ids, "languages": args.languages, "formats": args.formats},
+        headers=headers,
+        timeout=30
+    )
+    if response.status_code != 202:
+        print(f"ส่งงานไม่สำเร็จ ({response.status_code}): {response.text}", file=sys.stderr)
+        return 1
+    job_id = response.json()["job"]["id"]
+    print(f"job {job_id}: {len(video_ids)} videos")
+
+    last_stage = None
+    while True:
+        job = requests.get(f"{base_url}/api/admin/prefetch/{job_id}", headers=headers, timeout=30).json()["job"]
+        if job.get("stage") != last_stage:
+            last_stage = job.get("stage")
+            print(f"  {job['status']}: {last_stage}")
+        if job["status"] in ("done", "failed"):
+            break
+        time.sleep(args.poll_interval)
+    if job["status"] == "failed":
+        print(f"งานล้มเหลว: {job.get('error')}", file=sys.stderr)
+        return 1
+
+    response = requests.get(f"{base_url}/api/admin/prefetch/{job_id}/result", headers=headers, timeout=30)
+    print_summary([json.loads(line) for line in response.text.splitlines() if line])
+    return 0
+
+
+def run_local(args, items: list) -> int:
+    """ดึง transcript ใน process นี้เข้า transcript cache ที่ใช้ร่วมกัน"""
+    from services.prefetch import Prefetcher
+    from services.transcript_service import TranscriptService
+
+    transcript_service = TranscriptService()
+    video_ids = list(dict.fromkeys(transcript_service.extract_video_id(item) for item in items))
+
+    async def report(stage: str, progress: float):
+        print(f"  {stage}")
+
+    try:
+        prefetcher = Prefetcher(transcript_service)
+        results = asyncio.run(prefetcher.run(video_ids, args.languages, [], report))
+    finally:
+        transcript_service.shutdown()
+    print_summary(results)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the transcript and rendered-file caches")
+    parser.add_argument("videos", nargs="*", help="YouTube URL หรือ Video ID")
+    parser.add_argument("--file", help="ไฟล์รายการ video (หนึ่งรายการต่อบรรทัด, '-' = stdin)")
+    parser.add_argument("--languages", default="en", help="ภาษาคั่นด้วย comma (ต้องตรงกับที่ผู้ใช้ขอ)")
+    parser.add_argument("--formats", default="", help="รูปแบบไฟล์ที่ render เข้า cache คั่นด้วย comma")
+    parser.add_argument("--server", default=os.getenv("PREFETCH_SERVER", "http://localhost:8000"))
+    parser.add_argument("--token", default=os.getenv("ADMIN_TOKEN", ""), help="admin token (default: ADMIN_TOKEN)")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--local", action="store_true", help="ดึงใน process นี้ (เฉพาะ transcript cache)")
+    args = parser.parse_args()
+
+    items = list(args.videos)
+    if args.file:
+        if args.file == "-":
+            items.extend(read_video_list(sys.stdin))
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                items.extend(read_video_list(f))
+    args.languages = [code.strip() for code in args.languages.split(",") if code.strip()]
+    args.formats = [fmt.strip().lower() for fmt in args.formats.split(",") if fmt.strip()]
+
+    if not items:
+        parser.error("กรุณาระบุ video อย่างน้อยหนึ่งรายการ (argument หรือ --file)")
+    if args.local and args.formats:
+        print("--local เติมเฉพาะ transcript cache (ไม่สนใจ --formats)", file=sys.stderr)
+    if not args.local and not args.token:
+        parser.error("ต้องระบุ --token หรือ ADMIN_TOKEN")
+
+    sys.exit(run_local(args, items) if args.local else run_remote(args, items))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Artifact Store - จัดการวงจรชีวิตของไฟล์ที่ FileConverter สร้าง (PDF, DOCX, TXT)
+  - สร้างไฟล์ใน directory เฉพาะของ application
+  - ลบไฟล์หลังส่ง response เสร็จ (release)
+  - sweeper ลบไฟล์ค้าง (orphan) ตามอายุและขนาดรวม
+"""
+
+from typing import Optional
+import asyncio
+import logging
+import os
+import tempfile
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# ค่าเริ่มต้น
+DEFAULT_MAX_AGE_SECONDS = 60 * 60
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+DEFAULT_SWEEP_INTERVAL_SECONDS = 5 * 60
+ARTIFACT_DIR_NAME = "yt-transcript-artifacts"
+
+# tmpfs ที่ใช้เป็น in-memory backend (Linux)
+TMPFS_ROOT = "/dev/shm"
+
+
+class ArtifactStore:
+    """ที่เก็บไฟล์ชั่วคราวของ converter พร้อมการลบอัตโนมัติและ metrics"""
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        backend: Optional[str] = None,
+        max_age: Optional[float] = None,
+        max_bytes: Optional[int] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        ARTIFACT_DIR, ARTIFACT_BACKEND, ARTIFACT_MAX_AGE, ARTIFACT_MAX_BYTES
+
+        Args:
+            directory: directory ที่เก็บไฟล์
+            backend: "disk" (default) หรือ "memory" (ใช้ tmpfs ที่ /dev/shm)
+            max_age: อายุสูงสุดของไฟล์ก่อนถูก sweeper ลบ (วินาที)
+            max_bytes: ขนาดรวมสูงสุดของไฟล์ใน directory
+        """
+        if backend is None:
+            backend = os.getenv("ARTIFACT_BACKEND", "disk").lower()
+        if directory is None:
+            directory = os.getenv("ARTIFACT_DIR") or None
+        if directory is None:
+            if backend == "memory" and os.path.isdir(TMPFS_ROOT):
+                directory = os.path.join(TMPFS_ROOT, ARTIFACT_DIR_NAME)
+            else:
+                if backend == "memory":
+                    logger.warning("ไม่พบ %s ใช้ disk backend แทน", TMPFS_ROOT)
+                    backend = "disk"
+                directory = os.path.join(tempfile.gettempdir(), ARTIFACT_DIR_NAME)
+        if max_age is None:
+            max_age = float(os.getenv("ARTIFACT_MAX_AGE", DEFAULT_MAX_AGE_SECONDS))
+        if max_bytes is None:
+            max_bytes = int(os.getenv("ARTIFACT_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+        self.directory = directory
+        self.backend = backend
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.created = 0
+        self.released = 0
+        self.swept = 0
+        self._lock = threading.Lock()
+
+    def create(self, suffix: str) -> str:
+        """
+        สร้างไฟล์ว่างใหม่ใน store
+
+        Args:
+            suffix: นามสกุลไฟล์ (เช่น '.pdf')
+
+        Returns:
+            Path ของไฟล์ที่สร้าง
+        """
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        os.close(fd)
+        with self._lock:
+            self.created += 1
+        return path
+
+    def release(self, path: str):
+        """
+        ลบไฟล์ที่ใช้งานเสร็จแล้ว (เช่น หลังส่ง response) ลบได้เฉพาะไฟล์ใน store
+
+        Args:
+            path: Path ของไฟล์
+        """
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(self.directory):
+            return
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self.released += 1
+
+    def sweep(self) -> int:
+        """
+        ลบไฟล์ค้าง: ไฟล์ที่อายุเกิน max_age และไฟล์เก่าสุดเมื่อขนาดรวมเกิน max_bytes
+
+        Returns:
+            จำนวนไฟล์ที่ลบ
+        """
+        now = time.time()
+        removed = 0
+        files = []
+        for entry in self._scan():
+            if now - entry.stat().st_mtime > self.max_age:
+                removed += self._remove(entry.path)
+            else:
+                files.append(entry)
+
+        total = sum(entry.stat().st_size for entry in files)
+        if total > self.max_bytes:
+            for entry in sorted(files, key=lambda e: e.stat().st_mtime):
+                if total <= self.max_bytes:
+                    break
+                total -= entry.stat().st_size
+                removed += self._remove(entry.path)
+
+        with self._lock:
+            self.swept += removed
+        return removed
+
+    async def run_sweeper(self, interval: Optional[float] = None):
+        """
+        รัน sweep เป็นระยะใน background (ใช้กับ asyncio task)
+
+        Args:
+            interval: ระยะห่างระหว่างการ sweep (วินาที) default จาก ARTIFACT_SWEEP_INTERVAL
+        """
+        if interval is None:
+            interval = float(os.getenv("ARTIFACT_SWEEP_INTERVAL", DEFAULT_SWEEP_INTERVAL_SECONDS))
+        while True:
+            try:
+                await asyncio.to_thread(self.sweep)
+            except Exception:
+                logger.exception("artifact sweep ล้มเหลว")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        """สถิติของ store (จำนวนไฟล์และ bytes บน disk)"""
+        entries = list(self._scan())
+        return {
+            "backend": self.backend,
+            "directory": self.directory,
+            "files": len(entries),
+            "bytes_on_disk": sum(entry.stat().st_size for entry in entries),
+            "created": self.created,
+            "released": self.released,
+            "swept": self.swept,
+        }
+
+    def _scan(self):
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    try:
+                        # เรียก stat() ครั้งแรกที่นี่ (DirEntry จะ cache ผลไว้) กันไฟล์ถูกลบระหว่าง scan
+                        if entry.is_file(follow_symlinks=False) and entry.stat():
+                            yield entry
+                    except FileNotFoundError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.unlink(path)
+            return 1
+        except FileNotFoundError:
+            return 0
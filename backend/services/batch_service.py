@@ -0,0 +1,119 @@
+"""
+Batch Service - ดึง transcript หลาย video พร้อมกันแบบจำกัดจำนวน (bounded concurrency)
+และส่งผลลัพธ์ออกทีละ video ทันทีที่เสร็จ
+"""
+
+from typing import AsyncIterator, List, Optional
+import asyncio
+import os
+
+
+# จำนวน video สูงสุดต่อ batch และจำนวนที่ดึงพร้อมกัน
+DEFAULT_BATCH_MAX_ITEMS = 500
+DEFAULT_BATCH_CONCURRENCY = 8
+
+
+class BatchItemResult:
+    """ผลลัพธ์ของ video หนึ่งรายการใน batch"""
+
+    __slots__ = ("index", "url", "video_id", "transcript", "error")
+
+    def __init__(self, index: int, url: str, video_id: Optional[str], transcript=None, error: Optional[str] = None):
+        self.index = index
+        self.url = url
+        self.video_id = video_id
+        self.transcript = transcript
+        self.error = error
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+
+class BatchService:
+    """Service สำหรับดึง transcript หลาย video ใน request เดียว"""
+
+    def __init__(self, transcript_service, concurrency: Optional[int] = None, max_items: Optional[int] = None):
+        """
+        Args:
+            transcript_service: TranscriptService ที่ใช้ดึง transcript
+            concurrency: จำนวน video ที่ดึงพร้อมกัน (default จาก BATCH_CONCURRENCY)
+            max_items: จำนวน video สูงสุดต่อ batch (default จาก BATCH_MAX_ITEMS)
+        """
+        self.transcript_service = transcript_service
+        if concurrency is None:
+            concurrency = int(os.getenv("BATCH_CONCURRENCY", DEFAULT_BATCH_CONCURRENCY))
+        if max_items is None:
+            max_items = int(os.getenv("BATCH_MAX_ITEMS", DEFAULT_BATCH_MAX_ITEMS))
+        self.concurrency = max(1, concurrency)
+        self.max_items = max_items
+
+    async def iter_results(
+        self,
+        urls: List[str],
+        languages: Optional[List[str]] = None,
+        preserve_formatting: bool = False
+    ) -> AsyncIterator[BatchItemResult]:
+        """
+        ดึง transcript ของทุก URL พร้อมกัน (ไม่เกิน concurrency) และ yield ผลลัพธ์ตามลำดับที่เสร็จ
+
+        Args:
+            urls: รายการ YouTube URL หรือ Video ID
+            languages: รายการภาษา
+            preserve_formatting: เก็บ HTML formatting หรือไม่
+
+        Yields:
+            BatchItemResult ของแต่ละ video (error ของ video หนึ่งไม่ทำให้ batch ล้ม)
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(index: int, url: str) -> BatchItemResult:
+            url = (url or "").strip()
+            if not url:
+                return BatchItemResult(index, url, None, error="กรุณากรอก YouTube URL หรือ Video ID")
+            video_id = self.transcript_service.extract_video_id(url)
+            async with semaphore:
+                try:
+                    transcript = await self.transcript_service.fetch_transcript_async(
+                        video_id=video_id,
+                        languages=languages,
+                        preserve_formatting=preserve_formatting
+                    )
+                except Exception as e:
+                    return BatchItemResult(index, url, video_id, error=str(e))
+            if not transcript:
+                return BatchItemResult(index, url, video_id, error="ไม่พบ transcript สำหรับ video นี้")
+            return BatchItemResult(index, url, video_id, transcript=transcript)
+
+        tasks = [asyncio.ensure_future(fetch_one(i, url)) for i, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # client ตัดการเชื่อมต่อกลางคัน → ยกเลิกงานที่ยังไม่เสร็จ
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+
+class ZipStreamWriter:
+    """
+    File-like object แบบเขียนอย่างเดียวสำหรับ zipfile.ZipFile
+    เก็บ bytes ที่ถูกเขียนไว้จนกว่าจะถูกดึงออกด้วย drain() เพื่อ stream ZIP ทีละส่วน
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        """ดึง bytes ที่เขียนไว้ทั้งหมดออกมา"""
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
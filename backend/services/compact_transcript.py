@@ -0,0 +1,224 @@
+"""
+Compact Transcript - transcript แบบ columnar ที่ใช้ memory น้อย สำหรับเก็บใน cache
+  - เวลาเริ่ม / ความยาว เก็บใน array('d')
+  - ข้อความทุก snippet รวมเป็น UTF-8 buffer เดียว + array ของ offset
+  - ไม่มี Python object ต่อ snippet จนกว่าจะถูกอ่าน
+"""
+
+from array import array
+from itertools import accumulate, islice
+from typing import Iterator, List, Tuple
+import json
+import struct
+import sys
+
+
+class CompactSnippet:
+    """มุมมองของ snippet หนึ่งรายการ (สร้างตอนอ่าน ใช้แทน FetchedTranscriptSnippet ได้)"""
+
+    __slots__ = ("text", "start", "duration")
+
+    def __init__(self, text: str, start: float, duration: float):
+        self.text = text
+        self.start = start
+        self.duration = duration
+
+    def __repr__(self) -> str:
+        return f"CompactSnippet(text={self.text!r}, start={self.start}, duration={self.duration})"
+
+
+class CompactTranscript:
+    """
+    Transcript แบบ columnar มี interface เดียวกับ FetchedTranscript ที่ใช้ในระบบ
+    (video_id, language, language_code, is_generated, len(), iteration, index)
+    """
+
+    __slots__ = ("video_id", "language", "language_code", "is_generated", "starts", "durations", "_text", "_offsets")
+
+    def __init__(
+        self,
+        video_id: str,
+        language: str,
+        language_code: str,
+        is_generated: bool,
+        starts: array,
+        durations: array,
+        text: bytes,
+        offsets: array
+    ):
+        """
+        Args:
+            video_id, language, language_code, is_generated: metadata ของ transcript
+            starts: array('d') ของเวลาเริ่ม
+            durations: array('d') ของความยาว
+            text: ข้อความทุก snippet ต่อกันเป็น UTF-8
+            offsets: array('I') ตำแหน่งเริ่มของข้อความแต่ละ snippet (ยาว len + 1)
+        """
+        self.video_id = video_id
+        self.language = language
+        self.language_code = language_code
+        self.is_generated = is_generated
+        self.starts = starts
+        self.durations = durations
+        self._text = text
+        self._offsets = offsets
+
+    @classmethod
+    def from_transcript(cls, transcript) -> "CompactTranscript":
+        """
+        สร้างจาก FetchedTranscript (หรือ object ที่ iterate ได้เป็น snippet)
+        ถ้าเป็น CompactTranscript อยู่แล้วจะคืน object เดิม
+        """
+        if isinstance(transcript, cls):
+            return transcript
+        snippets = list(transcript)
+        encoded = [snippet.text.encode("utf-8") for snippet in snippets]
+        return cls(
+            video_id=transcript.video_id,
+            language=transcript.language,
+            language_code=transcript.language_code,
+            is_generated=transcript.is_generated,
+            starts=array("d", [snippet.start for snippet in snippets]),
+            durations=array("d", [snippet.duration for snippet in snippets]),
+            text=b"".join(encoded),
+            offsets=array("I", accumulate(map(len, encoded), initial=0)),
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        video_id: str,
+        language: str,
+        language_code: str,
+        is_generated: bool,
+        texts: List[str],
+        starts: List[float],
+        durations: List[float]
+    ) -> "CompactTranscript":
+        """สร้างจาก list ของแต่ละคอลัมน์"""
+        encoded = [text.encode("utf-8") for text in texts]
+        return cls(
+            video_id=video_id,
+            language=language,
+            language_code=language_code,
+            is_generated=is_generated,
+            starts=array("d", starts),
+            durations=array("d", durations),
+            text=b"".join(encoded),
+            offsets=array("I", accumulate(map(len, encoded), initial=0)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def text_at(self, index: int) -> str:
+        """ข้อความของ snippet ลำดับที่ index (decode จาก buffer โดยไม่ copy bytes ก่อน)"""
+        with memoryview(self._text) as view:
+            return str(view[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+    def __getitem__(self, index: int) -> CompactSnippet:
+        if index < 0:
+            index += len(self.starts)
+        if not 0 <= index < len(self.starts):
+            raise IndexError("snippet index out of range")
+        return CompactSnippet(self.text_at(index), self.starts[index], self.durations[index])
+
+    def rows(self) -> Iterator[Tuple[str, float, float]]:
+        """iterate (text, start, duration) โดยไม่สร้าง object ต่อ snippet (ใช้ใน converter)"""
+        offsets = self._offsets
+        bounds = zip(offsets, islice(offsets, 1, None))
+        if self._text.isascii():
+            # ASCII: offset ของ byte ตรงกับ offset ของตัวอักษร จึง decode ครั้งเดียวแล้วตัด str
+            text = self._text.decode("ascii")
+            for (begin, end), start, duration in zip(bounds, self.starts, self.durations):
+                yield text[begin:end], start, duration
+            return
+        with memoryview(self._text) as view:
+            for (begin, end), start, duration in zip(bounds, self.starts, self.durations):
+                yield str(view[begin:end], "utf-8"), start, duration
+
+    def __iter__(self) -> Iterator[CompactSnippet]:
+        for text, start, duration in self.rows():
+            yield CompactSnippet(text, start, duration)
+
+    @property
+    def snippets(self) -> List[CompactSnippet]:
+        """รายการ snippet (สร้างใหม่ทุกครั้ง เพื่อเข้ากันได้กับ FetchedTranscript.snippets)"""
+        return list(self)
+
+    def to_raw_data(self) -> List[dict]:
+        """แปลงเป็น list ของ dict (เหมือน FetchedTranscript.to_raw_data)"""
+        return [
+            {"text": text, "start": start, "duration": duration}
+            for text, start, duration in self.rows()
+        ]
+
+    def nbytes(self) -> int:
+        """ขนาดโดยประมาณใน memory (bytes)"""
+        columns = (
+            self.starts.itemsize * len(self.starts)
+            + self.durations.itemsize * len(self.durations)
+            + self._offsets.itemsize * len(self._offsets)
+        )
+        metadata = len(self.video_id) + len(self.language) + len(self.language_code)
+        # object + arrays + bytes headers (ค่าคงที่โดยประมาณ)
+        return len(self._text) + columns + metadata + 400
+
+    def to_bytes(self) -> bytes:
+        """แปลงเป็น bytes แบบ binary (header JSON + columns + ข้อความ) สำหรับเก็บบน disk"""
+        header = json.dumps({
+            "video_id": self.video_id,
+            "language": self.language,
+            "language_code": self.language_code,
+            "is_generated": self.is_generated,
+            "count": len(self.starts),
+            "byteorder": sys.byteorder,
+        }, ensure_ascii=False).encode("utf-8")
+        return b"".join((
+            struct.pack("<I", len(header)),
+            header,
+            self.starts.tobytes(),
+            self.durations.tobytes(),
+            self._offsets.tobytes(),
+            self._text,
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactTranscript":
+        """แปลง bytes จาก to_bytes() กลับเป็น CompactTranscript"""
+        (header_size,) = struct.unpack_from("<I", data, 0)
+        position = 4 + header_size
+        header = json.loads(data[4:position].decode("utf-8"))
+        count = header["count"]
+
+        columns = []
+        for typecode, length in (("d", count), ("d", count), ("I", count + 1)):
+            column = array(typecode)
+            end = position + column.itemsize * length
+            column.frombytes(data[position:end])
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns.append(column)
+            position = end
+        starts, durations, offsets = columns
+
+        return cls(
+            video_id=header["video_id"],
+            language=header["language"],
+            language_code=header["language_code"],
+            is_generated=header["is_generated"],
+            starts=starts,
+            durations=durations,
+            text=bytes(data[position:]),
+            offsets=offsets,
+        )
+
+
+def snippet_rows(transcript) -> Iterator[Tuple[str, float, float]]:
+    """
+    iterate (text, start, duration) ของ transcript ใดๆ
+    ใช้ rows() ของ CompactTranscript ถ้ามี ไม่งั้นอ่านจาก snippet objects
+    """
+    if isinstance(transcript, CompactTranscript):
+        return transcript.rows()
+    return ((snippet.text, snippet.start, snippet.duration) for snippet in transcript)
@@ -0,0 +1,414 @@
+"""
+Compression - บีบอัด response ตาม Accept-Encoding ของ client
+  - gzip มีเสมอ (zlib), br และ zstd ใช้ได้เมื่อติดตั้ง brotli / zstandard (optional)
+  - บีบอัดแบบ stream ทีละ chunk (ไม่ต้องรอทั้ง response) และ sync flush ทุก chunk ของ
+    StreamingResponse ให้ client ได้ข้อมูลทันที (เช่น NDJSON ของ /api/transcripts/batch)
+  - CompressionMiddleware (ASGI) บีบอัด response ที่เป็น text ทุกตัวที่ยังไม่ได้บีบอัด
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional
+import os
+import re
+import threading
+import zlib
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# ลำดับความชอบของ server เมื่อ client ให้ q เท่ากัน (ตัวแรกบีบอัดได้ดีสุด/เร็วสุด)
+DEFAULT_ENCODINGS = "zstd,br,gzip"
+# response ที่เล็กกว่านี้ (bytes) ไม่คุ้มที่จะบีบอัด
+DEFAULT_MIN_SIZE = 1024
+# ระดับการบีบอัด (เลือกค่าที่เร็วพอสำหรับการบีบอัดแบบ stream)
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+DEFAULT_ZSTD_LEVEL = 3
+# chunk ที่ใหญ่กว่านี้บีบอัดใน thread pool เพื่อไม่ให้ event loop ค้าง
+THREADPOOL_THRESHOLD = 256 * 1024
+
+# media type ที่บีบอัด (text/event-stream ไม่บีบอัดเพราะ client ต้องได้ event ทันที)
+_COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/x-subrip",
+    "application/javascript",
+    "application/xml",
+}
+_ETAG_SUFFIX = re.compile(r'-(?:gzip|br|zstd)"$')
+
+
+def available_encodings() -> List[str]:
+    """encoding ที่ใช้ได้ใน environment นี้ (ขึ้นกับ optional dependencies)"""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def is_compressible(media_type: Optional[str]) -> bool:
+    """ตรวจสอบว่า media type นี้เป็น text ที่บีบอัดแล้วคุ้ม"""
+    if not media_type:
+        return False
+    media_type = media_type.split(";", 1)[0].strip().lower()
+    if media_type == "text/event-stream":
+        return False
+    return (
+        media_type.startswith("text/")
+        or media_type in _COMPRESSIBLE_TYPES
+        or media_type.endswith("+json")
+        or media_type.endswith("+xml")
+    )
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag ของ representation ที่บีบอัดแล้ว (ต่อท้ายด้วยชื่อ encoding เช่น "abc-gzip")
+
+    Args:
+        etag: ETag เดิม (รวมเครื่องหมาย ")
+        encoding: content encoding
+
+    Returns:
+        ETag ใหม่ (weak ETag คงเดิมเพราะเทียบแบบ weak อยู่แล้ว)
+    """
+    if not etag.endswith('"') or etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def strip_encoded_etag(etag: str) -> str:
+    """ตัดชื่อ encoding ที่ encoded_etag() ต่อท้ายออก (ใช้ตอนเทียบ If-None-Match)"""
+    return _ETAG_SUFFIX.sub('"', etag)
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    แปลง header Accept-Encoding เป็น {encoding: q}
+
+    Args:
+        header: ค่าของ header (เช่น "gzip, br;q=0.9, *;q=0")
+
+    Returns:
+        dict ของ encoding (ตัวพิมพ์เล็ก) และค่า q
+    """
+    accepted = {}
+    if not header:
+        return accepted
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value.strip())
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+class _ZlibStream:
+    """ตัวบีบอัด gzip: compress / sync_flush (ส่งข้อมูลที่ค้างออกโดยไม่จบ stream) / flush (จบ stream)"""
+
+    def __init__(self, level: int):
+        # wbits=31 คือ deflate ในรูปแบบ gzip (มี header + CRC)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def sync_flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    """ปรับ brotli.Compressor ให้มี interface เดียวกับ _ZlibStream"""
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def sync_flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def flush(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdStream:
+    """ปรับ zstandard compressobj ให้มี interface เดียวกับ _ZlibStream"""
+
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def sync_flush(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+class ResponseCompressor:
+    """เลือก encoding จาก Accept-Encoding และบีบอัดข้อมูลทั้งแบบก้อนเดียวและแบบ stream"""
+
+    def __init__(
+        self,
+        encodings: Optional[Iterable[str]] = None,
+        min_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        zstd_level: Optional[int] = None
+    ):
+        """
+        Args:
+            encodings: encoding ที่เปิดใช้เรียงตามความชอบ (default จาก COMPRESSION_ENCODINGS, ว่าง = ปิด)
+            min_size: ขนาด response ขั้นต่ำที่บีบอัด (default จาก COMPRESSION_MIN_SIZE)
+            gzip_level: ระดับของ gzip 1-9 (default จาก COMPRESSION_GZIP_LEVEL)
+            brotli_quality: ระดับของ brotli 0-11 (default จาก COMPRESSION_BROTLI_QUALITY)
+            zstd_level: ระดับของ zstd 1-22 (default จาก COMPRESSION_ZSTD_LEVEL)
+        """
+        if encodings is None:
+            encodings = os.getenv("COMPRESSION_ENCODINGS", DEFAULT_ENCODINGS).split(",")
+        if min_size is None:
+            min_size = int(os.getenv("COMPRESSION_MIN_SIZE", DEFAULT_MIN_SIZE))
+        if gzip_level is None:
+            gzip_level = int(os.getenv("COMPRESSION_GZIP_LEVEL", DEFAULT_GZIP_LEVEL))
+        if brotli_quality is None:
+            brotli_quality = int(os.getenv("COMPRESSION_BROTLI_QUALITY", DEFAULT_BROTLI_QUALITY))
+        if zstd_level is None:
+            zstd_level = int(os.getenv("COMPRESSION_ZSTD_LEVEL", DEFAULT_ZSTD_LEVEL))
+
+        # ตัด encoding ที่ไม่มี library ออก (เช่นไม่ได้ติดตั้ง brotli)
+        supported = available_encodings()
+        self.encodings = [
+            name for name in (encoding.strip().lower() for encoding in encodings)
+            if name in supported
+        ]
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.zstd_level = zstd_level
+        self._bytes_in: Dict[str, int] = {}
+        self._bytes_out: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        เลือก encoding จาก Accept-Encoding (q สูงสุด, เท่ากันใช้ลำดับของ server)
+
+        Args:
+            accept_encoding: ค่าของ header Accept-Encoding
+
+        Returns:
+            ชื่อ encoding หรือ None ถ้าควรส่งแบบไม่บีบอัด
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        if not accepted:
+            return None
+        wildcard = accepted.get("*", 0.0)
+        best, best_q = None, 0.0
+        for encoding in self.encodings:
+            q = accepted.get(encoding, wildcard)
+            if q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    def compressobj(self, encoding: str):
+        """
+        สร้างตัวบีบอัดแบบ stream
+
+        Args:
+            encoding: gzip, br หรือ zstd
+
+        Returns:
+            object ที่มี compress(bytes) -> bytes, sync_flush() -> bytes (ส่งข้อมูลที่ค้างออก)
+            และ flush() -> bytes (จบ stream)
+        """
+        if encoding == "gzip":
+            return _ZlibStream(self.gzip_level)
+        if encoding == "br" and brotli is not None:
+            return _BrotliStream(self.brotli_quality)
+        if encoding == "zstd" and zstandard is not None:
+            return _ZstdStream(self.zstd_level)
+        raise ValueError(f"ไม่รองรับ content encoding: {encoding}")
+
+    def compress(self, data: bytes, encoding: str) -> bytes:
+        """บีบอัดข้อมูลก้อนเดียว"""
+        stream = self.compressobj(encoding)
+        compressed = stream.compress(data) + stream.flush()
+        self.record(encoding, len(data), len(compressed))
+        return compressed
+
+    def compress_stream(self, chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+        """
+        บีบอัดข้อมูลแบบ stream (yield เฉพาะเมื่อ compressor มีข้อมูลออกมา)
+
+        Args:
+            chunks: ข้อมูลต้นฉบับทีละ chunk
+            encoding: gzip, br หรือ zstd
+
+        Yields:
+            ข้อมูลที่บีบอัดแล้วทีละ chunk
+        """
+        stream = self.compressobj(encoding)
+        size_in = size_out = 0
+        for chunk in chunks:
+            size_in += len(chunk)
+            compressed = stream.compress(chunk)
+            if compressed:
+                size_out += len(compressed)
+                yield compressed
+        compressed = stream.flush()
+        size_out += len(compressed)
+        self.record(encoding, size_in, size_out)
+        yield compressed
+
+    def record(self, encoding: str, size_in: int, size_out: int):
+        """บันทึกขนาดก่อน/หลังบีบอัด (ใช้ใน stats)"""
+        with self._lock:
+            self._bytes_in[encoding] = self._bytes_in.get(encoding, 0) + size_in
+            self._bytes_out[encoding] = self._bytes_out.get(encoding, 0) + size_out
+
+    def stats(self) -> dict:
+        """สถิติการบีบอัดแยกตาม encoding"""
+        with self._lock:
+            per_encoding = {
+                encoding: {
+                    "bytes_in": self._bytes_in[encoding],
+                    "bytes_out": self._bytes_out.get(encoding, 0),
+                    "ratio": round(self._bytes_out.get(encoding, 0) / self._bytes_in[encoding], 4)
+                    if self._bytes_in[encoding] else 0.0,
+                }
+                for encoding in self._bytes_in
+            }
+        return {
+            "encodings": self.encodings,
+            "min_size": self.min_size,
+            "totals": per_encoding,
+        }
+
+
+def _compress_chunk(stream, body: bytes, more_body: bool) -> bytes:
+    """บีบอัด body หนึ่งก้อนของ response: ก้อนสุดท้ายจบ stream, ก้อนอื่น sync flush ให้ส่งได้ทันที"""
+    compressed = stream.compress(body)
+    if not more_body:
+        return compressed + stream.flush()
+    if body:
+        compressed += stream.sync_flush()
+    return compressed
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware บีบอัด response ที่เป็น text ตาม Accept-Encoding แบบ stream
+    ข้าม response ที่บีบอัดมาแล้ว (Content-Encoding), ไม่ใช่ 200, เป็น Range หรือเล็กกว่า min_size
+    body ทุกก้อนที่ยังไม่ใช่ก้อนสุดท้ายจะ sync flush ทันที ไม่ให้ compressor เก็บไว้จนจบ response
+    """
+
+    def __init__(self, app, compressor: ResponseCompressor):
+        self.app = app
+        self.compressor = compressor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self.compressor.negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        compressor = self.compressor
+        # start message จะถูกเก็บไว้จนเห็น body ก้อนแรก (ตัดสินใจจากขนาดได้)
+        state = {"start": None, "stream": None, "size_in": 0, "size_out": 0}
+
+        async def send_wrapper(message):
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                content_length = headers.get("content-length")
+                eligible = (
+                    message["status"] == 200
+                    and "content-encoding" not in headers
+                    and "content-range" not in headers
+                    and is_compressible(headers.get("content-type"))
+                    and (content_length is None or int(content_length) >= compressor.min_size)
+                )
+                if eligible:
+                    state["start"] = message
+                    return
+                await send(message)
+                return
+
+            start = state["start"]
+            if start is None:
+                await send(message)
+                return
+
+            if message_type != "http.response.body":
+                # เช่น http.response.pathsend: ส่งแบบไม่บีบอัด
+                state["start"] = None
+                await send(start)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            stream = state["stream"]
+            if stream is None:
+                if not more_body and len(body) < compressor.min_size:
+                    state["start"] = None
+                    await send(start)
+                    await send(message)
+                    return
+                stream = state["stream"] = compressor.compressobj(encoding)
+                headers = MutableHeaders(raw=list(start["headers"]))
+                start["headers"] = headers.raw
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["etag"] = encoded_etag(headers["etag"], encoding)
+                await send(start)
+
+            if len(body) >= THREADPOOL_THRESHOLD:
+                compressed = await run_in_threadpool(_compress_chunk, stream, body, more_body)
+            else:
+                compressed = _compress_chunk(stream, body, more_body)
+            state["size_in"] += len(body)
+            state["size_out"] += len(compressed)
+            if compressed or not more_body:
+                await send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            if not more_body:
+                compressor.record(encoding, state["size_in"], state["size_out"])
+
+        await self.app(scope, receive, send_wrapper)
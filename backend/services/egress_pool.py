@@ -0,0 +1,363 @@
+"""
+Egress Pool - กลุ่มของช่องทางออกไปยัง YouTube (proxy + cookies) หลายช่องทาง
+  - หมุนเวียนใช้งานต่อ request ตามคะแนนสุขภาพ (latency / อัตราความล้มเหลว)
+  - กักกัน (quarantine) ช่องทางที่ถูกบล็อกด้วย cool-down แบบ exponential
+  - จำกัดอัตรา request ต่อช่องทางด้วย token bucket (ใช้ร่วมกันทุก worker ได้ผ่าน shared state)
+"""
+
+from typing import Callable, List, Optional
+import os
+import threading
+import time
+
+import requests
+from youtube_transcript_api import YouTubeTranscriptApi
+from youtube_transcript_api._errors import IpBlocked, RequestBlocked, YouTubeRequestFailed
+from youtube_transcript_api.proxies import GenericProxyConfig
+
+from services.http_session import create_adapter, create_session
+from services.shared_state import SharedTokenBucket
+
+
+# ค่าเริ่มต้น
+DEFAULT_EGRESS_RATE = 2.0
+DEFAULT_EGRESS_BURST = 5
+DEFAULT_COOLDOWN_SECONDS = 30.0
+DEFAULT_MAX_COOLDOWN_SECONDS = 15 * 60.0
+DEFAULT_ACQUIRE_TIMEOUT_SECONDS = 10.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+# น้ำหนักของค่าล่าสุดใน EWMA
+EWMA_ALPHA = 0.2
+
+
+class EgressUnavailable(Exception):
+    """ไม่มีช่องทางออกที่ใช้งานได้ (ถูกกักกันทั้งหมด หรือรอ rate limit นานเกินไป)"""
+
+
+def is_block_error(error: Exception) -> bool:
+    """ตรวจสอบว่า error เกิดจาก YouTube บล็อกช่องทางนี้หรือไม่"""
+    if isinstance(error, (RequestBlocked, IpBlocked)):
+        return True
+    if isinstance(error, YouTubeRequestFailed):
+        message = str(error)
+        return "429" in message or "blocked" in message.lower()
+    return False
+
+
+class TokenBucket:
+    """Token bucket สำหรับจำกัดอัตรา request"""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: จำนวน token ที่เติมต่อวินาที (0 = ไม่จำกัด)
+            capacity: จำนวน token สูงสุด (burst)
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """ใช้ 1 token ถ้ามี (True = สำเร็จ)"""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def wait_time(self) -> float:
+        """เวลาที่ต้องรอจนมี token ถัดไป (วินาที)"""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            return max(0.0, (1 - self._tokens) / self.rate)
+
+
+class Egress:
+    """ช่องทางออกหนึ่งช่องทาง (proxy + cookie jar) พร้อมสถิติสุขภาพ"""
+
+    def __init__(
+        self,
+        name: str,
+        proxy_url: Optional[str] = None,
+        cookies: Optional[List[dict]] = None,
+        rate: float = DEFAULT_EGRESS_RATE,
+        burst: int = DEFAULT_EGRESS_BURST,
+        cooldown: float = DEFAULT_COOLDOWN_SECONDS,
+        max_cooldown: float = DEFAULT_MAX_COOLDOWN_SECONDS,
+        shared_state=None
+    ):
+        """
+        Args:
+            name: ชื่อสำหรับแสดงใน stats
+            proxy_url: URL ของ proxy (None = ต่อตรง)
+            cookies: cookies ในรูปแบบ [{"name": ..., "value": ...}]
+            rate: จำนวน request ต่อวินาทีสูงสุด
+            burst: จำนวน request ที่ยิงติดกันได้
+            cooldown: ระยะกักกันครั้งแรกเมื่อถูกบล็อก (วินาที)
+            max_cooldown: ระยะกักกันสูงสุด
+            shared_state: ถ้ากำหนด rate limit จะนับร่วมกับ worker อื่น (ดู services.shared_state)
+        """
+        self.name = name
+        self.proxy_url = proxy_url
+        self.cookies = cookies or []
+        if shared_state is not None:
+            self.bucket = SharedTokenBucket(shared_state, f"egress:{name}", rate, burst)
+        else:
+            self.bucket = TokenBucket(rate, burst)
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+
+        self.successes = 0
+        self.failures = 0
+        self.blocks = 0
+        self.consecutive_blocks = 0
+        self.latency_ewma = 0.0
+        self.failure_ewma = 0.0
+        self.quarantined_until = 0.0
+        self.last_used = 0.0
+        self._lock = threading.Lock()
+        # YouTubeTranscriptApi / requests.Session ไม่ thread-safe จึงสร้างแยกต่อ thread
+        # แต่ทุก session ของช่องทางนี้ใช้ adapter (connection pool แบบ keep-alive) ตัวเดียวกัน
+        # connection ไปยัง youtube.com จึงถูกใช้ซ้ำข้าม thread ไม่ต้อง TLS handshake ใหม่ทุก request
+        self.adapter = create_adapter()
+        self._proxy_config = None
+        if self.proxy_url:
+            self._proxy_config = GenericProxyConfig(http_url=self.proxy_url, https_url=self.proxy_url)
+        self._local = threading.local()
+
+    @property
+    def api(self) -> YouTubeTranscriptApi:
+        """YouTubeTranscriptApi ของช่องทางนี้สำหรับ thread ปัจจุบัน"""
+        api = getattr(self._local, "api", None)
+        if api is None:
+            self._local.session = create_session(cookies=self.cookies, adapter=self.adapter)
+            api = self._local.api = YouTubeTranscriptApi(
+                proxy_config=self._proxy_config, http_client=self._local.session
+            )
+        return api
+
+    @property
+    def session(self) -> requests.Session:
+        """requests.Session ของช่องทางนี้สำหรับ thread ปัจจุบัน"""
+        self.api
+        return self._local.session
+
+    def is_available(self, now: float) -> bool:
+        """ใช้งานได้หรือไม่ (ไม่ได้ถูกกักกัน)"""
+        return now >= self.quarantined_until
+
+    def score(self) -> float:
+        """คะแนนสุขภาพ (ต่ำ = ดี) จาก latency เฉลี่ยและอัตราความล้มเหลวล่าสุด"""
+        return self.latency_ewma * (1 + 4 * self.failure_ewma) + self.failure_ewma
+
+    def record_success(self, latency: float):
+        """บันทึกการเรียกที่สำเร็จ"""
+        with self._lock:
+            self.successes += 1
+            self.consecutive_blocks = 0
+            self.latency_ewma = latency if self.latency_ewma == 0 else (
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * self.latency_ewma
+            )
+            self.failure_ewma *= (1 - EWMA_ALPHA)
+
+    def record_failure(self, blocked: bool):
+        """บันทึกการเรียกที่ล้มเหลว ถ้าถูกบล็อกจะกักกันด้วย cool-down แบบ exponential"""
+        with self._lock:
+            self.failures += 1
+            self.failure_ewma = EWMA_ALPHA + (1 - EWMA_ALPHA) * self.failure_ewma
+            if blocked:
+                self.blocks += 1
+                cooldown = min(self.max_cooldown, self.base_cooldown * (2 ** self.consecutive_blocks))
+                self.consecutive_blocks += 1
+                self.quarantined_until = time.time() + cooldown
+
+    def stats(self) -> dict:
+        """สถิติของช่องทาง"""
+        now = time.time()
+        return {
+            "name": self.name,
+            "proxy": bool(self.proxy_url),
+            "cookies": len(self.cookies),
+            "successes": self.successes,
+            "failures": self.failures,
+            "blocks": self.blocks,
+            "latency_ms": round(self.latency_ewma * 1000, 1),
+            "failure_rate": round(self.failure_ewma, 3),
+            "quarantined_for": round(max(0.0, self.quarantined_until - now), 1),
+            "connections": self.adapter.connection_stats.stats(),
+        }
+
+
+class EgressPool:
+    """กลุ่มของ Egress ที่เลือกใช้ตามคะแนนสุขภาพและ rate limit"""
+
+    def __init__(
+        self,
+        egresses: List[Egress],
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT_SECONDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS
+    ):
+        """
+        Args:
+            egresses: รายการช่องทางออก (อย่างน้อย 1)
+            acquire_timeout: เวลารอสูงสุดเมื่อทุกช่องทางติด rate limit (วินาที)
+            max_attempts: จำนวนช่องทางที่ลองสูงสุดต่อ request เมื่อถูกบล็อก
+        """
+        if not egresses:
+            raise ValueError("ต้องมี egress อย่างน้อย 1 ช่องทาง")
+        self.egresses = egresses
+        self.acquire_timeout = acquire_timeout
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, parse_cookies: Callable[[str], List[dict]], shared_state=None) -> "EgressPool":
+        """
+        สร้าง pool จาก environment variables
+          - YOUTUBE_PROXIES: proxy URLs คั่นด้วย comma (ใช้ "direct" แทนการต่อตรง)
+          - YOUTUBE_COOKIES_POOL: cookie strings หลายชุดคั่นด้วย "||"
+            (ถ้าไม่กำหนดจะใช้ YOUTUBE_COOKIES ชุดเดียวกับทุกช่องทาง)
+          - EGRESS_RATE, EGRESS_BURST, EGRESS_COOLDOWN, EGRESS_MAX_COOLDOWN,
+            EGRESS_ACQUIRE_TIMEOUT, EGRESS_MAX_ATTEMPTS
+
+        จำนวนช่องทาง = max(จำนวน proxy, จำนวนชุด cookies) โดยจับคู่วนซ้ำกัน
+
+        Args:
+            parse_cookies: ฟังก์ชันแปลง cookie string เป็น list ของ dict
+            shared_state: shared state สำหรับ rate limit ข้าม worker (None = แยกต่อ process)
+        """
+        proxies = [p.strip() for p in os.getenv("YOUTUBE_PROXIES", "").split(",") if p.strip()]
+        proxies = [None if p.lower() == "direct" else p for p in proxies] or [None]
+
+        cookie_strings = [c for c in os.getenv("YOUTUBE_COOKIES_POOL", "").split("||") if c.strip()]
+        if not cookie_strings and os.getenv("YOUTUBE_COOKIES"):
+            cookie_strings = [os.getenv("YOUTUBE_COOKIES")]
+        cookie_sets = [parse_cookies(c) for c in cookie_strings] or [[]]
+
+        rate = float(os.getenv("EGRESS_RATE", DEFAULT_EGRESS_RATE))
+        burst = int(os.getenv("EGRESS_BURST", DEFAULT_EGRESS_BURST))
+        cooldown = float(os.getenv("EGRESS_COOLDOWN", DEFAULT_COOLDOWN_SECONDS))
+        max_cooldown = float(os.getenv("EGRESS_MAX_COOLDOWN", DEFAULT_MAX_COOLDOWN_SECONDS))
+
+        count = max(len(proxies), len(cookie_sets))
+        egresses = [
+            Egress(
+                name=f"egress-{i}",
+                proxy_url=proxies[i % len(proxies)],
+                cookies=cookie_sets[i % len(cookie_sets)],
+                rate=rate,
+                burst=burst,
+                cooldown=cooldown,
+                max_cooldown=max_cooldown,
+                shared_state=shared_state
+            )
+            for i in range(count)
+        ]
+        return cls(
+            egresses,
+            acquire_timeout=float(os.getenv("EGRESS_ACQUIRE_TIMEOUT", DEFAULT_ACQUIRE_TIMEOUT_SECONDS)),
+            max_attempts=int(os.getenv("EGRESS_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+        )
+
+    def acquire(self, exclude: Optional[set] = None, prefer: Optional[str] = None) -> Egress:
+        """
+        เลือกช่องทางที่คะแนนดีที่สุดที่ไม่ถูกกักกันและยังมี token (รอได้ไม่เกิน acquire_timeout)
+
+        Args:
+            exclude: ชื่อช่องทางที่ไม่ต้องการ (เช่น ช่องทางที่เพิ่งถูกบล็อกใน request นี้)
+            prefer: ชื่อช่องทางที่ลองก่อนถ้าใช้ได้และมี token (เช่น ช่องทางที่ list transcript มา)
+
+        Returns:
+            Egress ที่เลือก
+
+        Raises:
+            EgressUnavailable: ถ้าทุกช่องทางถูกกักกัน หรือรอ rate limit นานเกินไป
+        """
+        exclude = exclude or set()
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            now = time.time()
+            with self._lock:
+                candidates = [
+                    e for e in self.egresses
+                    if e.name not in exclude and e.is_available(now)
+                ]
+                if not candidates:
+                    raise EgressUnavailable(
+                        "ทุกช่องทางไปยัง YouTube ถูกบล็อกชั่วคราว กรุณาลองใหม่ในภายหลัง"
+                    )
+                # ช่องทางที่ระบุก่อน แล้วคะแนนดีที่สุด ถ้าเท่ากันใช้ช่องทางที่ไม่ได้ใช้นานที่สุด (หมุนเวียน)
+                candidates.sort(key=lambda e: (e.name != prefer, round(e.score(), 3), e.last_used))
+                for egress in candidates:
+                    if egress.bucket.try_acquire():
+                        egress.last_used = time.monotonic()
+                        return egress
+                wait = min(e.bucket.wait_time() for e in candidates)
+
+            if time.monotonic() + wait > deadline:
+                raise EgressUnavailable("จำนวน request ไปยัง YouTube เกินกำหนด กรุณาลองใหม่อีกครั้ง")
+            time.sleep(max(wait, 0.01))
+
+    def call(self, fn: Callable[[Egress], object], prefer: Optional[str] = None):
+        """
+        เรียก fn(egress) ผ่านช่องทางที่เลือก ถ้าถูกบล็อกจะกักกันช่องทางนั้นและลองช่องทางถัดไป
+        fn ต้องส่ง request ผ่าน egress.api / egress.session เท่านั้น
+        (rate limit และสถิติสุขภาพจึงถูกนับกับช่องทางที่ใช้จริง)
+
+        Args:
+            fn: ฟังก์ชันที่รับ Egress
+            prefer: ชื่อช่องทางที่ลองก่อน (ดู acquire)
+
+        Returns:
+            ผลลัพธ์ของ fn
+        """
+        tried = set()
+        attempts = min(self.max_attempts, len(self.egresses))
+        last_error = None
+        while True:
+            try:
+                egress = self.acquire(exclude=tried, prefer=prefer)
+            except EgressUnavailable:
+                # ไม่มีช่องทางอื่นให้ลองแล้ว ให้รายงาน error จริงที่ได้จาก YouTube
+                if last_error is not None:
+                    raise last_error
+                raise
+            tried.add(egress.name)
+            started = time.perf_counter()
+            try:
+                result = fn(egress)
+            except Exception as e:
+                if is_block_error(e):
+                    egress.record_failure(blocked=True)
+                    if len(tried) < attempts:
+                        last_error = e
+                        continue
+                elif isinstance(e, (YouTubeRequestFailed, requests.RequestException)):
+                    egress.record_failure(blocked=False)
+                else:
+                    # error ของ video เอง (เช่น ไม่มี transcript) ไม่ใช่ความผิดของช่องทาง
+                    egress.record_success(time.perf_counter() - started)
+                raise
+            egress.record_success(time.perf_counter() - started)
+            return result
+
+    def stats(self) -> dict:
+        """สถิติของทุกช่องทาง"""
+        now = time.time()
+        return {
+            "size": len(self.egresses),
+            "available": sum(1 for e in self.egresses if e.is_available(now)),
+            "egresses": [e.stats() for e in self.egresses],
+        }
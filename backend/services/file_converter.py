@@ -1,27 +1,312 @@
 """
 File Converter Service - บริการสำหรับแปลง transcript เป็นไฟล์ต่างๆ
-รองรับ: TXT, PDF, DOCX
+รองรับ: TXT, PDF, DOCX, JSON, NDJSON, SRT, WebVTT
 """
 
+import functools
+import io
+import json
 import os
-import tempfile
+import re
+import zipfile
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from xml.sax.saxutils import escape as xml_escape
+from reportlab.lib.colors import HexColor
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfbase.ttfonts import TTFont
 from docx import Document
-from docx.shared import Pt, Inches
+from docx.shared import Pt, Inches, RGBColor
+from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 
+from services.artifact_store import ArtifactStore
+from services.compact_transcript import CompactTranscript, snippet_rows
+from services.metrics import CONVERSION_SECONDS
+
+
+# ขนาดโดยประมาณของแต่ละ chunk ที่ stream ออกไป (characters)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# จำนวน cue ที่จัดรูปแบบ timestamp พร้อมกันหนึ่งรอบ (SRT / WebVTT)
+SUBTITLE_BATCH = 4096
+
+# ตารางส่วน "SS" และ "mmm" ของ timestamp ที่สร้างไว้ล่วงหน้า (ใช้แทนการ format ทีละค่า)
+_TIMESTAMP_SECONDS = tuple(f"{value:02d}" for value in range(60))
+_TIMESTAMP_MILLIS = tuple(f"{value:03d}" for value in range(1000))
+_encode_json_string = json.encoder.encode_basestring
+_BLANK_LINES = re.compile(r"\n\s*\n")
+
+# PDF layout ที่รองรับ และระยะขอบกระดาษ (points)
+PDF_LAYOUTS = {"flow", "fast"}
+PDF_MARGINS = {'left': 72, 'right': 72, 'top': 72, 'bottom': 18}
+
+# สีของ fast layout (แปลงจาก hex ครั้งเดียว)
+PDF_COLORS = {
+    'title': HexColor('#333333'),
+    'heading': HexColor('#666666'),
+    'body': HexColor('#000000'),
+    'timestamp': HexColor('#888888'),
+}
+
+
+def resolve_pdf_layout(layout: Optional[str] = None) -> str:
+    """
+    เลือก PDF layout จากค่าที่ระบุ หรือจาก environment variable PDF_LAYOUT
+    
+    Args:
+        layout: "flow" หรือ "fast" (None = ใช้ค่าจาก PDF_LAYOUT, default "flow")
+    
+    Returns:
+        ชื่อ layout ที่ใช้
+    """
+    layout = (layout or os.getenv("PDF_LAYOUT", "flow")).lower()
+    if layout not in PDF_LAYOUTS:
+        raise ValueError(f"PDF layout ไม่รองรับ: {layout}")
+    return layout
+
+
+@lru_cache(maxsize=1)
+def _pdf_styles() -> dict:
+    """สร้าง paragraph styles ของ PDF ครั้งเดียวแล้วใช้ซ้ำทุก request"""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor='#333333',
+            spaceAfter=12
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor='#666666',
+            spaceAfter=6
+        ),
+        'body': ParagraphStyle(
+            'CustomBody',
+            parent=styles['Normal'],
+            fontSize=10,
+            textColor='#000000',
+            spaceAfter=12,
+            leading=14
+        ),
+        'timestamp': ParagraphStyle(
+            'Timestamp',
+            parent=styles['Normal'],
+            fontSize=9,
+            textColor='#888888',
+            spaceAfter=4
+        ),
+    }
+
+
+# ตัวอักษรที่ไม่อนุญาตใน XML 1.0 (control characters)
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# จำนวน paragraph ที่รวมเป็น chunk ก่อนเขียนลง document.xml
+DOCX_WRITE_BATCH = 2000
+
+
+@lru_cache(maxsize=1)
+def _docx_template() -> Tuple[List[Tuple[zipfile.ZipInfo, bytes]], str, str, Dict[str, str]]:
+    """
+    สร้าง template DOCX ครั้งเดียว (styles ถูกกำหนดไว้ล่วงหน้า) แล้วแยกเป็นส่วนๆ
+    เพื่อให้แต่ละ request เขียนเฉพาะ document.xml ใหม่
+    
+    Returns:
+        (parts ของ package, XML ส่วนต้นจนถึงหัวเรื่อง, XML ส่วนท้าย, style IDs)
+    """
+    doc = Document()
+    
+    timestamp_style = doc.styles.add_style('Timestamp', WD_STYLE_TYPE.PARAGRAPH)
+    timestamp_style.base_style = doc.styles['Normal']
+    timestamp_style.font.size = Pt(9)
+    timestamp_style.font.color.rgb = RGBColor(0x88, 0x88, 0x88)
+    
+    body_style = doc.styles.add_style('Transcript Body', WD_STYLE_TYPE.PARAGRAPH)
+    body_style.base_style = doc.styles['Normal']
+    body_style.font.size = Pt(11)
+    
+    # Header (เหมือนกันทุกไฟล์)
+    title = doc.add_heading('YouTube Transcript', 0)
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as package:
+        parts = [(info, package.read(info.filename)) for info in package.infolist()]
+    
+    document_xml = dict((info.filename, data) for info, data in parts)['word/document.xml'].decode('utf-8')
+    split_at = document_xml.rindex('<w:sectPr')
+    prefix, suffix = document_xml[:split_at], document_xml[split_at:]
+    style_ids = {'timestamp': timestamp_style.style_id, 'body': body_style.style_id}
+    return parts, prefix, suffix, style_ids
+
+
+def _docx_paragraph(text: str, style_id: Optional[str] = None) -> str:
+    """สร้าง XML ของ paragraph หนึ่งย่อหน้า (ขึ้นบรรทัดใหม่ภายใน text เป็น <w:br/>)"""
+    if not text:
+        return '<w:p/>' if style_id is None else f'<w:p><w:pPr><w:pStyle w:val="{style_id}"/></w:pPr></w:p>'
+    body = xml_escape(_INVALID_XML_CHARS.sub('', text)).replace(
+        '\n', '</w:t><w:br/><w:t xml:space="preserve">'
+    )
+    properties = '' if style_id is None else f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>'
+    return f'<w:p>{properties}<w:r><w:t xml:space="preserve">{body}</w:t></w:r></w:p>'
+
+
+def _timed(file_format: str):
+    """decorator บันทึกเวลาแปลงไฟล์ลง metrics (transcript_conversion_duration_seconds)"""
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with CONVERSION_SECONDS.time(format=file_format):
+                return method(*args, **kwargs)
+        return wrapper
+    return decorator
+
 
 class FileConverter:
     """Service สำหรับแปลง transcript เป็นไฟล์ต่างๆ"""
     
-    def __init__(self):
-        self.temp_dir = tempfile.gettempdir()
+    def __init__(self, artifact_store: Optional[ArtifactStore] = None):
+        # ไฟล์ที่สร้างทั้งหมดอยู่ใน artifact store ซึ่งจัดการการลบให้
+        self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore()
+        self.temp_dir = self.artifact_store.directory
+    
+    def iter_txt(
+        self,
+        transcript,
+        include_timestamps: bool = True,
+        chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[str]:
+        """
+        แปลง transcript เป็นข้อความ TXT แบบ stream (yield ทีละ chunk ไม่ใช้ไฟล์)
+        
+        Args:
+            transcript: FetchedTranscript object
+            include_timestamps: รวม timestamps หรือไม่
+            chunk_size: ขนาดโดยประมาณของแต่ละ chunk (characters)
+        
+        Yields:
+            ข้อความ TXT ทีละ chunk
+        """
+        # header
+        header = (
+            f"YouTube Transcript\n"
+            f"{'=' * 60}\n"
+            f"Video ID: {transcript.video_id}\n"
+            f"Language: {transcript.language} ({transcript.language_code})\n"
+            f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}\n"
+            f"{'=' * 60}\n\n"
+        )
+        
+        # เนื้อหา
+        def lines():
+            yield header
+            for text, start, duration in snippet_rows(transcript):
+                if include_timestamps:
+                    start_time = self._format_timestamp(start)
+                    end_time = self._format_timestamp(start + duration)
+                    yield f"[{start_time} - {end_time}]\n{text}\n\n"
+                else:
+                    yield f"{text}\n\n"
+        
+        return _chunked(lines(), chunk_size)
+    
+    def iter_json(self, transcript, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+        """
+        แปลง transcript เป็น JSON document แบบ stream
+        
+        Args:
+            transcript: FetchedTranscript object
+            chunk_size: ขนาดโดยประมาณของแต่ละ chunk (characters)
+        
+        Yields:
+            JSON ทีละ chunk (รวมกันแล้วเป็น JSON object ที่ถูกต้อง)
+        """
+        def parts():
+            metadata = json.dumps({
+                "video_id": transcript.video_id,
+                "language": transcript.language,
+                "language_code": transcript.language_code,
+                "is_generated": transcript.is_generated,
+            }, ensure_ascii=False)
+            # เปิด object โดยตัด "}" ท้าย metadata แล้วต่อด้วย snippets array
+            yield metadata[:-1] + ', "snippets": ['
+            separator = ""
+            for text, start, duration in snippet_rows(transcript):
+                yield separator + _json_snippet(text, start, duration)
+                separator = ", "
+            yield "]}"
+        
+        return _chunked(parts(), chunk_size)
+    
+    def iter_ndjson(self, transcript, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+        """
+        แปลง transcript เป็น NDJSON แบบ stream (หนึ่ง snippet ต่อบรรทัด)
+        
+        Args:
+            transcript: FetchedTranscript object
+            chunk_size: ขนาดโดยประมาณของแต่ละ chunk (characters)
+        
+        Yields:
+            NDJSON ทีละ chunk
+        """
+        lines = (
+            _json_snippet(text, start, duration) + "\n"
+            for text, start, duration in snippet_rows(transcript)
+        )
+        return _chunked(lines, chunk_size)
+    
+    def iter_srt(self, transcript, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+        """
+        แปลง transcript เป็นไฟล์ซับไตเติล SRT แบบ stream (timestamp ละเอียดระดับ millisecond)
+        
+        Args:
+            transcript: FetchedTranscript object
+            chunk_size: ขนาดโดยประมาณของแต่ละ chunk (characters)
+        
+        Yields:
+            SRT ทีละ chunk
+        """
+        def cues():
+            for index, (text, start, end) in enumerate(_subtitle_cues(transcript, ","), 1):
+                yield f"{index}\n{start} --> {end}\n{text}\n\n"
+        
+        return _chunked(cues(), chunk_size)
+    
+    def iter_vtt(self, transcript, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[str]:
+        """
+        แปลง transcript เป็นไฟล์ซับไตเติล WebVTT แบบ stream
+        
+        Args:
+            transcript: FetchedTranscript object
+            chunk_size: ขนาดโดยประมาณของแต่ละ chunk (characters)
+        
+        Yields:
+            WebVTT ทีละ chunk
+        """
+        def cues():
+            yield f"WEBVTT\nKind: captions\nLanguage: {transcript.language_code}\n\n"
+            for text, start, end in _subtitle_cues(transcript, "."):
+                # cue text ของ WebVTT ห้ามมี "<", "&" และ "-->" ตรงๆ
+                if "<" in text or "&" in text or ">" in text:
+                    text = xml_escape(text)
+                yield f"{start} --> {end}\n{text}\n\n"
+        
+        return _chunked(cues(), chunk_size)
     
+    @_timed("txt")
     def to_txt(self, transcript, include_timestamps: bool = True) -> str:
         """
         แปลง transcript เป็นไฟล์ TXT
@@ -33,97 +318,54 @@ class FileConverter:
         Returns:
             Path ของไฟล์ที่สร้าง
         """
-        temp_file = tempfile.NamedTemporaryFile(
-            mode='w',
-            suffix='.txt',
-            delete=False,
-            encoding='utf-8'
-        )
+        file_path = self.artifact_store.create('.txt')
         
         try:
-            # เขียน header
-            temp_file.write(f"YouTube Transcript\n")
-            temp_file.write(f"{'=' * 60}\n")
-            temp_file.write(f"Video ID: {transcript.video_id}\n")
-            temp_file.write(f"Language: {transcript.language} ({transcript.language_code})\n")
-            temp_file.write(f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}\n")
-            temp_file.write(f"{'=' * 60}\n\n")
-            
-            # เขียนเนื้อหา
-            for snippet in transcript:
-                if include_timestamps:
-                    start_time = self._format_timestamp(snippet.start)
-                    end_time = self._format_timestamp(snippet.start + snippet.duration)
-                    temp_file.write(f"[{start_time} - {end_time}]\n")
-                temp_file.write(f"{snippet.text}\n\n")
-            
-            temp_file.close()
-            return temp_file.name
+            with open(file_path, 'w', encoding='utf-8') as f:
+                for chunk in self.iter_txt(transcript, include_timestamps):
+                    f.write(chunk)
+            return file_path
         
         except Exception as e:
-            temp_file.close()
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+            self.artifact_store.release(file_path)
             raise Exception(f"ไม่สามารถสร้างไฟล์ TXT ได้: {str(e)}")
     
-    def to_pdf(self, transcript, include_timestamps: bool = True) -> str:
+    @_timed("pdf")
+    def to_pdf(self, transcript, include_timestamps: bool = True, layout: Optional[str] = None) -> str:
         """
         แปลง transcript เป็นไฟล์ PDF
         
         Args:
             transcript: FetchedTranscript object
             include_timestamps: รวม timestamps หรือไม่
+            layout: "flow" (platypus, default) หรือ "fast" (วาดบน canvas โดยตรง
+                เหมาะกับ transcript ยาวมาก) ถ้าไม่ระบุจะใช้ค่าจาก PDF_LAYOUT
         
         Returns:
             Path ของไฟล์ที่สร้าง
         """
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix='.pdf',
-            delete=False
-        )
-        temp_file.close()
+        layout = resolve_pdf_layout(layout)
+        file_path = self.artifact_store.create('.pdf')
         
         try:
+            if layout == "fast":
+                self._build_pdf_fast(file_path, transcript, include_timestamps)
+                return file_path
+            
             doc = SimpleDocTemplate(
-                temp_file.name,
+                file_path,
                 pagesize=A4,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
+                rightMargin=PDF_MARGINS['right'],
+                leftMargin=PDF_MARGINS['left'],
+                topMargin=PDF_MARGINS['top'],
+                bottomMargin=PDF_MARGINS['bottom']
             )
             
-            # สร้าง styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                textColor='#333333',
-                spaceAfter=12
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=12,
-                textColor='#666666',
-                spaceAfter=6
-            )
-            body_style = ParagraphStyle(
-                'CustomBody',
-                parent=styles['Normal'],
-                fontSize=10,
-                textColor='#000000',
-                spaceAfter=12,
-                leading=14
-            )
-            timestamp_style = ParagraphStyle(
-                'Timestamp',
-                parent=styles['Normal'],
-                fontSize=9,
-                textColor='#888888',
-                spaceAfter=4
-            )
+            styles = _pdf_styles()
+            title_style = styles['title']
+            heading_style = styles['heading']
+            body_style = styles['body']
+            timestamp_style = styles['timestamp']
             
             story = []
             
@@ -144,28 +386,90 @@ class FileConverter:
             story.append(Spacer(1, 0.3 * inch))
             
             # Content
-            for snippet in transcript:
+            for text, start, duration in snippet_rows(transcript):
                 if include_timestamps:
-                    start_time = self._format_timestamp(snippet.start)
-                    end_time = self._format_timestamp(snippet.start + snippet.duration)
+                    start_time = self._format_timestamp(start)
+                    end_time = self._format_timestamp(start + duration)
                     story.append(Paragraph(
                         f"[{start_time} - {end_time}]",
                         timestamp_style
                     ))
                 
                 # Escape HTML characters และแปลงเป็น paragraph
-                text = snippet.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                text = text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
                 story.append(Paragraph(text, body_style))
                 story.append(Spacer(1, 0.1 * inch))
             
             doc.build(story)
-            return temp_file.name
+            return file_path
         
         except Exception as e:
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+            self.artifact_store.release(file_path)
             raise Exception(f"ไม่สามารถสร้างไฟล์ PDF ได้: {str(e)}")
     
+    def _build_pdf_fast(self, file_path: str, transcript, include_timestamps: bool):
+        """
+        สร้าง PDF โดยวาดข้อความบน canvas โดยตรง (ไม่สร้าง flowable ต่อ snippet)
+        ตัดบรรทัดล่วงหน้าด้วย simpleSplit และใช้ text object เดียวต่อหน้า
+        """
+        page_width, page_height = A4
+        left = PDF_MARGINS['left']
+        top_y = page_height - PDF_MARGINS['top']
+        bottom_y = PDF_MARGINS['bottom']
+        max_width = page_width - PDF_MARGINS['left'] - PDF_MARGINS['right']
+        
+        pdf = canvas.Canvas(file_path, pagesize=A4)
+        state = {'y': top_y, 'text': pdf.beginText(), 'font': None, 'color': None}
+        
+        def new_page():
+            pdf.drawText(state['text'])
+            pdf.showPage()
+            state.update(y=top_y, text=pdf.beginText(), font=None, color=None)
+        
+        def draw_line(line: str, font: str, size: float, color, leading: float):
+            if state['y'] - leading < bottom_y:
+                new_page()
+            state['y'] -= leading
+            text = state['text']
+            if state['font'] != (font, size):
+                text.setFont(font, size)
+                state['font'] = (font, size)
+            if state['color'] != color:
+                text.setFillColor(color)
+                state['color'] = color
+            text.setTextOrigin(left, state['y'])
+            text.textOut(line)
+        
+        # Header
+        draw_line("YouTube Transcript", 'Helvetica-Bold', 16, PDF_COLORS['title'], 19.2)
+        state['y'] -= 12 + 0.2 * inch
+        
+        # Metadata
+        for line in (
+            f"Video ID: {transcript.video_id}",
+            f"Language: {transcript.language} ({transcript.language_code})",
+            f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}",
+        ):
+            draw_line(line, 'Helvetica-Bold', 12, PDF_COLORS['heading'], 14.4)
+            state['y'] -= 6
+        state['y'] -= 0.3 * inch
+        
+        # Content
+        body_gap = 12 + 0.1 * inch
+        for text, start, duration in snippet_rows(transcript):
+            if include_timestamps:
+                start_time = self._format_timestamp(start)
+                end_time = self._format_timestamp(start + duration)
+                draw_line(f"[{start_time} - {end_time}]", 'Helvetica', 9, PDF_COLORS['timestamp'], 10.8)
+                state['y'] -= 4
+            for line in simpleSplit(text, 'Helvetica', 10, max_width) or [""]:
+                draw_line(line, 'Helvetica', 10, PDF_COLORS['body'], 14)
+            state['y'] -= body_gap
+        
+        pdf.drawText(state['text'])
+        pdf.save()
+    
+    @_timed("docx")
     def to_docx(self, transcript, include_timestamps: bool = True) -> str:
         """
         แปลง transcript เป็นไฟล์ DOCX
@@ -177,44 +481,49 @@ class FileConverter:
         Returns:
             Path ของไฟล์ที่สร้าง
         """
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix='.docx',
-            delete=False
-        )
-        temp_file.close()
+        file_path = self.artifact_store.create('.docx')
         
         try:
-            doc = Document()
-            
-            # Header
-            title = doc.add_heading('YouTube Transcript', 0)
-            title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-            
-            # Metadata
-            doc.add_paragraph(f"Video ID: {transcript.video_id}")
-            doc.add_paragraph(f"Language: {transcript.language} ({transcript.language_code})")
-            doc.add_paragraph(f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}")
-            doc.add_paragraph("")  # Empty line
+            parts, prefix, suffix, style_ids = _docx_template()
+            timestamp_style = style_ids['timestamp']
+            body_style = style_ids['body']
             
-            # Content
-            for snippet in transcript:
-                if include_timestamps:
-                    start_time = self._format_timestamp(snippet.start)
-                    end_time = self._format_timestamp(snippet.start + snippet.duration)
-                    timestamp_para = doc.add_paragraph(f"[{start_time} - {end_time}]")
-                    timestamp_para.style.font.size = Pt(9)
-                    timestamp_para.style.font.color.rgb = None  # Gray color
+            def paragraphs():
+                # Metadata
+                yield _docx_paragraph(f"Video ID: {transcript.video_id}")
+                yield _docx_paragraph(f"Language: {transcript.language} ({transcript.language_code})")
+                yield _docx_paragraph(f"Auto-generated: {'Yes' if transcript.is_generated else 'No'}")
+                yield _docx_paragraph("")  # Empty line
                 
-                text_para = doc.add_paragraph(snippet.text)
-                text_para.style.font.size = Pt(11)
-                doc.add_paragraph("")  # Empty line between snippets
+                # Content
+                for text, start, duration in snippet_rows(transcript):
+                    if include_timestamps:
+                        start_time = self._format_timestamp(start)
+                        end_time = self._format_timestamp(start + duration)
+                        yield _docx_paragraph(f"[{start_time} - {end_time}]", timestamp_style)
+                    yield _docx_paragraph(text, body_style)
+                    yield '<w:p/>'  # Empty line between snippets
             
-            doc.save(temp_file.name)
-            return temp_file.name
+            # เขียน package ใหม่จาก template โดยแทนที่เฉพาะ document.xml
+            with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+                for info, data in parts:
+                    if info.filename != 'word/document.xml':
+                        package.writestr(info, data)
+                        continue
+                    with package.open('word/document.xml', 'w') as document:
+                        document.write(prefix.encode('utf-8'))
+                        batch = []
+                        for paragraph in paragraphs():
+                            batch.append(paragraph)
+                            if len(batch) >= DOCX_WRITE_BATCH:
+                                document.write(''.join(batch).encode('utf-8'))
+                                batch = []
+                        document.write(''.join(batch).encode('utf-8'))
+                        document.write(suffix.encode('utf-8'))
+            return file_path
         
         except Exception as e:
-            if os.path.exists(temp_file.name):
-                os.unlink(temp_file.name)
+            self.artifact_store.release(file_path)
             raise Exception(f"ไม่สามารถสร้างไฟล์ DOCX ได้: {str(e)}")
     
     def _format_timestamp(self, seconds: float) -> str:
@@ -236,3 +545,84 @@ class FileConverter:
         else:
             return f"{minutes:02d}:{secs:02d}"
 
+
+def _json_snippet(text: str, start: float, duration: float) -> str:
+    """
+    snippet หนึ่งตัวเป็น JSON object (ผลเหมือน json.dumps(..., ensure_ascii=False) ทุกตัวอักษร)
+    แต่ไม่ต้องสร้าง dict และผ่าน encoder ทั่วไปต่อ snippet
+    """
+    return f'{{"text": {_encode_json_string(text)}, "start": {start!r}, "duration": {duration!r}}}'
+
+
+def format_cue_timestamps(milliseconds: Sequence[int], separator: str = ",") -> List[str]:
+    """
+    แปลงเวลา (millisecond) หลายค่าเป็น timestamp ของซับไตเติลในรอบเดียว (HH:MM:SS,mmm)
+    ใช้ตาราง prefix ต่อนาทีและตารางวินาที/millisecond แทนการหาร float และ format ทีละค่า
+    
+    Args:
+        milliseconds: เวลาเป็น millisecond (ต้องไม่ติดลบ)
+        separator: ตัวคั่นวินาทีกับ millisecond ("," สำหรับ SRT, "." สำหรับ WebVTT)
+    
+    Returns:
+        รายการ timestamp เรียงตามลำดับเดิม
+    """
+    if not milliseconds:
+        return []
+    minutes = range(max(milliseconds) // 60000 + 1)
+    prefixes = [f"{minute // 60:02d}:{minute % 60:02d}:" for minute in minutes]
+    seconds = [value + separator for value in _TIMESTAMP_SECONDS]
+    millis = _TIMESTAMP_MILLIS
+    return [
+        prefixes[value // 60000] + seconds[value // 1000 % 60] + millis[value % 1000]
+        for value in milliseconds
+    ]
+
+
+def _subtitle_cues(transcript, separator: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    iterate (text, start, end) ของแต่ละ cue โดยจัดรูปแบบ timestamp ทีละ SUBTITLE_BATCH cue
+    จาก array start/duration ของ CompactTranscript โดยตรง (snippet ที่ไม่มีข้อความจะถูกข้าม)
+    """
+    if isinstance(transcript, CompactTranscript):
+        starts, durations = transcript.starts, transcript.durations
+        texts = (text for text, _, _ in transcript.rows())
+    else:
+        snippets = list(transcript)
+        starts = [snippet.start for snippet in snippets]
+        durations = [snippet.duration for snippet in snippets]
+        texts = (snippet.text for snippet in snippets)
+    
+    for begin in range(0, len(starts), SUBTITLE_BATCH):
+        batch_starts = starts[begin:begin + SUBTITLE_BATCH]
+        batch_durations = durations[begin:begin + SUBTITLE_BATCH]
+        start_ms = [round(start * 1000) for start in batch_starts]
+        end_ms = [round((start + duration) * 1000) for start, duration in zip(batch_starts, batch_durations)]
+        if min(start_ms) < 0 or min(end_ms) < 0:
+            start_ms = [max(value, 0) for value in start_ms]
+            end_ms = [max(value, 0) for value in end_ms]
+        rows = zip(
+            islice(texts, len(start_ms)),
+            format_cue_timestamps(start_ms, separator),
+            format_cue_timestamps(end_ms, separator)
+        )
+        for text, start, end in rows:
+            # บรรทัดว่างคือตัวจบ cue จึงต้องไม่มีในข้อความ
+            if "\n" in text:
+                text = _BLANK_LINES.sub("\n", text.strip())
+            if text and not text.isspace():
+                yield text, start, end
+
+
+def _chunked(parts: Iterator[str], chunk_size: int) -> Iterator[str]:
+    """รวม string ย่อยๆ เป็น chunk ขนาดประมาณ chunk_size เพื่อลดจำนวนครั้งที่ส่งข้อมูล"""
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer)
@@ -0,0 +1,169 @@
+"""
+HTTP Session - requests.Session สำหรับเรียก YouTube
+  - connection pool แบบ keep-alive (ไม่ต้อง TLS handshake ใหม่ทุก request)
+  - requests.Session ไม่ thread-safe (cookie jar / headers) จึงใช้ session แยกต่อ thread
+    แต่ session ทุกตัวของช่องทางเดียวกัน mount adapter ตัวเดียวกัน
+    (connection pool ของ urllib3 เป็น thread-safe) connection จึงยังใช้ซ้ำข้าม thread ได้
+  - ปรับขนาด pool และ timeout ได้
+  - นับจำนวน connection ที่สร้างใหม่เทียบกับจำนวน request (connection reuse)
+"""
+
+from typing import List, Optional
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+# ค่าเริ่มต้น
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 32
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_READ_TIMEOUT_SECONDS = 20.0
+
+
+class ConnectionStats:
+    """ตัวนับ request และ connection ใหม่ของ session หนึ่ง (thread-safe)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def add_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def add_connection(self):
+        with self._lock:
+            self.new_connections += 1
+
+    def stats(self) -> dict:
+        """สถิติการใช้ connection ซ้ำ"""
+        with self._lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused": reused,
+                "reuse_ratio": round(reused / self.requests, 4) if self.requests else 0.0,
+            }
+
+
+def _counting_pool_class(base):
+    """สร้าง connection pool class ที่นับทุกครั้งที่เปิด connection ใหม่"""
+
+    class CountingConnectionPool(base):
+        connection_stats: Optional[ConnectionStats] = None
+
+        def _new_conn(self):
+            if self.connection_stats is not None:
+                self.connection_stats.add_connection()
+            return super()._new_conn()
+
+    CountingConnectionPool.__name__ = f"Counting{base.__name__}"
+    return CountingConnectionPool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter ที่กำหนด timeout เริ่มต้นและเก็บสถิติ connection reuse"""
+
+    def __init__(self, connection_stats: ConnectionStats, timeout, **kwargs):
+        """
+        Args:
+            connection_stats: ตัวนับที่ใช้ร่วมกับ session
+            timeout: timeout เริ่มต้น (connect, read) เมื่อผู้เรียกไม่ได้ระบุ
+            **kwargs: ส่งต่อให้ HTTPAdapter (pool_connections, pool_maxsize, ...)
+        """
+        self.connection_stats = connection_stats
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self._install_pool_classes(self.poolmanager)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        self._install_pool_classes(manager)
+        return manager
+
+    def _install_pool_classes(self, manager):
+        http_pool = _counting_pool_class(HTTPConnectionPool)
+        https_pool = _counting_pool_class(HTTPSConnectionPool)
+        http_pool.connection_stats = self.connection_stats
+        https_pool.connection_stats = self.connection_stats
+        manager.pool_classes_by_scheme = {"http": http_pool, "https": https_pool}
+
+    def send(self, request, timeout=None, **kwargs):
+        self.connection_stats.add_request()
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def create_adapter(
+    pool_connections: Optional[int] = None,
+    pool_maxsize: Optional[int] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None
+) -> PooledHTTPAdapter:
+    """
+    สร้าง adapter แบบ keep-alive ที่ session หลายตัว (ต่าง thread) mount ร่วมกันได้
+
+    ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+    HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+    Args:
+        pool_connections: จำนวน host ที่เก็บ connection pool ไว้
+        pool_maxsize: จำนวน connection ที่เปิดค้างไว้สูงสุดต่อ host
+            (ควร >= TRANSCRIPT_FETCH_WORKERS เพื่อไม่ให้ connection ถูกปิดทิ้ง)
+        connect_timeout: timeout ตอนเชื่อมต่อ (วินาที)
+        read_timeout: timeout ตอนรอข้อมูล (วินาที)
+
+    Returns:
+        PooledHTTPAdapter ที่มี attribute connection_stats (ConnectionStats)
+    """
+    if pool_connections is None:
+        pool_connections = int(os.getenv("HTTP_POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS))
+    if pool_maxsize is None:
+        pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE))
+    if connect_timeout is None:
+        connect_timeout = float(os.getenv("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT_SECONDS))
+    if read_timeout is None:
+        read_timeout = float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT_SECONDS))
+
+    return PooledHTTPAdapter(
+        ConnectionStats(),
+        timeout=(connect_timeout, read_timeout),
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=0
+    )
+
+
+def create_session(
+    cookies: Optional[List[dict]] = None,
+    adapter: Optional[PooledHTTPAdapter] = None
+) -> requests.Session:
+    """
+    สร้าง requests.Session แบบ keep-alive (ใช้ใน thread เดียว)
+
+    Args:
+        cookies: cookies ในรูปแบบ [{"name": ..., "value": ...}]
+        adapter: adapter ที่ใช้ร่วมกับ session อื่น (None = สร้างใหม่จาก create_adapter())
+
+    Returns:
+        requests.Session ที่มี attribute connection_stats (ConnectionStats ของ adapter)
+    """
+    if adapter is None:
+        adapter = create_adapter()
+    session = requests.Session()
+    session.connection_stats = adapter.connection_stats
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    for cookie in cookies or []:
+        session.cookies.set(cookie["name"], cookie["value"], domain=".youtube.com")
+    return session
@@ -0,0 +1,422 @@
+"""
+Job Queue - คิวงานแปลงไฟล์แบบ background สำหรับ transcript ยาวๆ ที่ render นานเกิน timeout ของ proxy
+  - เก็บงานใน SQLite (งานไม่หายเมื่อ restart)
+  - worker ดึงงานแบบ atomic (UPDATE ... RETURNING) ทำพร้อมกันได้จำกัดจำนวน
+  - งานที่ค้างสถานะ running เกิน lease (process ตาย / restart) จะถูกดึงไปทำใหม่
+  - เก็บไฟล์ผลลัพธ์ไว้ให้ดาวน์โหลดตามอายุที่กำหนด
+"""
+
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Tuple
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+# ค่าเริ่มต้น
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-jobs.sqlite3")
+DEFAULT_RESULT_DIR = os.path.join(tempfile.gettempdir(), "yt-transcript-jobs")
+DEFAULT_CONCURRENCY = 2
+DEFAULT_MAX_QUEUED = 1000
+DEFAULT_RESULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL_SECONDS = 1.0
+CLEANUP_INTERVAL_SECONDS = 60
+
+JOB_COLUMNS = (
+    "id", "status", "stage", "progress", "params", "error", "status_code", "attempts",
+    "result_path", "filename", "media_type", "size_bytes",
+    "created_at", "started_at", "finished_at", "heartbeat_at"
+)
+
+# ฟังก์ชันรายงานความคืบหน้า: report(stage, progress 0..1)
+ProgressReporter = Callable[[str, float], Awaitable[None]]
+# handler ของงาน: รับ params และ reporter คืน (path ของไฟล์, filename, media type)
+JobHandler = Callable[[dict, ProgressReporter], Awaitable[Tuple[str, str, str]]]
+
+
+class JobQueueFull(Exception):
+    """งานรอในคิวเกินกำหนด (ควรตอบ 429 ให้ client ลองใหม่)"""
+
+
+class JobFailed(Exception):
+    """งานล้มเหลวแบบไม่ควรลองใหม่ (เช่น ไม่พบ transcript) พร้อม HTTP status code"""
+
+    def __init__(self, message: str, status_code: int = 500):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+
+class JobStore:
+    """ที่เก็บงานบน SQLite (ใช้ร่วมกันได้หลาย process ผ่าน WAL)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: path ของไฟล์ SQLite
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, stage TEXT NOT NULL, progress REAL NOT NULL, "
+            "params TEXT NOT NULL, error TEXT, status_code INTEGER, attempts INTEGER NOT NULL DEFAULT 0, "
+            "result_path TEXT, filename TEXT, media_type TEXT, size_bytes INTEGER, "
+            "created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at)")
+        self._conn.commit()
+
+    def insert(self, params: dict, max_queued: int) -> dict:
+        """
+        เพิ่มงานใหม่สถานะ queued
+
+        Raises:
+            JobQueueFull: ถ้างานที่รอในคิวมีครบ max_queued แล้ว
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= max_queued:
+                raise JobQueueFull(f"คิวงานเต็ม ({max_queued} งาน) กรุณาลองใหม่อีกครั้ง")
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, stage, progress, params, created_at) "
+                "VALUES (?, 'queued', 'queued', 0, ?, ?)",
+                (job_id, json.dumps(params, ensure_ascii=False), now)
+            )
+            self._conn.commit()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """ดึงงานตาม id (None ถ้าไม่มี)"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def queue_position(self, job: dict) -> int:
+        """จำนวนงานที่รออยู่ก่อนงานนี้"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created_at < ?", (job["created_at"],)
+            ).fetchone()[0]
+
+    def claim(self, lease: float) -> Optional[dict]:
+        """
+        ดึงงานถัดไปมาทำแบบ atomic: งาน queued ที่เก่าที่สุด หรืองาน running ที่ heartbeat ขาดเกิน lease
+        (worker/process ก่อนหน้าตายระหว่างทำ)
+
+        Args:
+            lease: วินาทีที่งาน running ต้องส่ง heartbeat ไม่งั้นถือว่าค้าง
+
+        Returns:
+            งานที่ได้ (สถานะ running) หรือ None ถ้าไม่มีงาน
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', stage = 'starting', progress = 0, "
+                "attempts = attempts + 1, started_at = ?, heartbeat_at = ? "
+                "WHERE id = (SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND heartbeat_at < ?) ORDER BY created_at LIMIT 1) "
+                f"RETURNING {', '.join(JOB_COLUMNS)}",
+                (now, now, now - lease)
+            ).fetchone()
+            self._conn.commit()
+        return dict(row) if row is not None else None
+
+    def update_progress(self, job_id: str, stage: str, progress: float):
+        """บันทึกความคืบหน้า (และนับเป็น heartbeat)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = ?, progress = ?, heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                (stage, progress, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def heartbeat(self, job_id: str):
+        """ต่อ lease ของงานที่กำลังทำ"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def complete(self, job_id: str, result_path: str, filename: str, media_type: str, size_bytes: int):
+        """บันทึกว่างานเสร็จพร้อมไฟล์ผลลัพธ์"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'done', stage = 'done', progress = 1, result_path = ?, filename = ?, "
+                "media_type = ?, size_bytes = ?, finished_at = ? WHERE id = ?",
+                (result_path, filename, media_type, size_bytes, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def fail(self, job_id: str, error: str, status_code: int = 500):
+        """บันทึกว่างานล้มเหลว"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', stage = 'failed', error = ?, status_code = ?, "
+                "finished_at = ? WHERE id = ?",
+                (error, status_code, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def expire(self, older_than: float) -> list:
+        """
+        ลบงานที่จบแล้วก่อนเวลา older_than
+
+        Returns:
+            list ของ result_path ที่ต้องลบไฟล์
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ? RETURNING result_path",
+                (older_than,)
+            ).fetchall()
+            self._conn.commit()
+        return [row[0] for row in rows if row[0]]
+
+    def counts(self) -> dict:
+        """จำนวนงานแยกตามสถานะ"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        """ปิด connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """คิวงาน background ที่ worker (asyncio task) ดึงงานจาก JobStore มาทำพร้อมกันไม่เกิน concurrency"""
+
+    def __init__(
+        self,
+        handler: JobHandler,
+        store_path: Optional[str] = None,
+        result_dir: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        result_ttl: Optional[float] = None,
+        lease: Optional[float] = None,
+        max_attempts: Optional[int] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        JOB_STORE_PATH, JOB_RESULT_DIR, JOB_CONCURRENCY, JOB_MAX_QUEUED,
+        JOB_RESULT_TTL, JOB_LEASE_SECONDS, JOB_MAX_ATTEMPTS
+
+        Args:
+            handler: coroutine ที่ทำงานจริง (fetch + convert) คืน (path, filename, media type)
+            store_path: path ของไฟล์ SQLite ที่เก็บงาน
+            result_dir: directory ที่เก็บไฟล์ผลลัพธ์
+            concurrency: จำนวนงานที่ทำพร้อมกันต่อ process
+            max_queued: จำนวนงานที่รอในคิวได้สูงสุด
+            result_ttl: อายุของงานที่จบแล้วและไฟล์ผลลัพธ์ (วินาที)
+            lease: วินาทีที่งาน running ไม่มี heartbeat แล้วถือว่าค้าง (ถูกดึงไปทำใหม่)
+            max_attempts: จำนวนครั้งสูงสุดที่งานหนึ่งถูกดึงไปทำ (กันงานที่ทำให้ process ตายวนซ้ำ)
+        """
+        if store_path is None:
+            store_path = os.getenv("JOB_STORE_PATH", DEFAULT_STORE_PATH)
+        if result_dir is None:
+            result_dir = os.getenv("JOB_RESULT_DIR", DEFAULT_RESULT_DIR)
+        if concurrency is None:
+            concurrency = int(os.getenv("JOB_CONCURRENCY", DEFAULT_CONCURRENCY))
+        if max_queued is None:
+            max_queued = int(os.getenv("JOB_MAX_QUEUED", DEFAULT_MAX_QUEUED))
+        if result_ttl is None:
+            result_ttl = float(os.getenv("JOB_RESULT_TTL", DEFAULT_RESULT_TTL_SECONDS))
+        if lease is None:
+            lease = float(os.getenv("JOB_LEASE_SECONDS", DEFAULT_LEASE_SECONDS))
+        if max_attempts is None:
+            max_attempts = int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+        self.handler = handler
+        self.store = JobStore(store_path)
+        self.result_dir = result_dir
+        self.concurrency = max(1, concurrency)
+        self.max_queued = max(1, max_queued)
+        self.result_ttl = result_ttl
+        self.lease = max(1.0, lease)
+        self.max_attempts = max(1, max_attempts)
+        self.poll_interval = DEFAULT_POLL_INTERVAL_SECONDS
+        os.makedirs(result_dir, exist_ok=True)
+
+        self.completed = 0
+        self.failed = 0
+        self.running = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks = []
+
+    async def submit(self, params: dict) -> dict:
+        """
+        เพิ่มงานเข้าคิว
+
+        Args:
+            params: พารามิเตอร์ของงาน (ส่งต่อให้ handler)
+
+        Returns:
+            ข้อมูลงาน (ดู describe)
+
+        Raises:
+            JobQueueFull: ถ้าคิวเต็ม
+        """
+        job = await asyncio.to_thread(self.store.insert, params, self.max_queued)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return await asyncio.to_thread(self.describe, job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        """ดึงงานดิบจาก store (None ถ้าไม่มีหรือหมดอายุแล้ว)"""
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    def describe(self, job: dict) -> dict:
+        """แปลงงานเป็น dict สำหรับตอบ client"""
+        params = json.loads(job["params"])
+        info = {
+            "id": job["id"],
+            "status": job["status"],
+            "stage": job["stage"],
+            "progress": round(job["progress"], 3),
+            "video_id": params.get("video_id"),
+            "file_format": params.get("file_format"),
+            "attempts": job["attempts"],
+            "created_at": _isoformat(job["created_at"]),
+            "started_at": _isoformat(job["started_at"]),
+            "finished_at": _isoformat(job["finished_at"]),
+        }
+        if job["status"] == "queued":
+            info["queue_position"] = self.store.queue_position(job)
+        if job["status"] == "done":
+            info["filename"] = job["filename"]
+            info["size_bytes"] = job["size_bytes"]
+            info["expires_at"] = _isoformat(job["finished_at"] + self.result_ttl)
+        if job["status"] == "failed":
+            info["error"] = job["error"]
+            info["error_status_code"] = job["status_code"]
+        return info
+
+    def start(self):
+        """เริ่ม worker tasks (เรียกจาก lifespan ของ app)"""
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.concurrency)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+
+    async def stop(self):
+        """หยุด worker (งานที่ค้างอยู่จะถูกทำต่อเมื่อ lease หมดหลัง restart)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease)
+            except Exception:
+                logger.exception("job worker %d ดึงงานล้มเหลว", number)
+                job = None
+            if job is None:
+                # รอสัญญาณจาก submit ใน process นี้ หรือ poll เป็นระยะ (งานจาก process อื่น)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        job_id = job["id"]
+        if job["attempts"] > self.max_attempts:
+            await asyncio.to_thread(
+                self.store.fail, job_id, f"งานล้มเหลวซ้ำเกิน {self.max_attempts} ครั้ง", 500
+            )
+            self.failed += 1
+            return
+
+        async def report(stage: str, progress: float):
+            await asyncio.to_thread(self.store.update_progress, job_id, stage, progress)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        self.running += 1
+        try:
+            path, filename, media_type = await self.handler(json.loads(job["params"]), report)
+            result_path = await asyncio.to_thread(self._keep_result, job_id, path, filename)
+            size = os.path.getsize(result_path)
+            await asyncio.to_thread(self.store.complete, job_id, result_path, filename, media_type, size)
+            self.completed += 1
+        except asyncio.CancelledError:
+            # process กำลังปิด: ปล่อยงานไว้ใน running ให้ถูกดึงไปทำใหม่เมื่อ lease หมด
+            raise
+        except Exception as e:
+            status_code = getattr(e, "status_code", 500)
+            logger.warning("job %s ล้มเหลว: %s", job_id, e)
+            await asyncio.to_thread(self.store.fail, job_id, str(e), status_code)
+            self.failed += 1
+        finally:
+            self.running -= 1
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await asyncio.to_thread(self.store.heartbeat, job_id)
+            except Exception:
+                logger.exception("job heartbeat ล้มเหลว: %s", job_id)
+
+    def _keep_result(self, job_id: str, path: str, filename: str) -> str:
+        # ย้ายไฟล์ออกจาก artifact store (ซึ่ง sweeper จะลบตามอายุ) มาเก็บใน result_dir
+        extension = os.path.splitext(filename)[1]
+        result_path = os.path.join(self.result_dir, f"{job_id}{extension}")
+        shutil.move(path, result_path)
+        return result_path
+
+    async def _cleanup_loop(self):
+        while True:
+            try:
+                paths = await asyncio.to_thread(self.store.expire, time.time() - self.result_ttl)
+                for path in paths:
+                    try:
+                        os.unlink(path)
+                    except FileNotFoundError:
+                        pass
+            except Exception:
+                logger.exception("ลบงานที่หมดอายุล้มเหลว")
+            await asyncio.sleep(CLEANUP_INTERVAL_SECONDS)
+
+    def stats(self) -> dict:
+        """สถิติของคิวงาน"""
+        return {
+            "concurrency": self.concurrency,
+            "running_here": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "jobs": self.store.counts(),
+        }
@@ -0,0 +1,305 @@
+"""
+Metrics - เก็บ metrics ใน process และแสดงผลแบบ Prometheus text format (ไม่ต้องพึ่ง prometheus_client)
+  - Counter / Gauge / Histogram พร้อม labels
+  - collector สำหรับแปลงสถิติที่มีอยู่แล้ว (cache, render pool, ...) เป็น metrics ตอน scrape
+  - MetricsMiddleware (ASGI) วัดจำนวน request, latency, ขนาด response และ request ที่กำลังทำ
+
+ค่าเป็นของแต่ละ worker process (Prometheus รวมข้าม process เองจาก label instance)
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+import math
+import threading
+import time
+
+
+# buckets เริ่มต้น (วินาที) ครอบคลุมตั้งแต่ cache hit จนถึง render PDF ยาวๆ
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+COUNT_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+# (ชื่อ metric, type, help, [(labels, value), ...]) ที่ collector คืน
+MetricFamily = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """ฐานของ metric ที่มี labels (เก็บค่าแยกตามชุด label)"""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: labels ต้องเป็น {self.labelnames} (ได้ {tuple(labels)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """ค่าที่เพิ่มขึ้นอย่างเดียว (ชื่อต้องลงท้ายด้วย _total ตาม text format 0.0.4 ทั้ง family และ sample)"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in items]
+
+
+class Gauge(_Metric):
+    """ค่าที่ขึ้นลงได้ (เช่น จำนวน request ที่กำลังทำ)"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [(self.name, self._labels(key), value) for key, value in items]
+
+
+class Histogram(_Metric):
+    """การกระจายของค่า (เช่น latency) แบ่งตาม buckets พร้อม sum และ count"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        # bucket แรกที่ value <= upper bound (ค่าที่เกิน bucket สุดท้ายไปอยู่ใน +Inf)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels) -> "_Timer":
+        """context manager จับเวลาแล้ว observe เป็นวินาที"""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        samples = []
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "started")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, object]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """รวม metrics และ collector ทั้งหมดของ process"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """
+        ลงทะเบียนฟังก์ชันที่สร้าง metrics ตอน scrape (สำหรับสถิติที่ service เก็บไว้อยู่แล้ว)
+
+        Args:
+            collector: ฟังก์ชันที่คืน list ของ (name, type, help, [(labels, value), ...])
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """แสดง metrics ทั้งหมดใน Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, type_name, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {type_name}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# registry ของ process และ metrics ที่ service ต่างๆ ใช้ร่วมกัน
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "จำนวน HTTP request แยกตาม route และ status", ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds", "เวลาตอบ HTTP request (จนส่ง body ครบ)", ("method", "route")
+)
+HTTP_RESPONSE_BYTES = REGISTRY.histogram(
+    "http_response_size_bytes", "ขนาด body ของ response", ("route",), buckets=SIZE_BUCKETS
+)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "จำนวน HTTP request ที่กำลังทำ")
+
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "youtube_upstream_duration_seconds",
+    "เวลาเรียก YouTube (รวม retry และการสลับ egress)",
+    ("operation", "outcome")
+)
+TRANSCRIPT_ERRORS = REGISTRY.counter(
+    "transcript_errors_total", "จำนวน error จากการดึง transcript แยกตามประเภท (blocked, not_found, ...)", ("error_class",)
+)
+TRANSCRIPT_SNIPPETS = REGISTRY.histogram(
+    "transcript_snippets", "จำนวน snippet ต่อ transcript ที่ดึงจาก YouTube", buckets=COUNT_BUCKETS
+)
+CONVERSION_SECONDS = REGISTRY.histogram(
+    "transcript_conversion_duration_seconds", "เวลาแปลง transcript เป็นไฟล์แยกตามรูปแบบ", ("format",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware วัด request ทุกตัว (ใช้ route template เป็น label ไม่ใช่ path จริง
+    เพื่อไม่ให้จำนวน label ขยายตาม video id / job id)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        state = {"status": 500, "bytes": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=state["status"])
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=method, route=route_path)
+            HTTP_RESPONSE_BYTES.observe(state["bytes"], route=route_path)
@@ -0,0 +1,175 @@
+"""
+Prefetch - เติม cache ล่วงหน้าจากรายการ video ที่รู้ว่าผู้ใช้จะขอ (ก่อนช่วง peak)
+  - ดึง transcript เข้า transcript cache (memory + disk/Redis) ด้วยอัตราที่กำหนด
+  - video ที่อยู่ใน cache แล้วไม่ใช้โควตา rate limit และไม่เรียก YouTube
+  - เรียก callback ให้ render ไฟล์ (PDF/DOCX/TXT ที่บีบอัดแล้ว) เก็บใน render cache ต่อ
+  - รายงานความคืบหน้าผ่าน reporter เดียวกับ job queue
+"""
+
+from typing import Awaitable, Callable, Iterable, List, Optional
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from services.egress_pool import TokenBucket
+from services.transcript_service import TranscriptError, TranscriptService
+
+
+logger = logging.getLogger(__name__)
+
+# ค่าเริ่มต้น
+DEFAULT_PREFETCH_RATE = 1.0
+DEFAULT_PREFETCH_CONCURRENCY = 2
+DEFAULT_PREFETCH_MAX_VIDEOS = 10000
+# จำนวนครั้งที่ลอง video เดิมซ้ำเมื่อ error ชั่วคราวที่บอก Retry-After (circuit เปิด / egress เต็ม)
+DEFAULT_PREFETCH_RETRIES = 2
+# คิวงาน prefetch แยกจากคิวแปลงไฟล์ของผู้ใช้ (/api/jobs)
+DEFAULT_PREFETCH_STORE_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-prefetch.sqlite3")
+DEFAULT_PREFETCH_RESULT_DIR = os.path.join(tempfile.gettempdir(), "yt-transcript-prefetch")
+
+# callback render ไฟล์จาก transcript: warm(transcript, formats)
+ArtifactWarmer = Callable[[object, List[str]], Awaitable[None]]
+# รายงานความคืบหน้า: report(stage, progress 0..1) (interface เดียวกับ job_queue.ProgressReporter)
+ProgressReporter = Callable[[str, float], Awaitable[None]]
+
+
+def read_video_list(lines: Iterable[str]) -> List[str]:
+    """
+    อ่านรายการ video จากไฟล์ (หนึ่ง URL หรือ ID ต่อบรรทัด ข้ามบรรทัดว่างและ # comment)
+
+    Args:
+        lines: บรรทัดของไฟล์
+
+    Returns:
+        รายการ URL / ID ตามลำดับเดิม
+    """
+    items = []
+    for line in lines:
+        line = line.split("#", 1)[0].strip()
+        if line:
+            items.append(line)
+    return items
+
+
+class Prefetcher:
+    """ดึง transcript และ render ไฟล์ของหลาย video เข้า cache ในพื้นหลังด้วยอัตราที่จำกัด"""
+
+    def __init__(
+        self,
+        transcript_service: TranscriptService,
+        warm_artifacts: Optional[ArtifactWarmer] = None,
+        rate: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        retries: int = DEFAULT_PREFETCH_RETRIES
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables: PREFETCH_RATE, PREFETCH_CONCURRENCY
+
+        Args:
+            transcript_service: service ที่ใช้ดึง transcript (และเป็นเจ้าของ cache)
+            warm_artifacts: coroutine ที่ render ไฟล์ของ transcript เข้า render cache (None = ไม่ render)
+            rate: จำนวน video ที่ดึงจาก YouTube ต่อวินาที (0 = ไม่จำกัด นอกจาก EGRESS_RATE)
+            concurrency: จำนวน video ที่ทำพร้อมกัน
+            retries: จำนวนครั้งที่ลองใหม่เมื่อ error ชั่วคราว
+        """
+        if rate is None:
+            rate = float(os.getenv("PREFETCH_RATE", DEFAULT_PREFETCH_RATE))
+        if concurrency is None:
+            concurrency = int(os.getenv("PREFETCH_CONCURRENCY", DEFAULT_PREFETCH_CONCURRENCY))
+        self.transcript_service = transcript_service
+        self.warm_artifacts = warm_artifacts
+        self.rate = rate
+        self.concurrency = max(1, concurrency)
+        self.retries = max(0, retries)
+        # burst 1: กระจาย request ให้สม่ำเสมอ ไม่แย่งโควตาของผู้ใช้ทีเดียวหลายตัว
+        self._bucket = TokenBucket(rate, 1)
+
+    async def run(
+        self,
+        video_ids: List[str],
+        languages: List[str],
+        formats: List[str],
+        report: Optional[ProgressReporter] = None
+    ) -> List[dict]:
+        """
+        เติม cache ของทุก video (ทำพร้อมกันไม่เกิน concurrency)
+
+        Args:
+            video_ids: รายการ video ID
+            languages: รายการภาษาตามลำดับความสำคัญ (ต้องตรงกับที่ผู้ใช้ขอจึงจะ hit cache)
+            formats: รูปแบบไฟล์ที่ render เข้า render cache (ว่าง = ดึง transcript อย่างเดียว)
+            report: coroutine รายงานความคืบหน้า
+
+        Returns:
+            ผลของแต่ละ video ตามลำดับเดิม:
+            {"video_id", "status": cached/fetched/failed, "language_code", "snippets", "error", "seconds"}
+        """
+        total = len(video_ids)
+        results: List[Optional[dict]] = [None] * total
+        counts = {"cached": 0, "fetched": 0, "failed": 0}
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, video_id in enumerate(video_ids):
+            queue.put_nowait((index, video_id))
+
+        async def progress():
+            if report is None:
+                return
+            done = sum(counts.values())
+            stage = (
+                f"prefetching {done}/{total} "
+                f"(cached {counts['cached']}, fetched {counts['fetched']}, failed {counts['failed']})"
+            )
+            await report(stage, done / total if total else 1.0)
+
+        async def worker():
+            while True:
+                try:
+                    index, video_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                result = await self._prefetch_one(video_id, languages, formats)
+                results[index] = result
+                counts[result["status"]] += 1
+                await progress()
+
+        await progress()
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, total) or 1)))
+        return results
+
+    async def _prefetch_one(self, video_id: str, languages: List[str], formats: List[str]) -> dict:
+        started = time.perf_counter()
+        result = {"video_id": video_id, "status": "cached", "language_code": None, "snippets": 0, "error": None}
+        try:
+            transcript = await self._fetch(video_id, languages, result)
+            result["language_code"] = transcript.language_code
+            result["snippets"] = len(transcript)
+            if formats and self.warm_artifacts is not None:
+                await self.warm_artifacts(transcript, formats)
+        except Exception as e:
+            logger.info("prefetch %s ล้มเหลว: %s", video_id, e)
+            result["status"] = "failed"
+            result["error"] = str(e)
+        result["seconds"] = round(time.perf_counter() - started, 3)
+        return result
+
+    async def _fetch(self, video_id: str, languages: List[str], result: dict):
+        def before_fetch():
+            # ไม่มีใน cache: รอ token ของ prefetch ก่อนเรียก YouTube (rate limit ของ egress ยังมีผลเหมือนเดิม)
+            # รันใน thread ที่ดึง transcript จึงรอแบบ blocking ได้ (ใช้ thread ไม่เกิน concurrency)
+            result["status"] = "fetched"
+            while not self._bucket.try_acquire():
+                time.sleep(max(self._bucket.wait_time(), 0.01))
+
+        attempt = 0
+        while True:
+            try:
+                return await self.transcript_service.fetch_transcript_async(
+                    video_id=video_id, languages=languages, before_fetch=before_fetch
+                )
+            except TranscriptError as e:
+                if e.retry_after is None or attempt >= self.retries:
+                    raise
+                attempt += 1
+                await asyncio.sleep(e.retry_after)
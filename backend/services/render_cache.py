@@ -0,0 +1,202 @@
+"""
+Render Cache - cache ของไฟล์ที่ render แล้ว (PDF, DOCX) แบบ content-addressed
+key = hash ของเนื้อหา transcript + ตัวเลือกการ render ใช้เป็น ETag ได้โดยตรง
+  - ชั้นที่ 1: in-memory LRU ต่อ process
+  - ชั้นที่ 2 (โหมด multi-worker): SQLite ที่ทุก worker บนเครื่องเดียวกันใช้ร่วมกัน
+    หรือ Redis เมื่อ SHARED_STATE_BACKEND=redis ไฟล์ที่ worker หนึ่ง render (เช่น จาก prefetch)
+    worker อื่นจึงส่งได้โดยไม่ต้อง render ใหม่
+"""
+
+from typing import Optional, Tuple
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+
+from services.compact_transcript import snippet_rows
+from services.compression import strip_encoded_etag
+from services.shared_state import RedisCache, shared_backend
+from services.transcript_cache import MemoryLRUCache, SQLiteCache
+
+
+# ขนาดสูงสุดของ render cache (bytes)
+DEFAULT_RENDER_CACHE_BYTES = 128 * 1024 * 1024
+# ชั้นที่ใช้ร่วมกันระหว่าง worker (ใช้เมื่อ SHARED_STATE_BACKEND ไม่ใช่ memory)
+DEFAULT_RENDER_CACHE_SHARED_BYTES = 512 * 1024 * 1024
+DEFAULT_RENDER_CACHE_SHARED_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-renders.sqlite3")
+# prefix ของ key ในชั้นที่ใช้ร่วมกัน (Redis instance เดียวกับ transcript cache)
+SHARED_KEY_PREFIX = "render:"
+
+
+def transcript_fingerprint(transcript) -> str:
+    """
+    คำนวณ hash ของเนื้อหา transcript (metadata + ทุก snippet)
+
+    Args:
+        transcript: FetchedTranscript object
+
+    Returns:
+        SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    header = "\x1f".join([
+        transcript.video_id,
+        transcript.language,
+        transcript.language_code,
+        "1" if transcript.is_generated else "0",
+    ])
+    digest.update(header.encode("utf-8"))
+    pack = struct.Struct("<dd").pack
+    for text, start, duration in snippet_rows(transcript):
+        digest.update(b"\x1e")
+        digest.update(text.encode("utf-8"))
+        digest.update(pack(start, duration))
+    return digest.hexdigest()
+
+
+def render_key(fingerprint: str, file_format: str, **options) -> str:
+    """
+    สร้าง key ของไฟล์ที่ render จาก fingerprint และตัวเลือกการ render
+
+    Args:
+        fingerprint: ผลจาก transcript_fingerprint()
+        file_format: รูปแบบไฟล์
+        **options: ตัวเลือกอื่นๆ ที่มีผลต่อผลลัพธ์ (เช่น include_timestamps)
+
+    Returns:
+        key (hex string) ที่ใช้เป็น ETag ได้
+    """
+    parts = [fingerprint, file_format] + [f"{name}={options[name]}" for name in sorted(options)]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:40]
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    ตรวจสอบ header If-None-Match กับ ETag (รองรับหลายค่า, weak validator, * และ
+    ETag ของ representation ที่บีบอัดแล้ว เช่น "abc-gzip")
+
+    Args:
+        if_none_match: ค่าของ header If-None-Match
+        etag: ETag ของ resource (รวมเครื่องหมาย ")
+
+    Returns:
+        True ถ้า client มีเวอร์ชันล่าสุดอยู่แล้ว (ตอบ 304 ได้)
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag or strip_encoded_etag(candidate) == etag:
+            return True
+    return False
+
+
+class RenderCache:
+    """
+    Cache ของไฟล์ที่ render แล้ว จำกัดขนาดรวมเป็น bytes (LRU)
+    เมื่อมีชั้นที่ใช้ร่วมกัน get/set/in จะเป็น blocking I/O (เรียกนอก event loop)
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        shared_path: Optional[str] = None,
+        shared_bytes: Optional[int] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        RENDER_CACHE_MAX_BYTES, RENDER_CACHE_SHARED_PATH, RENDER_CACHE_SHARED_BYTES
+        (ชั้นที่ใช้ร่วมกันเปิดเองเมื่อ SHARED_STATE_BACKEND เป็น sqlite หรือ redis)
+
+        Args:
+            max_bytes: ขนาดรวมสูงสุดใน memory (default จาก RENDER_CACHE_MAX_BYTES, 0 = ปิด)
+            shared_path: path ของ SQLite ที่ทุก worker ใช้ร่วมกัน ("" = ปิด)
+            shared_bytes: ขนาดรวมสูงสุดของชั้นที่ใช้ร่วมกัน
+        """
+        if max_bytes is None:
+            max_bytes = int(os.getenv("RENDER_CACHE_MAX_BYTES", DEFAULT_RENDER_CACHE_BYTES))
+        backend = shared_backend()
+        if shared_path is None:
+            shared_path = os.getenv(
+                "RENDER_CACHE_SHARED_PATH", DEFAULT_RENDER_CACHE_SHARED_PATH if backend != "memory" else ""
+            )
+        if shared_bytes is None:
+            shared_bytes = int(os.getenv("RENDER_CACHE_SHARED_BYTES", DEFAULT_RENDER_CACHE_SHARED_BYTES))
+        self.max_bytes = max_bytes
+        self._cache = MemoryLRUCache(max_bytes)
+        if max_bytes <= 0:
+            self.shared = None
+        elif backend == "redis":
+            self.shared = RedisCache()
+        elif shared_path:
+            self.shared = SQLiteCache(shared_path, shared_bytes)
+        else:
+            self.shared = None
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """ดึงไฟล์ที่ render แล้ว (None ถ้าไม่มี)"""
+        data, shared = self._lookup(key)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if shared:
+                    self.shared_hits += 1
+        return data
+
+    def contains(self, key: str) -> bool:
+        """มีไฟล์นี้ใน cache หรือไม่ (ไม่นับเป็น hit/miss ใช้ตอนเติม cache ล่วงหน้า)"""
+        return self._lookup(key)[0] is not None
+
+    def set(self, key: str, data: bytes):
+        """เก็บไฟล์ที่ render แล้ว (ไฟล์ที่ใหญ่กว่า max_bytes จะไม่ถูกเก็บ)"""
+        self._cache.set(key, data, len(data))
+        if self.shared is not None and self.fits(len(data)):
+            self.shared.set(SHARED_KEY_PREFIX + key, data)
+
+    def _lookup(self, key: str) -> Tuple[Optional[bytes], bool]:
+        # memory ก่อน แล้วค่อยชั้นที่ใช้ร่วมกัน (เจอแล้วเก็บเข้า memory ของ worker นี้)
+        # คืน (ข้อมูล, มาจากชั้นที่ใช้ร่วมกันหรือไม่)
+        data = self._cache.get(key)
+        if data is not None or self.shared is None:
+            return data, False
+        data = self.shared.get(SHARED_KEY_PREFIX + key)
+        if data is None:
+            return None, False
+        self._cache.set(key, data, len(data))
+        return data, True
+
+    def fits(self, size: int) -> bool:
+        """ตรวจสอบว่าไฟล์ขนาดนี้เก็บใน cache ได้หรือไม่"""
+        return 0 < size <= self.max_bytes
+
+    def stats(self) -> dict:
+        """สถิติของ render cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._cache),
+            "bytes": self._cache.current_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self._cache.evictions,
+            # hit ที่ได้จากชั้นที่ใช้ร่วมกัน (นับรวมอยู่ใน hits แล้ว)
+            "shared_hits": self.shared_hits,
+            "shared": self.shared.stats() if self.shared is not None else None,
+        }
+
+    def close(self):
+        """ปิด connection ของชั้นที่ใช้ร่วมกัน"""
+        if self.shared is not None:
+            self.shared.close()
@@ -0,0 +1,185 @@
+"""
+Render Pool - ส่งงานแปลงไฟล์ที่ใช้ CPU หนัก (PDF, DOCX) ไปทำใน process pool
+เพื่อไม่ให้ถือ GIL และบล็อก request อื่นใน worker เดียวกัน
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
+from services.artifact_store import ArtifactStore
+from services.compact_transcript import CompactTranscript
+from services.file_converter import FileConverter
+from services.metrics import CONVERSION_SECONDS
+
+
+# FileConverter ของ worker process (สร้างครั้งแรกที่ใช้งาน)
+_worker_converter: Optional[FileConverter] = None
+
+
+class RenderPoolSaturated(Exception):
+    """คิวงาน render เต็ม (ควรตอบ 429 ให้ client ลองใหม่)"""
+
+
+def _render_in_worker(
+    transcript: CompactTranscript,
+    file_format: str,
+    include_timestamps: bool,
+    pdf_layout: Optional[str],
+    artifact_dir: str
+) -> Tuple[str, float]:
+    """ฟังก์ชันที่รันใน worker process: render ไฟล์แล้วคืน path และเวลาที่ใช้"""
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = FileConverter(ArtifactStore(directory=artifact_dir))
+    started = time.perf_counter()
+    if file_format == "pdf":
+        path = _worker_converter.to_pdf(transcript, include_timestamps=include_timestamps, layout=pdf_layout)
+    else:
+        path = _worker_converter.to_docx(transcript, include_timestamps=include_timestamps)
+    return path, time.perf_counter() - started
+
+
+class RenderPool:
+    """Process pool สำหรับ render ไฟล์ พร้อมจำกัดความยาวคิวและเก็บเวลาที่ใช้ต่อรูปแบบ"""
+
+    def __init__(
+        self,
+        file_converter: FileConverter,
+        workers: Optional[int] = None,
+        max_queue: Optional[int] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables: RENDER_WORKERS, RENDER_MAX_QUEUE
+
+        Args:
+            file_converter: FileConverter ของ process หลัก (ใช้ artifact store เดียวกัน
+                และใช้ render ใน thread เมื่อ workers=0)
+            workers: จำนวน worker process (0 = render ใน thread ของ process หลัก)
+            max_queue: จำนวนงาน render ที่ค้างได้สูงสุด (รวมที่กำลังทำ) ก่อนตอบ 429
+        """
+        if workers is None:
+            workers = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 1))
+        if max_queue is None:
+            max_queue = int(os.getenv("RENDER_MAX_QUEUE", max(1, workers) * 4))
+        self.file_converter = file_converter
+        self.workers = max(0, workers)
+        self.max_queue = max(1, max_queue)
+        self.pending = 0
+        self.rejected = 0
+        self._timings = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # ใช้ spawn เพื่อไม่ให้ fork process ที่มี thread (uvicorn, thread pool) ทำงานอยู่
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def render(
+        self,
+        transcript,
+        file_format: str,
+        include_timestamps: bool = True,
+        pdf_layout: Optional[str] = None,
+        block: bool = False
+    ) -> str:
+        """
+        Render transcript เป็นไฟล์ PDF/DOCX ใน process pool
+
+        Args:
+            transcript: FetchedTranscript object
+            file_format: รูปแบบไฟล์ (pdf, doc, docx)
+            include_timestamps: รวม timestamps หรือไม่
+            pdf_layout: PDF layout ("flow" หรือ "fast", None = ค่าจาก PDF_LAYOUT)
+            block: True = รอจนคิวว่าง, False = raise RenderPoolSaturated ทันทีเมื่อคิวเต็ม
+
+        Returns:
+            Path ของไฟล์ที่สร้าง (อยู่ใน artifact store)
+
+        Raises:
+            RenderPoolSaturated: ถ้าคิวเต็มและ block=False
+        """
+        while True:
+            with self._lock:
+                if self.pending < self.max_queue:
+                    self.pending += 1
+                    break
+                if not block:
+                    self.rejected += 1
+                    raise RenderPoolSaturated(
+                        f"คิวการสร้างไฟล์เต็ม ({self.max_queue} งาน) กรุณาลองใหม่อีกครั้ง"
+                    )
+            await asyncio.sleep(0.05)
+
+        try:
+            if self.workers == 0:
+                started = time.perf_counter()
+                path = await asyncio.to_thread(
+                    self._render_local, transcript, file_format, include_timestamps, pdf_layout
+                )
+                elapsed = time.perf_counter() - started
+            else:
+                # CompactTranscript ส่งข้าม process ได้ถูก (pickle เป็น arrays + bytes buffer เดียว)
+                loop = asyncio.get_running_loop()
+                path, elapsed = await loop.run_in_executor(
+                    self._get_executor(),
+                    _render_in_worker,
+                    CompactTranscript.from_transcript(transcript),
+                    file_format,
+                    include_timestamps,
+                    pdf_layout,
+                    self.file_converter.artifact_store.directory
+                )
+                # metrics ของ worker process ไม่ถูก scrape จึงบันทึกเวลาที่ worker วัดได้ใน process หลัก
+                CONVERSION_SECONDS.observe(elapsed, format="docx" if file_format == "doc" else file_format)
+            self._record(file_format, elapsed)
+            return path
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _render_local(self, transcript, file_format: str, include_timestamps: bool, pdf_layout: Optional[str]) -> str:
+        if file_format == "pdf":
+            return self.file_converter.to_pdf(transcript, include_timestamps=include_timestamps, layout=pdf_layout)
+        return self.file_converter.to_docx(transcript, include_timestamps=include_timestamps)
+
+    def _record(self, file_format: str, seconds: float):
+        with self._lock:
+            timing = self._timings.setdefault(file_format, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            timing["count"] += 1
+            timing["total_seconds"] += seconds
+            timing["max_seconds"] = max(timing["max_seconds"], seconds)
+
+    def stats(self) -> dict:
+        """สถิติของ pool (ความยาวคิว, จำนวนที่ถูกปฏิเสธ, เวลาที่ใช้ต่อรูปแบบ)"""
+        with self._lock:
+            timings = {
+                file_format: {
+                    "count": t["count"],
+                    "avg_ms": round(t["total_seconds"] / t["count"] * 1000, 2) if t["count"] else 0.0,
+                    "max_ms": round(t["max_seconds"] * 1000, 2),
+                }
+                for file_format, t in self._timings.items()
+            }
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "formats": timings,
+            }
+
+    def shutdown(self):
+        """ปิด process pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
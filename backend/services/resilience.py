@@ -0,0 +1,305 @@
+"""
+Resilience - ป้องกันการเรียก YouTube ซ้ำๆ เมื่อมีปัญหา
+  - RetryPolicy: ลองใหม่เมื่อเจอ error ชั่วคราว ด้วย exponential backoff + jitter
+    โดยจำกัดจำนวน retry รวมต่อช่วงเวลา (retry budget) ไม่ให้ retry ทวีคูณโหลด
+  - CircuitBreaker: หยุดเรียก YouTube ชั่วคราว (fail fast) เมื่ออัตราความล้มเหลวสูงเกินกำหนด
+"""
+
+from collections import deque
+from typing import Callable, Optional
+import os
+import random
+import threading
+import time
+
+import requests
+from youtube_transcript_api._errors import YouTubeRequestFailed
+
+from services.egress_pool import is_block_error
+
+
+# ค่าเริ่มต้นของ retry
+DEFAULT_RETRY_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BASE_DELAY = 0.2
+DEFAULT_RETRY_MAX_DELAY = 2.0
+DEFAULT_RETRY_BUDGET_RATIO = 0.2
+DEFAULT_RETRY_BUDGET_MIN = 10
+DEFAULT_RETRY_BUDGET_WINDOW = 10.0
+
+# ค่าเริ่มต้นของ circuit breaker
+DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 0.5
+DEFAULT_CIRCUIT_MIN_REQUESTS = 20
+DEFAULT_CIRCUIT_WINDOW = 30.0
+DEFAULT_CIRCUIT_OPEN_SECONDS = 30.0
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    ตรวจสอบว่า error เป็นปัญหาชั่วคราวที่ควรลองใหม่หรือไม่
+    (error ที่เกิดจากการถูกบล็อกไม่นับ เพราะลองซ้ำจะยิ่งโดนบล็อก)
+    """
+    if is_block_error(error):
+        return False
+    return isinstance(error, (YouTubeRequestFailed, requests.RequestException))
+
+
+class CircuitOpenError(Exception):
+    """Circuit breaker เปิดอยู่ (ไม่เรียก YouTube จนกว่าจะพ้นช่วงพัก)"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class RetryPolicy:
+    """นโยบายการลองใหม่แบบ exponential backoff (full jitter) พร้อม retry budget"""
+
+    def __init__(
+        self,
+        max_attempts: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        budget_ratio: Optional[float] = None,
+        budget_min: Optional[int] = None,
+        budget_window: Optional[float] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+        RETRY_BUDGET_RATIO, RETRY_BUDGET_MIN, RETRY_BUDGET_WINDOW
+
+        Args:
+            max_attempts: จำนวนครั้งที่เรียกสูงสุดต่อ request (รวมครั้งแรก, 1 = ไม่ retry)
+            base_delay: ระยะรอพื้นฐาน (วินาที) เพิ่มเป็น 2 เท่าทุกครั้ง
+            max_delay: ระยะรอสูงสุดต่อครั้ง (วินาที)
+            budget_ratio: สัดส่วน retry สูงสุดเทียบกับจำนวน request ใน window
+            budget_min: จำนวน retry ที่ยอมให้เสมอใน window (สำหรับช่วงที่ traffic น้อย)
+            budget_window: ขนาดของ window (วินาที)
+        """
+        if max_attempts is None:
+            max_attempts = int(os.getenv("RETRY_MAX_ATTEMPTS", DEFAULT_RETRY_MAX_ATTEMPTS))
+        if base_delay is None:
+            base_delay = float(os.getenv("RETRY_BASE_DELAY", DEFAULT_RETRY_BASE_DELAY))
+        if max_delay is None:
+            max_delay = float(os.getenv("RETRY_MAX_DELAY", DEFAULT_RETRY_MAX_DELAY))
+        if budget_ratio is None:
+            budget_ratio = float(os.getenv("RETRY_BUDGET_RATIO", DEFAULT_RETRY_BUDGET_RATIO))
+        if budget_min is None:
+            budget_min = int(os.getenv("RETRY_BUDGET_MIN", DEFAULT_RETRY_BUDGET_MIN))
+        if budget_window is None:
+            budget_window = float(os.getenv("RETRY_BUDGET_WINDOW", DEFAULT_RETRY_BUDGET_WINDOW))
+
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_min = budget_min
+        self.budget_window = budget_window
+
+        self.retries = 0
+        self.budget_exhausted = 0
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt: int) -> float:
+        """ระยะรอก่อนลองครั้งที่ attempt+1 (full jitter: สุ่มระหว่าง 0 ถึง base * 2^attempt)"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _trim(self, now: float):
+        cutoff = now - self.budget_window
+        while self._requests and self._requests[0] < cutoff:
+            self._requests.popleft()
+        while self._retries and self._retries[0] < cutoff:
+            self._retries.popleft()
+
+    def record_request(self):
+        """บันทึก request ใหม่ (ใช้คำนวณ budget)"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire_retry(self) -> bool:
+        """ขอใช้ retry 1 ครั้งจาก budget (False = budget หมด ไม่ควร retry)"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            allowed = max(self.budget_min, int(len(self._requests) * self.budget_ratio))
+            if len(self._retries) >= allowed:
+                self.budget_exhausted += 1
+                return False
+            self._retries.append(now)
+            self.retries += 1
+            return True
+
+    def call(self, fn: Callable[[], object], is_retryable: Callable[[Exception], bool] = is_transient_error):
+        """
+        เรียก fn() และลองใหม่เมื่อเจอ error ชั่วคราว
+
+        Args:
+            fn: ฟังก์ชันที่ต้องการเรียก
+            is_retryable: ฟังก์ชันตัดสินว่า error ควรลองใหม่หรือไม่
+
+        Returns:
+            ผลลัพธ์ของ fn
+        """
+        self.record_request()
+        attempt = 0
+        while True:
+            try:
+                return fn()
+            except Exception as e:
+                attempt += 1
+                if attempt >= self.max_attempts or not is_retryable(e) or not self.try_acquire_retry():
+                    raise
+            time.sleep(self.backoff(attempt - 1))
+
+    def stats(self) -> dict:
+        """สถิติของ retry"""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "max_attempts": self.max_attempts,
+                "retries": self.retries,
+                "budget_exhausted": self.budget_exhausted,
+                "window_requests": len(self._requests),
+                "window_retries": len(self._retries),
+            }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker แบบนับอัตราความล้มเหลวใน sliding window
+      closed → open: เมื่อมี request ใน window ≥ min_requests และอัตราล้มเหลว ≥ threshold
+      open → half_open: เมื่อพ้น open_seconds (ยอมให้ 1 request ทดลอง)
+      half_open → closed/open: ตามผลของ request ทดลอง
+    """
+
+    def __init__(
+        self,
+        failure_threshold: Optional[float] = None,
+        min_requests: Optional[int] = None,
+        window: Optional[float] = None,
+        open_seconds: Optional[float] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_MIN_REQUESTS, CIRCUIT_WINDOW, CIRCUIT_OPEN_SECONDS
+
+        Args:
+            failure_threshold: อัตราความล้มเหลว (0-1) ที่ทำให้ circuit เปิด
+            min_requests: จำนวน request ขั้นต่ำใน window ก่อนพิจารณาเปิด circuit
+            window: ขนาดของ sliding window (วินาที)
+            open_seconds: ระยะเวลาที่ circuit เปิดก่อนลองใหม่ (วินาที)
+        """
+        if failure_threshold is None:
+            failure_threshold = float(os.getenv("CIRCUIT_FAILURE_THRESHOLD", DEFAULT_CIRCUIT_FAILURE_THRESHOLD))
+        if min_requests is None:
+            min_requests = int(os.getenv("CIRCUIT_MIN_REQUESTS", DEFAULT_CIRCUIT_MIN_REQUESTS))
+        if window is None:
+            window = float(os.getenv("CIRCUIT_WINDOW", DEFAULT_CIRCUIT_WINDOW))
+        if open_seconds is None:
+            open_seconds = float(os.getenv("CIRCUIT_OPEN_SECONDS", DEFAULT_CIRCUIT_OPEN_SECONDS))
+
+        self.failure_threshold = failure_threshold
+        self.min_requests = max(1, min_requests)
+        self.window = window
+        self.open_seconds = open_seconds
+
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self.rejected = 0
+        self._outcomes = deque()
+        self._failures = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        cutoff = now - self.window
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            _, failed = self._outcomes.popleft()
+            self._failures -= failed
+
+    def before_call(self):
+        """
+        ตรวจสอบก่อนเรียก YouTube
+
+        Raises:
+            CircuitOpenError: ถ้า circuit เปิดอยู่ (หรือมี request ทดลองค้างอยู่แล้ว)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CIRCUIT_OPEN:
+                remaining = self.opened_at + self.open_seconds - now
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        "YouTube มีปัญหาหรือกำลังบล็อกการเข้าถึง ระบบหยุดเรียกชั่วคราว กรุณาลองใหม่ในภายหลัง",
+                        retry_after=remaining
+                    )
+                self.state = CIRCUIT_HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == CIRCUIT_HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(
+                        "ระบบกำลังทดสอบการเชื่อมต่อกับ YouTube กรุณาลองใหม่อีกครั้ง",
+                        retry_after=1.0
+                    )
+                self._probe_in_flight = True
+
+    def record(self, failed: bool):
+        """
+        บันทึกผลการเรียก YouTube
+
+        Args:
+            failed: True ถ้าล้มเหลวจากฝั่ง YouTube (ถูกบล็อก / error ชั่วคราวที่ retry ไม่สำเร็จ)
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CIRCUIT_HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CIRCUIT_CLOSED
+                    self._outcomes.clear()
+                    self._failures = 0
+                return
+
+            self._trim(now)
+            self._outcomes.append((now, int(failed)))
+            self._failures += int(failed)
+            if (
+                self.state == CIRCUIT_CLOSED
+                and len(self._outcomes) >= self.min_requests
+                and self._failures / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._open(now)
+
+    def _open(self, now: float):
+        self.state = CIRCUIT_OPEN
+        self.opened_at = now
+        self.times_opened += 1
+
+    def stats(self) -> dict:
+        """สถานะของ circuit breaker"""
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            total = len(self._outcomes)
+            return {
+                "state": self.state,
+                "failure_rate": round(self._failures / total, 4) if total else 0.0,
+                "window_requests": total,
+                "times_opened": self.times_opened,
+                "rejected": self.rejected,
+                "open_for": round(max(0.0, self.opened_at + self.open_seconds - now), 1)
+                if self.state == CIRCUIT_OPEN else 0.0,
+            }
@@ -0,0 +1,323 @@
+"""
+Search Index - ดัชนีค้นหาข้อความเต็ม (SQLite FTS5) ของ transcript ที่เคยดึงมาแล้ว
+  - ป้อนข้อมูลจาก TranscriptService ทุกครั้งที่ดึง transcript จาก YouTube
+  - เขียนลง index ใน background thread (ไม่ทำให้การดึง transcript ช้าลง)
+  - ค้นหาแบบจัดอันดับ (bm25) คืน video_id และเวลาเป็นมิลลิวินาที
+"""
+
+from typing import List, Optional
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+
+from services.compact_transcript import snippet_rows
+from services.render_cache import transcript_fingerprint
+
+
+logger = logging.getLogger(__name__)
+
+# ค่าเริ่มต้น
+DEFAULT_INDEX_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-search.sqlite3")
+DEFAULT_QUEUE_SIZE = 1000
+DEFAULT_TOKENIZER = "unicode61"
+# จัดอันดับ (bm25) เฉพาะ match ล่าสุดกี่รายการต่อการค้นหา กันคำที่พบบ่อยมากใช้เวลานาน
+DEFAULT_RANK_WINDOW = 20000
+TOKENIZERS = {
+    # แยกคำตามช่องว่าง/เครื่องหมาย (ภาษาอังกฤษและภาษาที่เว้นวรรคระหว่างคำ)
+    "unicode61": "unicode61 remove_diacritics 2",
+    # ค้นหา substring ได้ทุกภาษา (รวมภาษาไทยที่ไม่เว้นวรรค) แต่ index ใหญ่กว่าและต้องค้น ≥ 3 ตัวอักษร
+    "trigram": "trigram",
+}
+
+# rowid ของ snippet = (doc_id << DOC_SHIFT) | ลำดับ snippet ลบทั้ง transcript ได้ด้วยช่วง rowid
+DOC_SHIFT = 20
+MAX_SNIPPETS_PER_DOC = 1 << DOC_SHIFT
+
+
+def build_match_query(query: str) -> str:
+    """
+    แปลงข้อความค้นหาของผู้ใช้เป็น FTS5 MATCH expression ที่ปลอดภัย
+      - ครอบด้วย "..." = ค้นทั้งวลี
+      - ไม่งั้น = ต้องมีทุกคำ (คำที่ลงท้ายด้วย * ค้นแบบ prefix)
+
+    Args:
+        query: ข้อความค้นหา
+
+    Returns:
+        MATCH expression (ว่างถ้าไม่มีคำให้ค้น)
+    """
+    query = query.strip()
+    if len(query) >= 2 and query.startswith('"') and query.endswith('"'):
+        phrase = query[1:-1].strip()
+        return '"' + phrase.replace('"', '""') + '"' if phrase else ""
+    terms = []
+    for term in query.split():
+        prefix = term.endswith("*")
+        term = term.rstrip("*")
+        if term:
+            terms.append('"' + term.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """Full-text index ของ snippet ทุก transcript บน SQLite FTS5"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        tokenizer: Optional[str] = None,
+        queue_size: Optional[int] = None,
+        rank_window: Optional[int] = None
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        SEARCH_INDEX_PATH, SEARCH_TOKENIZER, SEARCH_INDEX_QUEUE, SEARCH_RANK_WINDOW
+
+        Args:
+            path: path ของไฟล์ SQLite
+            tokenizer: "unicode61" หรือ "trigram" (มีผลเฉพาะตอนสร้าง index ครั้งแรก)
+            queue_size: จำนวน transcript ที่รอ index ได้สูงสุด (เกินจะถูกข้าม)
+            rank_window: จำนวน match ล่าสุดที่นำมาจัดอันดับ (0 = ทุก match)
+        """
+        if path is None:
+            path = os.getenv("SEARCH_INDEX_PATH", DEFAULT_INDEX_PATH)
+        if tokenizer is None:
+            tokenizer = os.getenv("SEARCH_TOKENIZER", DEFAULT_TOKENIZER).lower()
+        if tokenizer not in TOKENIZERS:
+            raise ValueError(f"SEARCH_TOKENIZER ไม่รองรับ: {tokenizer} (รองรับ: {', '.join(TOKENIZERS)})")
+        if queue_size is None:
+            queue_size = int(os.getenv("SEARCH_INDEX_QUEUE", DEFAULT_QUEUE_SIZE))
+        if rank_window is None:
+            rank_window = int(os.getenv("SEARCH_RANK_WINDOW", DEFAULT_RANK_WINDOW))
+
+        self.path = path
+        self.tokenizer = tokenizer
+        self.rank_window = max(0, rank_window)
+        self.indexed = 0
+        self.skipped = 0
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "doc_id INTEGER PRIMARY KEY, video_id TEXT NOT NULL, language_code TEXT NOT NULL, "
+            "language TEXT NOT NULL, is_generated INTEGER NOT NULL, snippet_count INTEGER NOT NULL, "
+            "fingerprint TEXT NOT NULL, indexed_at REAL NOT NULL, UNIQUE (video_id, language_code))"
+        )
+        self._writer.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS snippets USING fts5("
+            "text, start_ms UNINDEXED, duration_ms UNINDEXED, "
+            f"tokenize = '{TOKENIZERS[tokenizer]}')"
+        )
+        self._writer.commit()
+
+        self._thread = threading.Thread(target=self._run_writer, name="search-indexer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        # WAL อ่านพร้อมกันได้หลาย connection จึงใช้ connection แยกต่อ thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, transcript):
+        """
+        ส่ง transcript เข้าคิวเพื่อ index (ไม่บล็อก ถ้าคิวเต็มจะข้าม)
+
+        Args:
+            transcript: transcript ที่เพิ่งดึงมา (FetchedTranscript / CompactTranscript)
+        """
+        try:
+            self._queue.put_nowait(transcript)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _run_writer(self):
+        while True:
+            transcript = self._queue.get()
+            if transcript is None:
+                break
+            try:
+                self.index_transcript(transcript)
+            except Exception:
+                logger.exception("index transcript ล้มเหลว: %s", getattr(transcript, "video_id", "?"))
+
+    def index_transcript(self, transcript) -> bool:
+        """
+        เพิ่ม/แทนที่ transcript ใน index (ข้ามถ้าเนื้อหาเหมือนเดิม) ใช้จาก writer thread
+
+        Args:
+            transcript: FetchedTranscript / CompactTranscript
+
+        Returns:
+            True ถ้ามีการเขียน index
+        """
+        fingerprint = transcript_fingerprint(transcript)
+        conn = self._writer
+        row = conn.execute(
+            "SELECT doc_id, fingerprint FROM documents WHERE video_id = ? AND language_code = ?",
+            (transcript.video_id, transcript.language_code)
+        ).fetchone()
+        if row is not None and row[1] == fingerprint:
+            with self._lock:
+                self.skipped += 1
+            return False
+
+        with conn:
+            if row is not None:
+                doc_id = row[0]
+                conn.execute(
+                    "DELETE FROM snippets WHERE rowid BETWEEN ? AND ?",
+                    (doc_id << DOC_SHIFT, ((doc_id + 1) << DOC_SHIFT) - 1)
+                )
+                conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+            cursor = conn.execute(
+                "INSERT INTO documents (video_id, language_code, language, is_generated, "
+                "snippet_count, fingerprint, indexed_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    transcript.video_id, transcript.language_code, transcript.language,
+                    int(transcript.is_generated), len(transcript), fingerprint, time.time()
+                )
+            )
+            base = cursor.lastrowid << DOC_SHIFT
+            conn.executemany(
+                "INSERT INTO snippets (rowid, text, start_ms, duration_ms) VALUES (?, ?, ?, ?)",
+                (
+                    (base + i, text, int(round(start * 1000)), int(round(duration * 1000)))
+                    for i, (text, start, duration) in enumerate(snippet_rows(transcript))
+                    if i < MAX_SNIPPETS_PER_DOC
+                )
+            )
+        with self._lock:
+            self.indexed += 1
+        return True
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        offset: int = 0,
+        video_id: Optional[str] = None,
+        language_code: Optional[str] = None
+    ) -> List[dict]:
+        """
+        ค้นหา snippet ที่ตรงกับข้อความ เรียงตามความเกี่ยวข้อง (bm25)
+
+        Args:
+            query: ข้อความค้นหา (ครอบด้วย "..." เพื่อค้นทั้งวลี)
+            limit: จำนวนผลลัพธ์สูงสุด
+            offset: ข้ามผลลัพธ์กี่รายการ (สำหรับแบ่งหน้า)
+            video_id: จำกัดเฉพาะ video นี้
+            language_code: จำกัดเฉพาะภาษานี้
+
+        Returns:
+            list ของ hit: video_id, language_code, start_ms, end_ms, text, highlight, score
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        conn = self._reader()
+
+        # จำกัดช่วง rowid ตามเอกสารที่ผ่าน filter (FTS5 ใช้เงื่อนไขช่วง rowid ได้โดยตรง ไม่ต้องไล่ทุก match)
+        constraints = ""
+        constraint_params: list = []
+        doc_ids: Optional[set] = None
+        if video_id or language_code:
+            filters, filter_params = [], []
+            if video_id:
+                filters.append("video_id = ?")
+                filter_params.append(video_id)
+            if language_code:
+                filters.append("language_code = ?")
+                filter_params.append(language_code)
+            doc_ids = {
+                row[0] for row in conn.execute(
+                    f"SELECT doc_id FROM documents WHERE {' AND '.join(filters)}", filter_params
+                )
+            }
+            if not doc_ids:
+                return []
+            constraints += " AND {rowid} BETWEEN ? AND ?"
+            constraint_params += [min(doc_ids) << DOC_SHIFT, ((max(doc_ids) + 1) << DOC_SHIFT) - 1]
+        if self.rank_window:
+            # bm25 ต้องคำนวณทุก match ก่อน sort คำที่พบบ่อยมากจึงจัดอันดับเฉพาะ rank_window match ล่าสุด
+            # (การอ่าน match เรียงตาม rowid ไม่ต้อง sort จึงหาขอบเขตได้เร็ว)
+            constraints += (
+                " AND {rowid} >= (SELECT COALESCE(MIN(rowid), 0) FROM ("
+                f"SELECT rowid FROM snippets WHERE snippets MATCH ?{constraints.format(rowid='rowid')} "
+                "ORDER BY rowid DESC LIMIT ?))"
+            )
+            constraint_params += [match] + constraint_params + [self.rank_window]
+
+        sql = (
+            "SELECT d.video_id, d.language_code, d.language, s.start_ms, s.duration_ms, s.text, "
+            "highlight(snippets, 0, '<mark>', '</mark>'), bm25(snippets) "
+            "FROM snippets AS s JOIN documents AS d ON d.doc_id = (s.rowid >> ?) "
+            f"WHERE snippets MATCH ?{constraints.format(rowid='s.rowid')}"
+        )
+        params: list = [DOC_SHIFT, match] + constraint_params
+        if doc_ids is not None:
+            sql += f" AND d.doc_id IN ({', '.join('?' * len(doc_ids))})"
+            params += sorted(doc_ids)
+        sql += " ORDER BY bm25(snippets) LIMIT ? OFFSET ?"
+        params += [limit, offset]
+
+        rows = conn.execute(sql, params).fetchall()
+        return [
+            {
+                "video_id": video,
+                "language_code": code,
+                "language": language,
+                "start_ms": start_ms,
+                "end_ms": start_ms + duration_ms,
+                "text": text,
+                "highlight": highlight,
+                # bm25 ของ SQLite ยิ่งน้อยยิ่งเกี่ยวข้อง กลับเครื่องหมายให้ score มาก = ดี
+                "score": round(-score, 4),
+            }
+            for video, code, language, start_ms, duration_ms, text, highlight, score in rows
+        ]
+
+    def stats(self) -> dict:
+        """สถิติของ index"""
+        documents, snippets = self._reader().execute(
+            "SELECT COUNT(*), COALESCE(SUM(snippet_count), 0) FROM documents"
+        ).fetchone()
+        return {
+            "tokenizer": self.tokenizer,
+            "rank_window": self.rank_window,
+            "documents": documents,
+            "snippets": snippets,
+            "pending": self._queue.qsize(),
+            "indexed": self.indexed,
+            "skipped": self.skipped,
+            "dropped": self.dropped,
+        }
+
+    def close(self, timeout: float = 5.0):
+        """หยุด writer thread (รอ index งานที่ค้างในคิว) และปิด connection"""
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._writer.close()
@@ -0,0 +1,266 @@
+"""
+Shared State - สถานะที่ต้องใช้ร่วมกันระหว่าง worker process หลายตัว (โหมด multi-worker)
+  - token bucket ของ rate limit ต่อช่องทาง (EGRESS_RATE เป็นอัตรารวมของทุก worker ไม่ใช่ต่อ process)
+  - RedisCache: ชั้นที่ 2 ของ transcript cache บน Redis (ใช้แทน SQLite เมื่อ worker อยู่คนละเครื่อง)
+
+Backend (SHARED_STATE_BACKEND):
+  - memory: ต่อ process (ค่าเริ่มต้น เหมาะกับ worker ตัวเดียว)
+  - sqlite: ไฟล์ SQLite ไฟล์เดียวที่ทุก worker บนเครื่องเดียวกันเปิดร่วมกัน
+  - redis: Redis หรือ server ที่ใช้ protocol เดียวกัน (REDIS_URL, ต้องติดตั้ง redis)
+"""
+
+from typing import Optional
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+DEFAULT_BACKEND = "memory"
+DEFAULT_STATE_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-state.sqlite3")
+DEFAULT_REDIS_URL = "redis://localhost:6379/0"
+# prefix ของ key ใน Redis (แยกจากข้อมูลอื่นที่อยู่ใน instance เดียวกัน)
+REDIS_KEY_PREFIX = "yt-transcript:"
+
+# token bucket แบบ atomic ใน Redis: ใช้เวลาของ server (TIME) ทุก worker จึงเห็นนาฬิกาเดียวกัน
+# คืนเวลาที่ต้องรอ (วินาที) เป็น string, "0" = ได้ token แล้ว
+_TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1])
+local updated = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    updated = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return tostring(wait)
+"""
+
+
+def shared_backend() -> str:
+    """ชื่อ backend จาก SHARED_STATE_BACKEND (memory, sqlite, redis)"""
+    backend = os.getenv("SHARED_STATE_BACKEND", DEFAULT_BACKEND).strip().lower() or DEFAULT_BACKEND
+    if backend not in ("memory", "sqlite", "redis"):
+        raise ValueError(f"SHARED_STATE_BACKEND ไม่รองรับ: {backend} (ใช้ memory, sqlite หรือ redis)")
+    return backend
+
+
+def redis_client(url: Optional[str] = None):
+    """
+    สร้าง Redis client จาก REDIS_URL
+
+    Raises:
+        RuntimeError: ถ้าไม่ได้ติดตั้ง redis
+    """
+    if redis is None:
+        raise RuntimeError("SHARED_STATE_BACKEND=redis ต้องติดตั้ง redis (pip install redis)")
+    return redis.Redis.from_url(url or os.getenv("REDIS_URL", DEFAULT_REDIS_URL))
+
+
+class SQLiteSharedState:
+    """token bucket ที่เก็บใน SQLite (ทุก process เปิดไฟล์เดียวกัน, ใช้ BEGIN IMMEDIATE กันแย่งกัน)"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: path ของไฟล์ SQLite ที่ทุก worker ใช้ร่วมกัน
+        """
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # isolation_level=None: ควบคุม transaction เอง
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def take_token(self, name: str, rate: float, capacity: float) -> float:
+        """
+        ใช้ 1 token จาก bucket ถ้าไม่มีคืนเวลาที่ต้องรอจาก transaction เดียวกัน (ไม่ต้องถามซ้ำ)
+
+        Args:
+            name: ชื่อ bucket (เช่น ชื่อช่องทาง)
+            rate: จำนวน token ที่เติมต่อวินาที
+            capacity: จำนวน token สูงสุด
+
+        Returns:
+            0.0 ถ้าได้ token ไม่งั้นเวลาที่ต้องรอจนมี token ถัดไป (วินาที)
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM token_buckets WHERE name = ?", (name,)
+                ).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (name, tokens, now)
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+    def describe(self) -> dict:
+        return {"backend": "sqlite", "path": self.path}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSharedState:
+    """token bucket ที่เก็บใน Redis (atomic ด้วย Lua script)"""
+
+    def __init__(self, client=None):
+        """
+        Args:
+            client: Redis client (default สร้างจาก REDIS_URL)
+        """
+        self._client = client if client is not None else redis_client()
+        self._script = self._client.register_script(_TOKEN_BUCKET_SCRIPT)
+
+    def take_token(self, name: str, rate: float, capacity: float) -> float:
+        """เหมือน SQLiteSharedState.take_token()"""
+        wait = self._script(
+            keys=[f"{REDIS_KEY_PREFIX}bucket:{name}"],
+            args=[rate, capacity]
+        )
+        return float(wait)
+
+    def describe(self) -> dict:
+        return {"backend": "redis"}
+
+    def close(self):
+        self._client.close()
+
+
+def create_shared_state():
+    """
+    สร้าง shared state ตาม SHARED_STATE_BACKEND
+
+    Returns:
+        SQLiteSharedState / RedisSharedState หรือ None ถ้าใช้ memory (แยกต่อ process)
+    """
+    backend = shared_backend()
+    if backend == "sqlite":
+        return SQLiteSharedState(os.getenv("SHARED_STATE_PATH", DEFAULT_STATE_PATH))
+    if backend == "redis":
+        return RedisSharedState()
+    return None
+
+
+class SharedTokenBucket:
+    """Token bucket ที่นับร่วมกันทุก worker (interface เดียวกับ egress_pool.TokenBucket)"""
+
+    def __init__(self, state, name: str, rate: float, capacity: float):
+        """
+        Args:
+            state: SQLiteSharedState หรือ RedisSharedState
+            name: ชื่อ bucket (ต้องเหมือนกันทุก worker)
+            rate: จำนวน token ที่เติมต่อวินาที (0 = ไม่จำกัด)
+            capacity: จำนวน token สูงสุด (burst)
+        """
+        self.state = state
+        self.name = name
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        # เวลาที่ต้องรอจาก try_acquire() ครั้งล่าสุดที่ไม่ได้ token และเวลาที่ได้ค่านั้น (monotonic)
+        self._wait = 0.0
+        self._waited_at = 0.0
+
+    def try_acquire(self) -> bool:
+        """ใช้ 1 token ถ้ามี (True = สำเร็จ)"""
+        if self.rate <= 0:
+            return True
+        wait = self.state.take_token(self.name, self.rate, self.capacity)
+        self._wait, self._waited_at = wait, time.monotonic()
+        return wait == 0.0
+
+    def wait_time(self) -> float:
+        """
+        เวลาที่ต้องรอจนมี token ถัดไป (วินาที) คำนวณจากผลของ try_acquire() ครั้งล่าสุด
+        (ไม่ต้องเปิด transaction / round-trip ไปที่ shared state อีกรอบ)
+        """
+        if self.rate <= 0:
+            return 0.0
+        return max(0.0, self._wait - (time.monotonic() - self._waited_at))
+
+
+class RedisCache:
+    """
+    ชั้นที่ 2 ของ transcript cache บน Redis (interface เดียวกับ transcript_cache.SQLiteCache)
+    ขนาดรวมควบคุมด้วย maxmemory / maxmemory-policy ของ Redis เอง (แนะนำ allkeys-lru)
+    """
+
+    def __init__(self, ttl: Optional[float] = None, client=None):
+        """
+        Args:
+            ttl: อายุของ entry (วินาที), None = ไม่หมดอายุ
+            client: Redis client (default สร้างจาก REDIS_URL)
+        """
+        self.ttl = ttl
+        self._client = client if client is not None else redis_client()
+
+    def _key(self, key: str) -> str:
+        return f"{REDIS_KEY_PREFIX}cache:{key}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """ดึงค่า (None ถ้าไม่มีหรือหมดอายุ)"""
+        return self._client.get(self._key(key))
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """เก็บค่าพร้อมอายุ"""
+        ttl = self.ttl if ttl is None else ttl
+        self._client.set(self._key(key), value, px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key: str):
+        """ลบ entry"""
+        self._client.delete(self._key(key))
+
+    def stats(self) -> dict:
+        """สถิติจาก INFO ของ Redis (เป็นค่าของทั้ง instance)"""
+        memory = self._client.info("memory")
+        keyspace = self._client.info("stats")
+        return {
+            "backend": "redis",
+            "entries": self._client.dbsize(),
+            "bytes": memory.get("used_memory", 0),
+            "max_bytes": memory.get("maxmemory", 0),
+            "evictions": keyspace.get("evicted_keys", 0),
+        }
+
+    def close(self):
+        """ปิด connection"""
+        self._client.close()
@@ -0,0 +1,110 @@
+"""
+Single Flight - รวม (coalesce) การเรียกที่ซ้ำกันในเวลาเดียวกันให้เหลือการเรียกจริงครั้งเดียว
+caller ที่มาทีหลังจะรอผลลัพธ์ (หรือ error) ของการเรียกที่กำลังทำงานอยู่
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Hashable
+import asyncio
+import threading
+
+
+class _Call:
+    """สถานะของการเรียกที่กำลังทำงานอยู่ (สำหรับ thread)"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    รวมการเรียกที่มี key เดียวกันขณะที่กำลังทำงานอยู่ รองรับทั้ง thread (do)
+    และ asyncio (do_async)
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, "asyncio.Future"] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        เรียก fn() ครั้งเดียวต่อ key ในช่วงที่มีการเรียกซ้อนกัน (blocking)
+
+        Args:
+            key: key ของการเรียก
+            fn: ฟังก์ชันที่ต้องการเรียก
+
+        Returns:
+            ผลลัพธ์ของ fn() (ใช้ร่วมกันทุก caller)
+
+        Raises:
+            Exception: error เดียวกับที่ fn() raise
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        เรียก await fn() ครั้งเดียวต่อ key ในช่วงที่มีการเรียกซ้อนกัน (asyncio)
+
+        Args:
+            key: key ของการเรียก
+            fn: ฟังก์ชันที่คืน awaitable
+
+        Returns:
+            ผลลัพธ์ของ fn() (ใช้ร่วมกันทุก caller)
+        """
+        future = self._async_calls.get(key)
+        if future is not None:
+            with self._lock:
+                self.coalesced += 1
+            # shield เพื่อไม่ให้ caller ที่ยกเลิกไปทำให้ผลลัพธ์ของคนอื่นถูกยกเลิกด้วย
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._async_calls[key] = future
+        with self._lock:
+            self.executions += 1
+        future.add_done_callback(lambda _: self._async_calls.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        """สถิติการรวมการเรียก"""
+        total = self.executions + self.coalesced
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls) + len(self._async_calls),
+            "coalesced_ratio": round(self.coalesced / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,161 @@
+"""
+Snippet Index - ดัชนีของ snippet เรียงตามเวลาเริ่ม สำหรับ preview แบบแบ่งหน้าและเลือกช่วงเวลา
+ค้นหาตำแหน่งด้วย binary search และสร้าง dict เฉพาะ snippet ในหน้าที่ตอบกลับ
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+import os
+import threading
+
+from services.compact_transcript import CompactTranscript
+from services.transcript_cache import MemoryLRUCache, estimate_transcript_size
+
+
+# ขนาดรวมสูงสุดของ index cache (bytes) และอายุ (วินาที)
+DEFAULT_INDEX_CACHE_BYTES = 32 * 1024 * 1024
+DEFAULT_INDEX_CACHE_TTL = 60 * 60
+
+
+class SnippetIndex:
+    """Transcript หนึ่งชุดพร้อม array ของเวลาเริ่มที่เรียงแล้ว"""
+
+    __slots__ = ("transcript", "starts", "order")
+
+    def __init__(self, transcript):
+        """
+        Args:
+            transcript: FetchedTranscript object
+        """
+        self.transcript = transcript
+        if isinstance(transcript, CompactTranscript):
+            starts = transcript.starts
+        else:
+            starts = array("d", [snippet.start for snippet in transcript])
+        # transcript จาก YouTube เรียงตามเวลาอยู่แล้วเกือบทั้งหมด เก็บ order เฉพาะกรณีที่ไม่เรียง
+        if all(starts[i] <= starts[i + 1] for i in range(len(starts) - 1)):
+            self.order: Optional[array] = None
+            self.starts = starts
+        else:
+            self.order = array("l", sorted(range(len(starts)), key=starts.__getitem__))
+            self.starts = array("d", (starts[i] for i in self.order))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def snippet_at(self, position: int):
+        """snippet ลำดับที่ position (ตามลำดับเวลา)"""
+        index = position if self.order is None else self.order[position]
+        return self.transcript[index]
+
+    def time_range(self, start_sec: Optional[float], end_sec: Optional[float]) -> Tuple[int, int]:
+        """
+        หาช่วงตำแหน่ง [lo, hi) ของ snippet ที่แสดงอยู่ในช่วงเวลา start_sec ถึง end_sec
+
+        Args:
+            start_sec: เวลาเริ่ม (None = ต้น transcript)
+            end_sec: เวลาสิ้นสุด (None = ท้าย transcript)
+
+        Returns:
+            tuple (lo, hi)
+        """
+        lo, hi = 0, len(self.starts)
+        if start_sec is not None:
+            lo = bisect_left(self.starts, start_sec)
+            # รวม snippet ก่อนหน้าที่เริ่มก่อน start_sec แต่ยังแสดงคาบเกี่ยวอยู่
+            previous = bisect_right(self.starts, start_sec) - 1
+            if 0 <= previous < lo:
+                snippet = self.snippet_at(previous)
+                if snippet.start + snippet.duration > start_sec:
+                    lo = previous
+        if end_sec is not None:
+            hi = max(lo, bisect_left(self.starts, end_sec))
+        return lo, hi
+
+    def page(
+        self,
+        offset: int = 0,
+        limit: int = 50,
+        start_sec: Optional[float] = None,
+        end_sec: Optional[float] = None
+    ) -> dict:
+        """
+        ดึง snippet หนึ่งหน้า
+
+        Args:
+            offset: ตำแหน่งเริ่มภายในช่วงที่เลือก
+            limit: จำนวน snippet สูงสุด
+            start_sec: เวลาเริ่มของช่วง (None = ต้น transcript)
+            end_sec: เวลาสิ้นสุดของช่วง (None = ท้าย transcript)
+
+        Returns:
+            dict ของ snippets, range_total และ next_offset (None ถ้าหมดแล้ว)
+        """
+        lo, hi = self.time_range(start_sec, end_sec)
+        begin = min(hi, lo + max(0, offset))
+        end = min(hi, begin + max(0, limit))
+        snippets: List[dict] = []
+        for position in range(begin, end):
+            snippet = self.snippet_at(position)
+            snippets.append({
+                "text": snippet.text,
+                "start": snippet.start,
+                "duration": snippet.duration
+            })
+        next_offset = end - lo if end < hi else None
+        return {
+            "range_total": hi - lo,
+            "snippets": snippets,
+            "next_offset": next_offset,
+        }
+
+
+class SnippetIndexCache:
+    """LRU cache ของ SnippetIndex ตาม cache key ของ transcript"""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            max_bytes: ขนาดรวมสูงสุด (default จาก SNIPPET_INDEX_CACHE_BYTES, 0 = ปิด)
+            ttl: อายุของ index (default จาก SNIPPET_INDEX_CACHE_TTL)
+        """
+        if max_bytes is None:
+            max_bytes = int(os.getenv("SNIPPET_INDEX_CACHE_BYTES", DEFAULT_INDEX_CACHE_BYTES))
+        if ttl is None:
+            ttl = float(os.getenv("SNIPPET_INDEX_CACHE_TTL", DEFAULT_INDEX_CACHE_TTL))
+        self._cache = MemoryLRUCache(max_bytes, ttl)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[SnippetIndex]:
+        """ดึง index (None ถ้าไม่มี)"""
+        index = self._cache.get(key)
+        with self._lock:
+            if index is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return index
+
+    def build(self, key: str, transcript) -> SnippetIndex:
+        """สร้าง index จาก transcript แล้วเก็บลง cache"""
+        index = SnippetIndex(transcript)
+        # CompactTranscript ใช้ array ของ starts ร่วมกับ index จึงนับเฉพาะ transcript
+        size = estimate_transcript_size(transcript)
+        if index.starts is not getattr(transcript, "starts", None):
+            size += index.starts.itemsize * len(index.starts)
+        self._cache.set(key, index, size)
+        return index
+
+    def stats(self) -> dict:
+        """สถิติของ index cache"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._cache),
+            "bytes": self._cache.current_bytes,
+        }
@@ -0,0 +1,398 @@
+"""
+Transcript Cache - cache ของ transcript แบบ 2 ชั้น
+  - ชั้นที่ 1: in-memory LRU จำกัดขนาดเป็น bytes
+  - ชั้นที่ 2: SQLite บน disk (อยู่รอดหลัง restart และใช้ร่วมกันทุก worker บนเครื่องเดียวกัน)
+    หรือ Redis เมื่อ SHARED_STATE_BACKEND=redis (ใช้ร่วมกันข้ามเครื่อง)
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+
+from services.compact_transcript import CompactTranscript
+from services.shared_state import RedisCache, shared_backend
+
+
+# ค่าเริ่มต้นของ cache
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+DEFAULT_DISK_PATH = os.path.join(tempfile.gettempdir(), "yt-transcript-cache.sqlite3")
+
+# ค่าประมาณ overhead ของ Python object ต่อ snippet (dataclass + float 2 ตัว + str header)
+SNIPPET_OVERHEAD_BYTES = 200
+
+# ขึ้นต้นข้อมูลบน disk แบบ binary (CompactTranscript) แยกจากรูปแบบ JSON เดิม
+COMPACT_MAGIC = b"CT1\x00"
+
+
+def make_cache_key(
+    video_id: str,
+    languages: Optional[List[str]],
+    preserve_formatting: bool,
+    translate_to: Optional[str] = None
+) -> str:
+    """
+    สร้าง cache key จาก parameters ของการดึง transcript
+
+    Args:
+        video_id: YouTube video ID
+        languages: รายการภาษาตามลำดับความสำคัญ
+        preserve_formatting: เก็บ HTML formatting หรือไม่
+        translate_to: ภาษาที่แปลไป (ถ้ามี)
+
+    Returns:
+        Cache key (string)
+    """
+    languages_part = ",".join(languages) if languages else ""
+    key = f"{video_id}|{languages_part}|{int(bool(preserve_formatting))}"
+    if translate_to:
+        key += f"|>{translate_to}"
+    return key
+
+
+def estimate_transcript_size(transcript) -> int:
+    """ประมาณขนาด (bytes) ของ transcript ใน memory"""
+    if isinstance(transcript, CompactTranscript):
+        return transcript.nbytes()
+    return sum(len(snippet.text) + SNIPPET_OVERHEAD_BYTES for snippet in transcript) + 512
+
+
+def serialize_transcript(transcript) -> bytes:
+    """แปลง transcript เป็น bytes (CompactTranscript แบบ binary + zlib) สำหรับเก็บบน disk"""
+    compact = CompactTranscript.from_transcript(transcript)
+    return COMPACT_MAGIC + zlib.compress(compact.to_bytes(), 6)
+
+
+def deserialize_transcript(data: bytes) -> CompactTranscript:
+    """แปลง bytes จาก disk กลับเป็น CompactTranscript (รองรับรูปแบบ JSON เดิมด้วย)"""
+    if data.startswith(COMPACT_MAGIC):
+        return CompactTranscript.from_bytes(zlib.decompress(data[len(COMPACT_MAGIC):]))
+    payload = json.loads(zlib.decompress(data).decode("utf-8"))
+    snippets = payload["snippets"]
+    return CompactTranscript.from_columns(
+        video_id=payload["video_id"],
+        language=payload["language"],
+        language_code=payload["language_code"],
+        is_generated=payload["is_generated"],
+        texts=[snippet[0] for snippet in snippets],
+        starts=[snippet[1] for snippet in snippets],
+        durations=[snippet[2] for snippet in snippets],
+    )
+
+
+class MemoryLRUCache:
+    """In-memory LRU cache ที่จำกัดขนาดรวมเป็น bytes และรองรับ TTL"""
+
+    def __init__(self, max_bytes: int, ttl: Optional[float] = None):
+        """
+        Args:
+            max_bytes: ขนาดรวมสูงสุด (bytes), 0 = ปิดการใช้งาน
+            ttl: อายุของ entry (วินาที), None = ไม่หมดอายุ
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries: "OrderedDict[str, Tuple[Any, int, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """ดึงค่าจาก cache (None ถ้าไม่มีหรือหมดอายุ)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[float] = None):
+        """
+        เก็บค่าลง cache และ evict entry ที่ใช้ล่าสุดนานที่สุดจนขนาดไม่เกิน max_bytes
+
+        Args:
+            key: cache key
+            value: ค่าที่เก็บ
+            size: ขนาดของค่า (bytes)
+            ttl: อายุเฉพาะ entry นี้ (None = ใช้ค่า default ของ cache)
+        """
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def delete(self, key: str):
+        """ลบ entry ออกจาก cache"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """ล้าง cache ทั้งหมด"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """Persistent cache บน SQLite จำกัดขนาดรวมเป็น bytes และรองรับ TTL"""
+
+    def __init__(self, path: str, max_bytes: int, ttl: Optional[float] = None):
+        """
+        Args:
+            path: path ของไฟล์ SQLite
+            max_bytes: ขนาดรวมสูงสุดของข้อมูล (bytes)
+            ttl: อายุของ entry (วินาที), None = ไม่หมดอายุ
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.evictions = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries(accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """ดึงค่าจาก disk (None ถ้าไม่มีหรือหมดอายุ)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """เก็บค่าลง disk และ evict entry เก่าถ้าขนาดรวมเกิน max_bytes"""
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), size, expires_at, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """ลบ entry ออกจาก disk"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        # ลบ entry ที่หมดอายุก่อน แล้วค่อยลบตามลำดับ LRU จนขนาดรวมไม่เกิน max_bytes
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+        )
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self._conn.execute(
+            "SELECT key, size FROM cache_entries ORDER BY accessed_at ASC"
+        )
+        to_delete = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM cache_entries WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+
+    def stats(self) -> dict:
+        """สถิติของ disk cache"""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        """ปิด connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class TranscriptCache:
+    """Cache ของ FetchedTranscript แบบ 2 ชั้น (memory → disk) พร้อมตัวนับ hit/miss"""
+
+    def __init__(
+        self,
+        memory_bytes: Optional[int] = None,
+        disk_path: Optional[str] = None,
+        disk_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        serializer: Callable[[Any], bytes] = serialize_transcript,
+        deserializer: Callable[[bytes], Any] = deserialize_transcript,
+        sizer: Callable[[Any], int] = estimate_transcript_size
+    ):
+        """
+        ค่าที่ไม่ได้ระบุจะอ่านจาก environment variables:
+        TRANSCRIPT_CACHE_MEMORY_BYTES, TRANSCRIPT_CACHE_DISK_PATH,
+        TRANSCRIPT_CACHE_DISK_BYTES, TRANSCRIPT_CACHE_TTL
+        (ถ้า SHARED_STATE_BACKEND=redis ชั้นที่ 2 จะเป็น Redis แทน SQLite)
+
+        Args:
+            memory_bytes: ขนาดสูงสุดของ memory tier (0 = ปิด)
+            disk_path: path ของ SQLite file ("" = ปิด disk tier)
+            disk_bytes: ขนาดสูงสุดของ disk tier
+            ttl: อายุของ entry (วินาที, 0 = ไม่หมดอายุ)
+            serializer / deserializer: แปลง object ↔ bytes สำหรับ disk tier
+            sizer: ฟังก์ชันประมาณขนาดของ object ใน memory
+        """
+        if memory_bytes is None:
+            memory_bytes = int(os.getenv("TRANSCRIPT_CACHE_MEMORY_BYTES", DEFAULT_MEMORY_BYTES))
+        if disk_path is None:
+            disk_path = os.getenv("TRANSCRIPT_CACHE_DISK_PATH", DEFAULT_DISK_PATH)
+        if disk_bytes is None:
+            disk_bytes = int(os.getenv("TRANSCRIPT_CACHE_DISK_BYTES", DEFAULT_DISK_BYTES))
+        if ttl is None:
+            ttl = float(os.getenv("TRANSCRIPT_CACHE_TTL", DEFAULT_TTL_SECONDS))
+
+        self.ttl = ttl or None
+        self._serialize = serializer
+        self._deserialize = deserializer
+        self._sizer = sizer
+        self.memory = MemoryLRUCache(memory_bytes, self.ttl)
+        if shared_backend() == "redis":
+            self.disk = RedisCache(self.ttl)
+        elif disk_path:
+            self.disk = SQLiteCache(disk_path, disk_bytes, self.ttl)
+        else:
+            self.disk = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._counter_lock = threading.Lock()
+
+    def get(self, key: str, record: bool = True) -> Optional[Any]:
+        """
+        ดึง transcript จาก cache (memory ก่อน แล้วค่อย disk)
+
+        Args:
+            key: cache key จาก make_cache_key()
+            record: นับเป็น hit/miss ในสถิติ (False = ตรวจซ้ำของ request เดิมที่นับไปแล้ว)
+
+        Returns:
+            Transcript object หรือ None ถ้าไม่มีใน cache
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            if record:
+                self._count("memory_hits")
+            return value
+
+        if self.disk is not None:
+            data = self.disk.get(key)
+            if data is not None:
+                try:
+                    value = self._deserialize(data)
+                except Exception:
+                    # ข้อมูลเสีย (เช่น format เปลี่ยน) ให้ถือว่า miss และลบทิ้ง
+                    self.disk.delete(key)
+                else:
+                    self.memory.set(key, value, self._sizer(value))
+                    if record:
+                        self._count("disk_hits")
+                    return value
+
+        if record:
+            self._count("misses")
+        return None
+
+    def set(self, key: str, value: Any):
+        """เก็บ transcript ลงทั้ง memory และ disk"""
+        self.memory.set(key, value, self._sizer(value))
+        if self.disk is not None:
+            self.disk.set(key, self._serialize(value))
+
+    def _count(self, name: str):
+        with self._counter_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def stats(self) -> dict:
+        """สถิติของ cache (hit/miss, ขนาด, จำนวน eviction)"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory": {
+                "entries": len(self.memory),
+                "bytes": self.memory.current_bytes,
+                "max_bytes": self.memory.max_bytes,
+                "evictions": self.memory.evictions,
+                "expirations": self.memory.expirations,
+            },
+            "disk": self.disk.stats() if self.disk is not None else None,
+        }
+
+    def close(self):
+        """ปิด disk tier"""
+        if self.disk is not None:
+            self.disk.close()
@@ -2,33 +2,184 @@
 Transcript Service - บริการสำหรับดึง transcript จาก YouTube
 """
 
-from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api._errors import (
     TranscriptsDisabled,
     NoTranscriptFound,
     VideoUnavailable,
-    YouTubeRequestFailed,
-    RequestBlocked,
-    IpBlocked,
-    CouldNotRetrieveTranscript
+    NotTranslatable,
+    TranslationLanguageNotAvailable
 )
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterator, List, Optional, Tuple
+import asyncio
+import logging
 import os
+import threading
+import time
+
+from services.compact_transcript import CompactTranscript
+from services.egress_pool import EgressPool, EgressUnavailable, is_block_error
+from services.metrics import TRANSCRIPT_ERRORS, TRANSCRIPT_SNIPPETS, UPSTREAM_SECONDS
+from services.resilience import CircuitBreaker, CircuitOpenError, RetryPolicy, is_transient_error
+from services.shared_state import create_shared_state
+from services.single_flight import SingleFlight
+from services.transcript_cache import MemoryLRUCache, TranscriptCache, make_cache_key
+from services.youtube_compat import CaptionStream, bind_transcript
+
+
+logger = logging.getLogger(__name__)
+
+# จำนวน thread สูงสุดที่ใช้ดึง transcript พร้อมกัน (ต่อ 1 worker process)
+DEFAULT_FETCH_WORKERS = 32
+
+# ภาษาเริ่มต้นเมื่อไม่ได้ระบุ (เหมือน YouTubeTranscriptApi.fetch)
+DEFAULT_LANGUAGES = ["en"]
+
+# Cache ของ TranscriptList: อายุสั้น (URL ของ caption มีลายเซ็นที่หมดอายุ) และจำนวนรายการสูงสุด
+DEFAULT_LIST_CACHE_TTL = 300
+DEFAULT_LIST_CACHE_SIZE = 1024
+
+# จำนวน snippet ต่อ batch ของการ stream transcript
+DEFAULT_STREAM_BATCH = 200
+
+BLOCKED_HELP = (
+    "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้ (มักเกิดจาก cloud provider)\n"
+    "วิธีแก้ไข:\n"
+    "1. ใช้ cookies จาก browser (ตั้งค่า YOUTUBE_COOKIES environment variable)\n"
+    "2. ใช้ proxy service (ตั้งค่า YOUTUBE_PROXIES environment variable)\n"
+    "3. ลองใหม่ในภายหลัง\n"
+)
+
+
+class TranscriptError(Exception):
+    """
+    Error จากการดึง transcript พร้อม HTTP status code ที่ควรตอบ client
+      404 = video/transcript ไม่มีอยู่, 502 = YouTube ตอบผิดพลาด,
+      503 = ถูกบล็อก / circuit breaker เปิด (ลองใหม่ภายหลัง)
+    """
+
+    def __init__(self, message: str, status_code: int = 500, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
 
 
 class TranscriptService:
     """Service สำหรับจัดการ transcript"""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, cache: Optional[TranscriptCache] = None):
+        # ช่องทางออกไปยัง YouTube (proxy + cookies) หลายช่องทาง หมุนเวียนใช้ต่อ request
         # รองรับ cookies จาก environment variable (ถ้ามี)
         # วิธีได้ cookies: เปิด YouTube ใน browser → F12 → Application → Cookies → คัดลอก cookies
-        cookies = os.getenv("YOUTUBE_COOKIES", None)
-        if cookies:
-            # Parse cookies string format (cookie1=value1; cookie2=value2) เป็น list ของ dict
-            cookies_list = self._parse_cookies(cookies)
-            self.api = YouTubeTranscriptApi(cookies=cookies_list)
-        else:
-            self.api = YouTubeTranscriptApi()
+        # rate limit ต่อช่องทางนับร่วมกันทุก worker เมื่อกำหนด SHARED_STATE_BACKEND (sqlite / redis)
+        self.shared_state = create_shared_state()
+        self.egress_pool = EgressPool.from_env(self._parse_cookies, shared_state=self.shared_state)
+        
+        # Thread pool สำหรับรันการดึง transcript (blocking I/O) นอก event loop
+        if max_workers is None:
+            max_workers = int(os.getenv("TRANSCRIPT_FETCH_WORKERS", DEFAULT_FETCH_WORKERS))
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="transcript-fetch"
+        )
+        
+        # Cache ของ transcript (memory LRU + SQLite) ลดการเรียก YouTube ซ้ำ
+        self.cache = cache if cache is not None else TranscriptCache()
+        
+        # Cache ของ TranscriptList ต่อ video (ใช้ซ้ำระหว่าง list / fetch / แปลภาษา
+        # ไม่ต้องโหลดหน้า watch และ captions metadata ซ้ำ) นับขนาดเป็นจำนวนรายการ
+        # เก็บเป็น (ชื่อ egress ที่ list มา, TranscriptList) เพราะ URL ของ caption ผูกกับช่องทางนั้น
+        self.list_cache = MemoryLRUCache(
+            max_bytes=int(os.getenv("TRANSCRIPT_LIST_CACHE_SIZE", DEFAULT_LIST_CACHE_SIZE)),
+            ttl=float(os.getenv("TRANSCRIPT_LIST_TTL", DEFAULT_LIST_CACHE_TTL))
+        )
+        
+        # รวม request ที่ดึง transcript เดียวกันพร้อมกันให้เหลือการเรียก YouTube ครั้งเดียว
+        # single_flight: ชั้น thread (cache miss → YouTube), async_flight: ชั้น asyncio (ก่อนใช้ thread)
+        # แยก object กันเพื่อไม่ให้งานเดียวกันถูกนับเป็น execution สองครั้ง (ดู single_flight_stats)
+        self.single_flight = SingleFlight()
+        self.async_flight = SingleFlight()
+        
+        # ลองใหม่เมื่อ YouTube มีปัญหาชั่วคราว และหยุดเรียกเมื่อล้มเหลวต่อเนื่อง
+        self.retry_policy = RetryPolicy()
+        self.circuit_breaker = CircuitBreaker()
+        
+        # callback ที่ถูกเรียกทุกครั้งที่ได้ transcript ใหม่จาก YouTube (เช่น search index)
+        self._fetch_listeners: List[Callable] = []
+    
+    def add_fetch_listener(self, callback: Callable):
+        """
+        ลงทะเบียน callback(transcript) ที่จะถูกเรียกหลังดึง transcript จาก YouTube สำเร็จ
+        callback ควรทำงานเร็ว (เช่น ส่งเข้าคิว) เพราะรันใน thread ที่ดึง transcript
+        """
+        self._fetch_listeners.append(callback)
+    
+    async def run_in_executor(self, func, *args, **kwargs):
+        """
+        รันฟังก์ชัน blocking ใน thread pool ของ service โดยไม่บล็อก event loop
+        
+        Args:
+            func: ฟังก์ชันที่ต้องการรัน
+            *args, **kwargs: arguments ของฟังก์ชัน
+        
+        Returns:
+            ผลลัพธ์ของฟังก์ชัน
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def fetch_transcript_async(
+        self,
+        video_id: str,
+        languages: Optional[List[str]] = None,
+        preserve_formatting: bool = False,
+        translate_to: Optional[str] = None,
+        before_fetch: Optional[Callable[[], None]] = None
+    ):
+        """fetch_transcript แบบ async (รันใน thread pool, รวม request ที่ซ้ำกัน)"""
+        cache_key = make_cache_key(video_id, languages, preserve_formatting, translate_to)
+        return await self.async_flight.do_async(
+            cache_key,
+            lambda: self.run_in_executor(
+                self.fetch_transcript,
+                video_id,
+                languages=languages,
+                preserve_formatting=preserve_formatting,
+                translate_to=translate_to,
+                before_fetch=before_fetch
+            )
+        )
+    
+    def single_flight_stats(self) -> dict:
+        """
+        สถิติการรวม request ของทั้งสองชั้น
+          - executions: จำนวนครั้งที่ทำงานจริง (ชั้น thread: cache miss ที่ต้องเรียก YouTube)
+          - coalesced: caller ที่รอผลของ caller อื่น (ชั้น asyncio + ชั้น thread)
+        """
+        inner = self.single_flight.stats()
+        outer = self.async_flight.stats()
+        executions = inner["executions"]
+        coalesced = inner["coalesced"] + outer["coalesced"]
+        total = executions + coalesced
+        return {
+            "executions": executions,
+            "coalesced": coalesced,
+            "in_flight": inner["in_flight"] + outer["in_flight"],
+            "coalesced_ratio": round(coalesced / total, 4) if total else 0.0,
+        }
+    
+    async def list_transcripts_async(self, video_id: str):
+        """list_transcripts แบบ async (รันใน thread pool)"""
+        return await self.run_in_executor(self.list_transcripts, video_id)
+    
+    def shutdown(self):
+        """ปิด thread pool (เรียกตอน application shutdown)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.cache.close()
+        if self.shared_state is not None:
+            self.shared_state.close()
     
     def _parse_cookies(self, cookies_string: str) -> List[dict]:
         """
@@ -95,7 +246,9 @@ class TranscriptService:
         self,
         video_id: str,
         languages: Optional[List[str]] = None,
-        preserve_formatting: bool = False
+        preserve_formatting: bool = False,
+        translate_to: Optional[str] = None,
+        before_fetch: Optional[Callable[[], None]] = None
     ):
         """
         ดึง transcript จาก YouTube video
@@ -104,66 +257,299 @@ class TranscriptService:
             video_id: YouTube video ID
             languages: รายการภาษา (เช่น ['th', 'en'])
             preserve_formatting: เก็บ HTML formatting หรือไม่
+            translate_to: แปล transcript เป็นภาษานี้ (เช่น 'th') ถ้าระบุ
+            before_fetch: callback ที่ถูกเรียก (ใน thread ที่ดึง) เฉพาะเมื่อไม่มีใน cache
+                และต้องเรียก YouTube จริง เช่น รอ rate limit ของ prefetch
         
         Returns:
-            FetchedTranscript object
+            CompactTranscript object (interface เดียวกับ FetchedTranscript)
+        
+        Raises:
+            TranscriptError: ถ้าเกิดข้อผิดพลาดในการดึง transcript
+        """
+        cache_key = make_cache_key(video_id, languages, preserve_formatting, translate_to)
+        transcript = self.cache.get(cache_key)
+        if transcript is not None:
+            return transcript
+        return self.single_flight.do(
+            cache_key,
+            lambda: self._fetch_and_cache(
+                cache_key, video_id, languages, preserve_formatting, translate_to, before_fetch
+            )
+        )
+    
+    def _fetch_and_cache(
+        self,
+        cache_key: str,
+        video_id: str,
+        languages: Optional[List[str]],
+        preserve_formatting: bool,
+        translate_to: Optional[str] = None,
+        before_fetch: Optional[Callable[[], None]] = None
+    ):
+        """ดึง transcript จาก YouTube แล้วเก็บลง cache (ในรูป CompactTranscript)"""
+        # ตรวจ cache อีกครั้งหลังได้เป็น leader: leader ก่อนหน้าอาจเก็บผลไปแล้ว
+        # ระหว่างที่ request นี้ miss กับตอนเข้า single flight (ไม่นับซ้ำในสถิติ)
+        cached = self.cache.get(cache_key, record=False)
+        if cached is not None:
+            return cached
+        if before_fetch is not None:
+            before_fetch()
+        fetched = self._fetch_from_youtube(video_id, languages, preserve_formatting, translate_to)
+        return self._store(cache_key, CompactTranscript.from_transcript(fetched))
+    
+    def _store(self, cache_key: str, transcript: CompactTranscript) -> CompactTranscript:
+        """เก็บ transcript ที่ได้จาก YouTube ลง cache และแจ้ง fetch listeners"""
+        TRANSCRIPT_SNIPPETS.observe(len(transcript))
+        self.cache.set(cache_key, transcript)
+        for callback in self._fetch_listeners:
+            try:
+                callback(transcript)
+            except Exception:
+                logger.exception("fetch listener ล้มเหลว")
+        return transcript
+    
+    def stream_transcript(
+        self,
+        video_id: str,
+        languages: Optional[List[str]] = None,
+        preserve_formatting: bool = False,
+        translate_to: Optional[str] = None,
+        batch_size: int = DEFAULT_STREAM_BATCH,
+        cancelled: Optional[threading.Event] = None
+    ) -> Iterator[Tuple[str, object]]:
+        """
+        ดึง transcript แบบ stream: ส่ง metadata เมื่อ YouTube เริ่มตอบ caption แล้วส่ง snippet ทีละ batch
+        ทันทีที่ parse ได้ (request ผ่าน egress pool เหมือน fetch_transcript)
+        (ถ้าอยู่ใน cache แล้วจะส่งจาก cache) transcript ที่ดึงครบจะถูกเก็บลง cache เหมือน fetch_transcript
+        
+        Args:
+            video_id: YouTube video ID
+            languages: รายการภาษา (เช่น ['th', 'en'])
+            preserve_formatting: เก็บ HTML formatting หรือไม่
+            translate_to: แปล transcript เป็นภาษานี้ถ้าระบุ
+            batch_size: จำนวน snippet สูงสุดต่อ batch
+            cancelled: event ที่ถูก set เมื่อ client ยกเลิก (หยุดอ่านจาก YouTube ทันที ไม่เก็บลง cache)
+        
+        Yields:
+            ("metadata", dict) หนึ่งครั้ง แล้ว ("snippets", list ของ (text, start, duration))
         
         Raises:
-            Exception: ถ้าเกิดข้อผิดพลาดในการดึง transcript
+            TranscriptError: ถ้าเกิดข้อผิดพลาดในการดึง transcript
         """
+        batch_size = max(1, batch_size)
+        cache_key = make_cache_key(video_id, languages, preserve_formatting, translate_to)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            yield "metadata", self._stream_metadata(cached, cached=True, total=len(cached))
+            batch = []
+            for row in cached.rows():
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    if cancelled is not None and cancelled.is_set():
+                        return
+                    yield "snippets", batch
+                    batch = []
+            if batch:
+                yield "snippets", batch
+            return
+        
+        def open_stream(egress):
+            transcript = self._find_transcript(egress, video_id, languages, translate_to)
+            try:
+                return transcript, CaptionStream(transcript, preserve_formatting=preserve_formatting)
+            except Exception:
+                # เหมือน _fetch_from_youtube: ลบทิ้งก่อนที่ pool จะลองช่องทางถัดไป
+                self.list_cache.delete(video_id)
+                raise
+        
+        transcript, stream = self._call_upstream(
+            open_stream,
+            "ไม่สามารถดึง transcript ได้",
+            operation="fetch",
+            prefer=self._listed_by(video_id)
+        )
+        texts, starts, durations = [], [], []
+        emitted = 0
         try:
-            if languages:
-                return self.api.fetch(
-                    video_id,
-                    languages=languages,
-                    preserve_formatting=preserve_formatting
-                )
-            else:
-                return self.api.fetch(
-                    video_id,
-                    preserve_formatting=preserve_formatting
-                )
-        except TranscriptsDisabled:
-            raise Exception("Video นี้ปิดการใช้งาน transcripts")
-        except NoTranscriptFound:
-            raise Exception("ไม่พบ transcript สำหรับ video นี้")
-        except VideoUnavailable:
-            raise Exception("Video ไม่พร้อมใช้งานหรือถูกลบ")
-        except (RequestBlocked, IpBlocked) as e:
-            error_msg = str(e)
-            raise Exception(
-                "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้ (มักเกิดจาก cloud provider)\n"
-                "วิธีแก้ไข:\n"
-                "1. ใช้ cookies จาก browser (ตั้งค่า YOUTUBE_COOKIES environment variable)\n"
-                "2. ใช้ proxy service\n"
-                "3. ลองใหม่ในภายหลัง\n"
-                f"รายละเอียด: {error_msg}"
+            yield "metadata", self._stream_metadata(transcript, cached=False, total=None)
+            try:
+                for rows in stream.batches():
+                    if cancelled is not None and cancelled.is_set():
+                        return
+                    for text, start, duration in rows:
+                        texts.append(text)
+                        starts.append(start)
+                        durations.append(duration)
+                    for begin in range(emitted, len(texts) - batch_size + 1, batch_size):
+                        yield "snippets", list(zip(
+                            texts[begin:begin + batch_size],
+                            starts[begin:begin + batch_size],
+                            durations[begin:begin + batch_size]
+                        ))
+                        emitted = begin + batch_size
+            except Exception as e:
+                self.list_cache.delete(video_id)
+                raise self._to_transcript_error(e, "ไม่สามารถดึง transcript ได้") from e
+        finally:
+            # ปิด connection ทันทีเมื่อยกเลิกหรือผิดพลาด (ไม่อ่านส่วนที่เหลือจาก YouTube)
+            stream.close()
+        
+        if emitted < len(texts):
+            yield "snippets", list(zip(texts[emitted:], starts[emitted:], durations[emitted:]))
+        self._store(cache_key, CompactTranscript.from_columns(
+            video_id=video_id,
+            language=transcript.language,
+            language_code=transcript.language_code,
+            is_generated=transcript.is_generated,
+            texts=texts,
+            starts=starts,
+            durations=durations
+        ))
+    
+    @staticmethod
+    def _stream_metadata(transcript, cached: bool, total: Optional[int]) -> dict:
+        return {
+            "video_id": transcript.video_id,
+            "language": transcript.language,
+            "language_code": transcript.language_code,
+            "is_generated": transcript.is_generated,
+            "cached": cached,
+            "total_snippets": total,
+        }
+    
+    def _fetch_from_youtube(
+        self,
+        video_id: str,
+        languages: Optional[List[str]],
+        preserve_formatting: bool,
+        translate_to: Optional[str] = None
+    ):
+        """
+        ดึง transcript จาก YouTube โดยตรง (ไม่ผ่าน transcript cache)
+        ใช้ช่องทางเดียวกับที่ list มาก่อน (TranscriptList จาก list_cache จึงเหลือแค่การโหลด caption
+        1 request) ถ้าช่องทางนั้นถูกบล็อกหรือติด rate limit จะ list ใหม่ผ่านช่องทางที่ pool เลือก
+        """
+        def fetch(egress):
+            transcript = self._find_transcript(egress, video_id, languages, translate_to)
+            try:
+                return transcript.fetch(preserve_formatting=preserve_formatting)
+            except Exception:
+                # URL ของ caption อาจหมดอายุหรือช่องทางถูกบล็อก ลบทิ้งก่อนที่ pool จะลองช่องทางถัดไป
+                self.list_cache.delete(video_id)
+                raise
+        
+        return self._call_upstream(
+            fetch,
+            "ไม่สามารถดึง transcript ได้",
+            operation="fetch",
+            prefer=self._listed_by(video_id)
+        )
+    
+    def _listed_by(self, video_id: str) -> Optional[str]:
+        """ชื่อ egress ที่ list video นี้ไว้ใน list_cache (None ถ้าไม่มี)"""
+        entry = self.list_cache.get(video_id)
+        return entry[0] if entry is not None else None
+    
+    def _find_transcript(self, egress, video_id: str, languages: Optional[List[str]], translate_to: Optional[str]):
+        """
+        หา Transcript ที่จะดึงผ่าน egress นี้ (ผูกกับ session ของ egress ใน thread ปัจจุบัน)
+        ใช้ TranscriptList จาก list_cache เฉพาะเมื่อ list มาผ่าน egress เดียวกัน ไม่งั้น list ใหม่
+        
+        Args:
+            egress: Egress ที่ egress pool เลือกให้
+            video_id, languages, translate_to: เหมือน fetch_transcript
+        
+        Returns:
+            Transcript ที่พร้อม fetch
+        """
+        entry = self.list_cache.get(video_id)
+        transcript = None
+        if entry is not None and entry[0] == egress.name:
+            transcript = bind_transcript(
+                self._select_transcript(entry[1], languages, translate_to), egress.session
             )
-        except YouTubeRequestFailed as e:
-            error_msg = str(e)
-            if "IP" in error_msg or "blocked" in error_msg.lower():
-                raise Exception(
-                    "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้ (มักเกิดจาก cloud provider)\n"
-                    "วิธีแก้ไข:\n"
-                    "1. ใช้ cookies จาก browser (ตั้งค่า YOUTUBE_COOKIES environment variable)\n"
-                    "2. ใช้ proxy service\n"
-                    "3. ลองใหม่ในภายหลัง\n"
-                    f"รายละเอียด: {error_msg}"
-                )
-            raise Exception(f"ไม่สามารถดึง transcript ได้: {error_msg}")
+        if transcript is None:
+            transcript = self._select_transcript(self._list_via(egress, video_id), languages, translate_to)
+        return transcript
+    
+    @staticmethod
+    def _select_transcript(transcript_list, languages: Optional[List[str]], translate_to: Optional[str]):
+        """เลือก Transcript ตามลำดับภาษา แล้วแปลภาษาถ้าระบุ"""
+        transcript = transcript_list.find_transcript(languages or DEFAULT_LANGUAGES)
+        if translate_to:
+            transcript = transcript.translate(translate_to)
+        return transcript
+    
+    def _list_via(self, egress, video_id: str):
+        """list transcript ผ่าน egress นี้แล้วเก็บลง list_cache พร้อมชื่อ egress"""
+        transcript_list = egress.api.list(video_id)
+        self.list_cache.set(video_id, (egress.name, transcript_list), 1)
+        return transcript_list
+    
+    def _call_upstream(self, fn, failure_prefix: str, operation: str, prefer: Optional[str] = None):
+        """
+        เรียก YouTube ผ่าน circuit breaker → retry policy → egress pool
+        
+        Args:
+            fn: ฟังก์ชันที่รับ Egress ที่ pool เลือก (request ต้องออกทาง egress.api / egress.session)
+            failure_prefix: ข้อความนำหน้า error ทั่วไป
+            operation: ชื่อการเรียก (list, fetch) สำหรับ metrics
+            prefer: ชื่อ egress ที่ควรใช้ก่อนถ้ายังใช้ได้
+        
+        Returns:
+            ผลลัพธ์ของ fn
+        
+        Raises:
+            TranscriptError: error ที่แปลงแล้วพร้อม status code
+        """
+        try:
+            self.circuit_breaker.before_call()
+        except CircuitOpenError as e:
+            TRANSCRIPT_ERRORS.inc(error_class="circuit_open")
+            raise TranscriptError(str(e), status_code=503, retry_after=e.retry_after)
+        
+        started = time.perf_counter()
+        try:
+            result = self.retry_policy.call(lambda: self.egress_pool.call(fn, prefer=prefer))
         except Exception as e:
-            error_msg = str(e)
-            if "IP" in error_msg or "blocked" in error_msg.lower():
-                raise Exception(
-                    "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้\n"
-                    "นี่เป็นปัญหาที่พบบ่อยเมื่อ deploy บน cloud providers (Render, AWS, GCP, etc.)\n"
-                    "วิธีแก้ไข:\n"
-                    "1. เพิ่ม YOUTUBE_COOKIES environment variable ใน Render\n"
-                    "2. ใช้ proxy service\n"
-                    "3. ลองใหม่ในภายหลัง\n"
-                    f"รายละเอียด: {error_msg}"
-                )
-            raise Exception(f"ไม่สามารถดึง transcript ได้: {error_msg}")
+            UPSTREAM_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome="error")
+            upstream_failed = (
+                isinstance(e, EgressUnavailable) or is_block_error(e) or is_transient_error(e)
+            )
+            self.circuit_breaker.record(failed=upstream_failed)
+            raise self._to_transcript_error(e, failure_prefix) from e
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, operation=operation, outcome="ok")
+        self.circuit_breaker.record(failed=False)
+        return result
+    
+    def _to_transcript_error(self, error: Exception, failure_prefix: str) -> TranscriptError:
+        """แปลง error ของ youtube-transcript-api เป็น TranscriptError (ข้อความภาษาไทย) และนับตามประเภท"""
+        error_class, transcript_error = self._classify_error(error, failure_prefix)
+        TRANSCRIPT_ERRORS.inc(error_class=error_class)
+        return transcript_error
+    
+    def _classify_error(self, error: Exception, failure_prefix: str):
+        error_msg = str(error)
+        if isinstance(error, TranscriptsDisabled):
+            return "disabled", TranscriptError("Video นี้ปิดการใช้งาน transcripts", status_code=404)
+        if isinstance(error, NoTranscriptFound):
+            return "not_found", TranscriptError("ไม่พบ transcript สำหรับ video นี้", status_code=404)
+        if isinstance(error, VideoUnavailable):
+            return "video_unavailable", TranscriptError("Video ไม่พร้อมใช้งานหรือถูกลบ", status_code=404)
+        if isinstance(error, NotTranslatable):
+            return "not_translatable", TranscriptError("Transcript นี้ไม่รองรับการแปลภาษา", status_code=400)
+        if isinstance(error, TranslationLanguageNotAvailable):
+            return "translation_unavailable", TranscriptError(
+                "ไม่สามารถแปล transcript เป็นภาษาที่เลือกได้", status_code=400
+            )
+        if isinstance(error, EgressUnavailable):
+            return "egress_unavailable", TranscriptError(error_msg, status_code=503)
+        if is_block_error(error) or "IP" in error_msg or "blocked" in error_msg.lower():
+            return "blocked", TranscriptError(f"{BLOCKED_HELP}รายละเอียด: {error_msg}", status_code=503)
+        if is_transient_error(error):
+            return "transient", TranscriptError(f"{failure_prefix}: {error_msg}", status_code=502)
+        return "other", TranscriptError(f"{failure_prefix}: {error_msg}", status_code=500)
     
     def list_transcripts(self, video_id: str):
         """
@@ -176,47 +562,17 @@ class TranscriptService:
             TranscriptList object
         
         Raises:
-            Exception: ถ้าเกิดข้อผิดพลาดในการดึงรายการ transcript
+            TranscriptError: ถ้าเกิดข้อผิดพลาดในการดึงรายการ transcript
         """
-        try:
-            return self.api.list(video_id)
-        except TranscriptsDisabled:
-            raise Exception("Video นี้ปิดการใช้งาน transcripts")
-        except VideoUnavailable:
-            raise Exception("Video ไม่พร้อมใช้งานหรือถูกลบ")
-        except (RequestBlocked, IpBlocked) as e:
-            error_msg = str(e)
-            raise Exception(
-                "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้ (มักเกิดจาก cloud provider)\n"
-                "วิธีแก้ไข:\n"
-                "1. ใช้ cookies จาก browser (ตั้งค่า YOUTUBE_COOKIES environment variable)\n"
-                "2. ใช้ proxy service\n"
-                "3. ลองใหม่ในภายหลัง\n"
-                f"รายละเอียด: {error_msg}"
-            )
-        except YouTubeRequestFailed as e:
-            error_msg = str(e)
-            if "IP" in error_msg or "blocked" in error_msg.lower():
-                raise Exception(
-                    "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้ (มักเกิดจาก cloud provider)\n"
-                    "วิธีแก้ไข:\n"
-                    "1. ใช้ cookies จาก browser (ตั้งค่า YOUTUBE_COOKIES environment variable)\n"
-                    "2. ใช้ proxy service\n"
-                    "3. ลองใหม่ในภายหลัง\n"
-                    f"รายละเอียด: {error_msg}"
-                )
-            raise Exception(f"ไม่สามารถดึงรายการ transcript ได้: {error_msg}")
-        except Exception as e:
-            error_msg = str(e)
-            if "IP" in error_msg or "blocked" in error_msg.lower():
-                raise Exception(
-                    "YouTube กำลังบล็อกการเข้าถึงจาก IP นี้\n"
-                    "นี่เป็นปัญหาที่พบบ่อยเมื่อ deploy บน cloud providers (Render, AWS, GCP, etc.)\n"
-                    "วิธีแก้ไข:\n"
-                    "1. เพิ่ม YOUTUBE_COOKIES environment variable ใน Render\n"
-                    "2. ใช้ proxy service\n"
-                    "3. ลองใหม่ในภายหลัง\n"
-                    f"รายละเอียด: {error_msg}"
-                )
-            raise Exception(f"ไม่สามารถดึงรายการ transcript ได้: {error_msg}")
-
+        entry = self.list_cache.get(video_id)
+        if entry is not None:
+            return entry[1]
+        return self.single_flight.do(f"list:{video_id}", lambda: self._list_and_cache(video_id))
+    
+    def _list_and_cache(self, video_id: str):
+        """ดึง TranscriptList จาก YouTube แล้วเก็บลง list_cache"""
+        return self._call_upstream(
+            lambda egress: self._list_via(egress, video_id),
+            "ไม่สามารถดึงรายการ transcript ได้",
+            operation="list"
+        )
@@ -0,0 +1,145 @@
+"""
+YouTube Compat - จุดเดียวที่ใช้ส่วนภายใน (private) ของ youtube-transcript-api
+  - ทดสอบกับเวอร์ชันตาม requirements.txt (1.2.x)
+  - ถ้าเวอร์ชันใหม่เปลี่ยนส่วนภายใน ฟังก์ชันในนี้จะ fallback ไปใช้ API สาธารณะ
+    (ช้ากว่าแต่ผลลัพธ์ถูกต้อง) แทนที่จะทำให้ endpoint ใช้งานไม่ได้
+"""
+
+from html import unescape
+from typing import Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import XMLPullParser
+import logging
+
+import requests
+from youtube_transcript_api import Transcript
+from youtube_transcript_api._errors import PoTokenRequired
+
+try:
+    from youtube_transcript_api._transcripts import _raise_http_errors, _TranscriptParser
+except ImportError:
+    _raise_http_errors = _TranscriptParser = None
+
+
+logger = logging.getLogger(__name__)
+
+# ขนาดที่อ่าน caption XML จาก YouTube ต่อครั้ง (bytes)
+STREAM_READ_SIZE = 16 * 1024
+
+
+def bind_transcript(transcript: Transcript, http_client: requests.Session) -> Optional[Transcript]:
+    """
+    สร้าง Transcript ตัวเดียวกันที่ส่ง request ผ่าน http_client นี้
+    (Transcript ใน TranscriptList ผูกกับ session ของ thread ที่ list มา)
+
+    Args:
+        transcript: Transcript จาก TranscriptList (หรือจาก translate())
+        http_client: session ของ egress สำหรับ thread ปัจจุบัน
+
+    Returns:
+        Transcript ที่ผูกกับ http_client หรือ None ถ้าทำไม่ได้ในเวอร์ชันนี้
+        (ผู้เรียกต้อง list ใหม่ผ่าน egress เดียวกันแทน)
+    """
+    url = getattr(transcript, "_url", None)
+    if not isinstance(url, str):
+        return None
+    try:
+        return Transcript(
+            http_client,
+            transcript.video_id,
+            url,
+            transcript.language,
+            transcript.language_code,
+            transcript.is_generated,
+            transcript.translation_languages,
+        )
+    except (TypeError, AttributeError):
+        return None
+
+
+def _caption_html_regex(preserve_formatting: bool):
+    """regex ตัด HTML ของ _TranscriptParser (None ถ้าเวอร์ชันนี้ไม่มี)"""
+    if _raise_http_errors is None or _TranscriptParser is None:
+        return None
+    try:
+        return _TranscriptParser(preserve_formatting=preserve_formatting)._html_regex
+    except (TypeError, AttributeError):
+        return None
+
+
+class CaptionStream:
+    """
+    โหลด caption XML ของ Transcript แบบ stream แล้ว parse ทีละส่วนที่อ่านได้
+      - สร้าง object = ส่ง request และตรวจ status (เรียกภายใน egress pool เพื่อให้นับกับช่องทางที่ใช้)
+      - batches() = อ่าน body และคืน snippet ที่ parse เสร็จแล้วทีละส่วน
+    ถ้าใช้ส่วนภายในของ library ไม่ได้จะ fallback เป็น transcript.fetch() แล้วคืนเป็นส่วนเดียว
+    """
+
+    def __init__(self, transcript: Transcript, preserve_formatting: bool = False, read_size: int = STREAM_READ_SIZE):
+        """
+        Args:
+            transcript: Transcript ที่ผูกกับ session ของ egress ที่เลือก
+            preserve_formatting: เก็บ HTML formatting หรือไม่
+            read_size: ขนาดที่อ่านต่อครั้ง (bytes)
+        """
+        self.read_size = read_size
+        self._response = None
+        self._rows: Optional[List[Tuple[str, float, float]]] = None
+        self._html_regex = _caption_html_regex(preserve_formatting)
+        url = getattr(transcript, "_url", None)
+        http_client = getattr(transcript, "_http_client", None)
+        self.streaming = self._html_regex is not None and isinstance(url, str) and http_client is not None
+
+        if not self.streaming:
+            logger.warning("youtube-transcript-api เวอร์ชันนี้ไม่รองรับการ stream caption ใช้ fetch() แทน")
+            fetched = transcript.fetch(preserve_formatting=preserve_formatting)
+            self._rows = [(snippet.text, snippet.start, snippet.duration) for snippet in fetched]
+            return
+
+        # ตรวจเหมือน Transcript.fetch() (caption ที่ต้องใช้ PoToken โหลดไม่ได้)
+        if "&exp=xpe" in url:
+            raise PoTokenRequired(transcript.video_id)
+        response = http_client.get(url, stream=True)
+        try:
+            self._response = _raise_http_errors(response, transcript.video_id)
+        except Exception:
+            response.close()
+            raise
+
+    def batches(self) -> Iterator[List[Tuple[str, float, float]]]:
+        """
+        Yields:
+            list ของ (text, start, duration) ที่ parse ได้จากข้อมูลแต่ละส่วนที่อ่านมา
+        """
+        if self._rows is not None:
+            yield self._rows
+            return
+        parser = XMLPullParser(events=("end",))
+        for chunk in self._response.iter_content(chunk_size=self.read_size):
+            parser.feed(chunk)
+            rows = self._read_rows(parser)
+            if rows:
+                yield rows
+        parser.close()
+        rows = self._read_rows(parser)
+        if rows:
+            yield rows
+
+    def _read_rows(self, parser: XMLPullParser) -> List[Tuple[str, float, float]]:
+        # parse เฉพาะ element <text> ที่ปิดแล้ว (ผลเหมือน _TranscriptParser.parse)
+        rows = []
+        for _, element in parser.read_events():
+            if element.tag != "text":
+                continue
+            if element.text is not None:
+                rows.append((
+                    self._html_regex.sub("", unescape(element.text)),
+                    float(element.attrib["start"]),
+                    float(element.attrib.get("dur", "0.0"))
+                ))
+            element.clear()
+        return rows
+
+    def close(self):
+        """ปิด connection (ไม่อ่านส่วนที่เหลือจาก YouTube)"""
+        if self._response is not None:
+            self._response.close()